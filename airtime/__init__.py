@@ -1,3 +1,15 @@
 from .airtime import Airtime
 
-vtpass_airtime = Airtime()
+
+def __getattr__(name):
+    # The client is created on first access, so importing the package does not read the
+    # environment, and the async client (which needs httpx) is only imported when used.
+    global vtpass_airtime
+    if name == "vtpass_airtime":
+        vtpass_airtime = Airtime()
+        return vtpass_airtime
+    if name == "AsyncAirtime":
+        from .async_airtime import AsyncAirtime
+
+        return AsyncAirtime
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
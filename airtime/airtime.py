@@ -1,12 +1,7 @@
-import json
-import logging
-
-import requests
-
 from airtime.schema import AirtimeSchema
-from vtpass.main import VtPassPythonSDK, jr
+from vtpass.bulk import BulkStats, run_bulk
+from vtpass.main import VtPassPythonSDK
 
-logging.basicConfig(level=logging.INFO)
 
 # NOTE: "International Airtime is not done yet will be available soon"
 
@@ -15,7 +10,7 @@ class Airtime(VtPassPythonSDK):
     """
     A class for handling airtime purchases via the VtPass API.
 
-    This class provides a method to purchase airtime for a specified phone number.
+    This class provides methods to purchase airtime for a specified phone number, one at a time or in bulk.
     It inherits from the VtPassPythonSDK, which provides the base functionality for API interaction.
     """
 
@@ -30,37 +25,46 @@ class Airtime(VtPassPythonSDK):
         :return: The response from the API as a dictionary. If the request is successful, the response content is returned.
                 In case of an error, the error message is returned.
         """
-        purchase_airtime_url = f"{url}/pay"
-        headers = self.post_request_headers()
         data = {
             "request_id": airtime_schema.request_id,
             "serviceID": airtime_schema.service_id,
             "amount": airtime_schema.amount,
             "phone": airtime_schema.phone_number,
         }
-        try:
-            response = requests.post(
-                purchase_airtime_url, headers=headers, data=json.dumps(data)
-            )
-            response.raise_for_status()
-            result = response.json()
+        return self._request(
+            "POST",
+            f"{url}/pay",
+            "pay",
+            "Airtime purchased successfully",
+            data=data,
+            service_id=airtime_schema.service_id,
+        )
+
+    def purchase_airtime_bulk(
+        self,
+        url,
+        airtime_schemas,
+        concurrency: int = 10,
+        stats: BulkStats = None,
+    ):
+        """
+        Purchase airtime for many phone numbers in parallel.
 
-            if "code" in result and result["code"] != "000":
-                logging.error(f"An Error Response received: {response.json()}")
-                return response.json()
-            else:
-                logging.info("Airtime purchased successfully")
-                logging.debug(
-                    f"Airtime purchased successfully for {airtime_schema.phone_number}"
-                )
-                if jr == "True":
-                    return result
-                else:
-                    return result.get("content")
+        The purchases run on a pool of `concurrency` threads sharing the client's pooled session,
+        so set POOL_MAXSIZE to at least `concurrency` to reuse every connection. Schemas are
+        pulled from `airtime_schemas` only as slots free up, so a generator of millions of rows
+        never has to be held in memory. Throughput and error counts are logged when the run finishes.
 
-        except requests.exceptions.HTTPError as http_err:
-            logging.error(f"HTTP error occurred: {http_err} - {response.text}")
-            return f"HTTP error occurred: {http_err} - {response.text}"
-        except Exception as err:
-            logging.error(f"An error occurred: {err}")
-            return f"An error occurred: {err}"
+        :param url: The base URL for the VtPass API.
+        :param airtime_schemas: An iterable of AirtimeSchema instances, it can be a generator.
+        :param concurrency: The maximum number of purchases in flight.
+        :param stats: An optional BulkStats instance that is updated with the processed, succeeded and failed counts.
+        :return: A generator of (airtime_schema, result) tuples in completion order, where result is
+                what `purchase_airtime` returned for that schema.
+        """
+        return run_bulk(
+            lambda airtime_schema: self.purchase_airtime(url, airtime_schema),
+            airtime_schemas,
+            concurrency=concurrency,
+            stats=stats,
+        )
@@ -0,0 +1,61 @@
+from airtime.schema import AirtimeSchema
+from vtpass.async_main import AsyncVtPassClient
+from vtpass.bulk import BulkStats, run_bulk_async
+
+
+class AsyncAirtime(AsyncVtPassClient):
+    """
+    The asyncio counterpart of Airtime.
+
+    It inherits from the AsyncVtPassClient, which provides the base functionality for API interaction.
+    """
+
+    async def purchase_airtime(self, url, airtime_schema: AirtimeSchema):
+        """
+        Purchase airtime for a phone number.
+
+        :param url: The base URL for the VtPass API.
+        :param airtime_schema: An instance of AirtimeSchema containing the request ID, service ID, amount, and phone number.
+        :return: The response from the API as a dictionary. If the request is successful, the response content is returned.
+                In case of an error, the error message is returned.
+        """
+        data = {
+            "request_id": airtime_schema.request_id,
+            "serviceID": airtime_schema.service_id,
+            "amount": airtime_schema.amount,
+            "phone": airtime_schema.phone_number,
+        }
+        return await self._request(
+            "POST",
+            f"{url}/pay",
+            "pay",
+            "Airtime purchased successfully",
+            data=data,
+            service_id=airtime_schema.service_id,
+        )
+
+    def purchase_airtime_bulk(
+        self,
+        url,
+        airtime_schemas,
+        concurrency: int = 100,
+        stats: BulkStats = None,
+    ):
+        """
+        Purchase airtime for many phone numbers concurrently.
+
+        At most `concurrency` purchases are in flight and schemas are pulled from `airtime_schemas`
+        only as slots free up. Throughput and error counts are logged when the run finishes.
+
+        :param url: The base URL for the VtPass API.
+        :param airtime_schemas: An iterable of AirtimeSchema instances, it can be a generator.
+        :param concurrency: The maximum number of purchases in flight.
+        :param stats: An optional BulkStats instance that is updated with the processed, succeeded and failed counts.
+        :return: An async generator of (airtime_schema, result) tuples in completion order.
+        """
+        return run_bulk_async(
+            lambda airtime_schema: self.purchase_airtime(url, airtime_schema),
+            airtime_schemas,
+            concurrency=concurrency,
+            stats=stats,
+        )
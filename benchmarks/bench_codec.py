@@ -0,0 +1,140 @@
+"""
+Compare the JSON codecs on VtPass payload shapes, against the json.dumps / response.json() baseline.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_codec --count 20000
+"""
+
+import argparse
+import json
+import time
+
+import requests
+
+from vtpass.codec import CODECS
+
+REQUEST_ID = "202610171200" + "0" * 32
+
+PAY_REQUEST = {
+    "request_id": REQUEST_ID,
+    "serviceID": "dstv",
+    "amount": 1850,
+    "phone": "08011111111",
+    "billersCode": "1212121212",
+    "variation_code": "dstv-padi",
+    "subscription_type": "change",
+    "quantity": 1,
+}
+
+PAY_RESPONSE = {
+    "code": "000",
+    "content": {
+        "transactions": {
+            "status": "delivered",
+            "product_name": "DSTV Subscription",
+            "unique_element": "1212121212",
+            "unit_price": "1850",
+            "quantity": 1,
+            "service_verification": None,
+            "channel": "api",
+            "commission": 27.75,
+            "total_amount": 1822.25,
+            "discount": None,
+            "type": "TV Subscription",
+            "email": "sandbox@vtpass.com",
+            "phone": "08011111111",
+            "name": None,
+            "convinience_fee": 0,
+            "amount": "1850",
+            "platform": "api",
+            "method": "api",
+            "transactionId": "17291700000000000000",
+        }
+    },
+    "response_description": "TRANSACTION SUCCESSFUL",
+    "requestId": REQUEST_ID,
+    "amount": 1850,
+    "transaction_date": "2026-10-17T12:00:00.000000Z",
+    "purchased_code": "",
+}
+
+# A service-variations response the size of the data bundle catalogs
+VARIATIONS_RESPONSE = {
+    "response_description": "000",
+    "content": {
+        "ServiceName": "MTN Data",
+        "serviceID": "mtn-data",
+        "convinience_fee": "0 %",
+        "varations": [
+            {
+                "variation_code": f"mtn-{size}mb-{size * 2}",
+                "name": f"N{size * 2} {size}MB - 30 days",
+                "variation_amount": f"{size * 2}.00",
+                "fixedPrice": "Yes",
+            }
+            for size in range(50, 3050, 50)
+        ],
+    },
+}
+
+BALANCE_RESPONSE = {"code": 1, "contents": {"balance": 100000.5}}
+
+PAYLOADS = {
+    "pay request": PAY_REQUEST,
+    "pay response": PAY_RESPONSE,
+    "variations response": VARIATIONS_RESPONSE,
+    "balance response": BALANCE_RESPONSE,
+}
+
+
+def timed(func, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        func()
+    return time.perf_counter() - start
+
+
+def requests_response(body: bytes):
+    response = requests.Response()
+    response._content = body
+    response.status_code = 200
+    response.encoding = None
+    return response
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=20000)
+    args = parser.parse_args()
+
+    codecs = {}
+    for name, codec_class in CODECS.items():
+        try:
+            codecs[name] = codec_class()
+        except ImportError:
+            print(f"{name} is not installed, skipping it")
+
+    for payload_name, payload in PAYLOADS.items():
+        body = json.dumps(payload).encode()
+        print(f"{payload_name} ({len(body)} bytes):")
+        response = requests_response(body)
+        baseline_encode = timed(lambda: json.dumps(payload).encode(), args.count)
+        baseline_decode = timed(response.json, args.count)
+        print(
+            f"  {'baseline':>8}: encode {baseline_encode / args.count * 1e6:7.2f}us, "
+            f"decode {baseline_decode / args.count * 1e6:7.2f}us"
+        )
+        for name, codec in codecs.items():
+            assert codec.loads(codec.dumps(payload)) == payload
+            encode = timed(lambda: codec.dumps(payload), args.count)
+            decode = timed(lambda: codec.loads(body), args.count)
+            print(
+                f"  {name:>8}: encode {encode / args.count * 1e6:7.2f}us "
+                f"({baseline_encode / encode:4.1f}x), "
+                f"decode {decode / args.count * 1e6:7.2f}us ({baseline_decode / decode:4.1f}x)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Measure the cold import time of the SDK packages with `python -X importtime`.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_import --runs 5 --max-ms 400
+
+The benchmark exits with status 1 when the median import time is above --max-ms, so it
+can guard against import-time regressions in CI. The SDK is imported with the API keys
+unset, which also checks that importing does not create clients or read the environment.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+PACKAGES = [
+    "vtpass",
+    "airtime",
+    "data_subscription",
+    "electricity_payment",
+    "tv_subscriptions",
+    "educational_payment",
+]
+
+
+def measure_once():
+    """
+    Import the SDK packages in a fresh interpreter.
+
+    :return: A dictionary mapping each SDK package to its cumulative import time in microseconds.
+    """
+    env = {
+        key: value
+        for key, value in os.environ.items()
+        if key not in ("API_KEY", "PUBLIC_KEY", "SECRET_KEY")
+    }
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {', '.join(PACKAGES)}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    timings = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        # nested imports are indented further, only keep the SDK packages themselves
+        if name.strip() in PACKAGES and not name.startswith("  "):
+            timings[name.strip()] = int(cumulative)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--max-ms",
+        type=float,
+        default=None,
+        help="fail when the median import time is above this many milliseconds",
+    )
+    args = parser.parse_args()
+
+    runs = [measure_once() for _ in range(args.runs)]
+    totals = [sum(run.values()) / 1000 for run in runs]
+    median_total = statistics.median(totals)
+
+    for package in PACKAGES:
+        package_median = statistics.median(run.get(package, 0) for run in runs) / 1000
+        print(f"{package:>20}: {package_median:8.1f}ms")
+    print(f"{'total':>20}: {median_total:8.1f}ms (median of {args.runs} runs)")
+
+    if args.max_ms is not None and median_total > args.max_ms:
+        print(
+            f"import time {median_total:.1f}ms is above the {args.max_ms:.1f}ms budget"
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+"""
+Drive every product class through the local mock VtPass server and report throughput, latency percentiles and CPU per request.
+
+The mock server runs in its own process, so the CPU time reported is the SDK's alone.
+Run from the repository root:
+
+    python -m benchmarks.bench_load --requests 2000 --concurrency 20
+    python -m benchmarks.bench_load --scenario airtime --latency 0.05 --error-rate 0.01
+    python -m benchmarks.bench_load --async
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import subprocess
+import sys
+import time
+
+os.environ.setdefault("API_KEY", "bench")
+os.environ.setdefault("PUBLIC_KEY", "bench")
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("TIMEZONE", "Africa/Lagos")
+
+from airtime.airtime import Airtime  # noqa: E402
+from airtime.schema import AirtimeSchema  # noqa: E402
+from data_subscription.data_subscription import DataSubscription  # noqa: E402
+from data_subscription.schema import DataSubscriptionSchema  # noqa: E402
+from educational_payment.educational_payment import EducationalPayment  # noqa: E402
+from educational_payment.schema import EducationalPaymentSchema  # noqa: E402
+from electricity_payment.electricity_payment import ElectricityPayment  # noqa: E402
+from electricity_payment.schema import (  # noqa: E402
+    ElectricityPaymentSchema,
+    VerifyMeterValueSchema,
+)
+from tv_subscriptions.schema import TVSubscriptionSchema  # noqa: E402
+from tv_subscriptions.tv_subscription import TVSubscription  # noqa: E402
+from vtpass.bulk import is_successful, run_bulk, run_bulk_async  # noqa: E402
+from vtpass.main import VtPassPythonSDK  # noqa: E402
+from vtpass.schema import ServiceIdSchema  # noqa: E402
+
+PHONE = "08011111111"
+
+
+def _airtime(request_id):
+    schema = AirtimeSchema(
+        service_id="mtn", phone_number=PHONE, amount=100, request_id=request_id
+    )
+    return lambda client, url: client.purchase_airtime(url, schema)
+
+
+def _data(request_id):
+    schema = DataSubscriptionSchema(
+        service_id="mtn-data",
+        phone=PHONE,
+        billers_code=PHONE,
+        variation_code="mtn-100mb-200",
+        request_id=request_id,
+    )
+    return lambda client, url: client.purchase_data_susbscription(url, schema)
+
+
+def _tv(request_id):
+    schema = TVSubscriptionSchema(
+        service_id="dstv",
+        billers_code="1212121212",
+        variation_code="dstv-padi",
+        phone=PHONE,
+        request_id=request_id,
+        subscription_type="change",
+    )
+    return lambda client, url: client.tv_susbscription(url, schema)
+
+
+def _meter_verify(request_id):
+    # a distinct meter per call, so that a verification cache never answers
+    schema = VerifyMeterValueSchema(
+        service_id="ikeja-electric", type="prepaid", billers_code=request_id[-13:]
+    )
+    return lambda client, url: client.verify_meter_value(url, schema)
+
+
+def _electricity(request_id):
+    schema = ElectricityPaymentSchema(
+        service_id="ikeja-electric",
+        variation_code="prepaid",
+        billers_code="1111111111111",
+        amount=1000,
+        phone=PHONE,
+        request_id=request_id,
+    )
+    return lambda client, url: client.electricity_payment(url, schema)
+
+
+def _education(request_id):
+    schema = EducationalPaymentSchema(
+        service_id="waec",
+        variation_code="waecdirect",
+        amount=3900,
+        phone=PHONE,
+        request_id=request_id,
+        quantity=1,
+    )
+    return lambda client, url: client.educational_payment(url, schema)
+
+
+def _catalog(request_id):
+    schema = ServiceIdSchema(service_id="mtn-data")
+    return lambda client, url: client.get_service_variation_codes(url, schema)
+
+
+def _requery(request_id):
+    return lambda client, url: client.get_transaction_status(url, request_id)
+
+
+# name: (client class, async client class name, call builder), each call gets its own request ID
+SCENARIOS = {
+    "catalog": (VtPassPythonSDK, "vtpass.async_main.AsyncVtPassClient", _catalog),
+    "airtime": (Airtime, "airtime.async_airtime.AsyncAirtime", _airtime),
+    "data": (
+        DataSubscription,
+        "data_subscription.async_data_subscription.AsyncDataSubscription",
+        _data,
+    ),
+    "tv": (
+        TVSubscription,
+        "tv_subscriptions.async_tv_subscription.AsyncTVSubscription",
+        _tv,
+    ),
+    "meter-verify": (
+        ElectricityPayment,
+        "electricity_payment.async_electricity_payment.AsyncElectricityPayment",
+        _meter_verify,
+    ),
+    "electricity": (
+        ElectricityPayment,
+        "electricity_payment.async_electricity_payment.AsyncElectricityPayment",
+        _electricity,
+    ),
+    "education": (
+        EducationalPayment,
+        "educational_payment.async_educational_payment.AsyncEducationalPayment",
+        _education,
+    ),
+    # requeries the transactions paid by the airtime scenario, run before it
+    "requery": (VtPassPythonSDK, "vtpass.async_main.AsyncVtPassClient", _requery),
+}
+
+
+def start_server(args):
+    command = [
+        sys.executable,
+        "-m",
+        "vtpass.mock_server",
+        "--port",
+        "0",
+        "--latency",
+        str(args.latency),
+        "--error-rate",
+        str(args.error_rate),
+        "--pending-rate",
+        str(args.pending_rate),
+        "--seed",
+        "0",
+    ]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if not line:
+        process.kill()
+        raise RuntimeError("The mock server did not start")
+    return process, line.split()[-1]
+
+
+def import_class(path):
+    module, name = path.rsplit(".", 1)
+    return getattr(__import__(module, fromlist=[name]), name)
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def measure(client, url, calls, concurrency):
+    def timed_call(call):
+        start = time.perf_counter()
+        result = call(client, url)
+        return time.perf_counter() - start, result
+
+    # warm up the connection pool and the code paths
+    for _ in run_bulk(timed_call, calls[:10], concurrency=concurrency):
+        pass
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    outcomes = [
+        outcome
+        for _, outcome in run_bulk(timed_call, calls[10:], concurrency=concurrency)
+    ]
+    return outcomes, time.perf_counter() - start, time.process_time() - cpu_start
+
+
+async def measure_async(client, url, calls, concurrency):
+    async def timed_call(call):
+        start = time.perf_counter()
+        result = await call(client, url)
+        return time.perf_counter() - start, result
+
+    async for _ in run_bulk_async(timed_call, calls[:10], concurrency=concurrency):
+        pass
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    outcomes = [
+        outcome
+        async for _, outcome in run_bulk_async(
+            timed_call, calls[10:], concurrency=concurrency
+        )
+    ]
+    return outcomes, time.perf_counter() - start, time.process_time() - cpu_start
+
+
+def report(name, outcomes, elapsed, cpu):
+    count = len(outcomes)
+    latencies = sorted(latency for latency, _ in outcomes)
+    succeeded = sum(1 for _, result in outcomes if is_successful(result))
+    print(
+        f"{name:>12}: {count / elapsed:7.0f} req/s, "
+        f"p50 {percentile(latencies, 0.5) * 1e3:6.2f}ms, "
+        f"p95 {percentile(latencies, 0.95) * 1e3:6.2f}ms, "
+        f"p99 {percentile(latencies, 0.99) * 1e3:6.2f}ms, "
+        f"cpu {cpu / count * 1e6:5.0f}us/req, "
+        f"{succeeded}/{count} succeeded"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), action="append")
+    parser.add_argument(
+        "--async", dest="use_async", action="store_true", help="use the async clients"
+    )
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--pending-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    scenarios = args.scenario or list(SCENARIOS)
+    if "requery" in scenarios and "airtime" not in scenarios:
+        scenarios.insert(0, "airtime")
+    scenarios.sort(key=list(SCENARIOS).index)
+
+    logging.disable(logging.CRITICAL)
+    process, url = start_server(args)
+    try:
+        if args.use_async:
+            asyncio.run(run_async(scenarios, url, args))
+        else:
+            run(scenarios, url, args)
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def build_calls(client, name, count, paid_request_ids):
+    # one request ID per call, plus the 10 warm up calls
+    if name == "requery":
+        request_ids = paid_request_ids
+    else:
+        request_ids = client.generate_request_ids(count + 10)
+    build_call = SCENARIOS[name][2]
+    return request_ids, [build_call(request_id) for request_id in request_ids]
+
+
+def run(scenarios, url, args):
+    paid_request_ids = []
+    for name in scenarios:
+        client = SCENARIOS[name][0]()
+        request_ids, calls = build_calls(client, name, args.requests, paid_request_ids)
+        report(name, *measure(client, url, calls, args.concurrency))
+        if name == "airtime":
+            paid_request_ids = request_ids
+
+
+async def run_async(scenarios, url, args):
+    from vtpass.async_main import close_async_client
+
+    paid_request_ids = []
+    try:
+        for name in scenarios:
+            client = import_class(SCENARIOS[name][1])()
+            request_ids, calls = build_calls(
+                client, name, args.requests, paid_request_ids
+            )
+            report(name, *await measure_async(client, url, calls, args.concurrency))
+            if name == "airtime":
+                paid_request_ids = request_ids
+    finally:
+        await close_async_client()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Compare the original per-call request ID generation against RequestIdGenerator.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_request_id --count 100000
+"""
+
+import argparse
+import time
+import uuid
+from datetime import datetime
+
+import pytz
+
+from vtpass.request_id import RequestIdGenerator
+
+TIMEZONE = "Africa/Lagos"
+
+
+def legacy_generate_request_id():
+    # The implementation VtPassPythonSDK.generate_request_id used before, minus the logging
+    timezone = pytz.timezone(TIMEZONE)
+    time_now = datetime.now(timezone)
+    _id = str(uuid.uuid4()).replace("-", "")
+    return f"{time_now.strftime('%Y%m%d%H%M')}{_id}"
+
+
+def timed(func, count):
+    start = time.perf_counter()
+    func(count)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=100000)
+    args = parser.parse_args()
+
+    generator = RequestIdGenerator(TIMEZONE)
+    results = {
+        "legacy": timed(
+            lambda n: [legacy_generate_request_id() for _ in range(n)], args.count
+        ),
+        "generate": timed(
+            lambda n: [generator.generate() for _ in range(n)], args.count
+        ),
+        "generate_many": timed(generator.generate_many, args.count),
+    }
+
+    ids = generator.generate_many(args.count)
+    assert len(set(ids)) == len(ids), "duplicate request IDs"
+    assert all(len(request_id) == 44 for request_id in ids)
+
+    for name, elapsed in results.items():
+        print(
+            f"{name:>14}: {elapsed:.3f}s for {args.count} IDs, "
+            f"{elapsed / args.count * 1e9:.0f}ns/ID, "
+            f"{results['legacy'] / elapsed:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
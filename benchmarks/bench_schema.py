@@ -0,0 +1,151 @@
+"""
+Compare per-row schema construction against validate_many and construct_many for every schema module.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_schema --rows 100000
+    python -m benchmarks.bench_schema --module electricity_payment
+"""
+
+import argparse
+import gc
+import time
+
+from airtime.schema import AirtimeSchema
+from data_subscription.schema import DataSubscriptionSchema
+from educational_payment.schema import EducationalPaymentSchema
+from electricity_payment.schema import ElectricityPaymentSchema, VerifyMeterValueSchema
+from tv_subscriptions.schema import TVSubscriptionSchema
+from vtpass.validation import construct_many, validate_many
+
+REQUEST_ID = "202610171200" + "0" * 32
+
+# A representative row for the schemas of each schema module
+SAMPLE_ROWS = {
+    "airtime": [
+        (
+            AirtimeSchema,
+            {
+                "service_id": "mtn",
+                "phone_number": "08011111111",
+                "amount": 100,
+                "request_id": REQUEST_ID,
+            },
+        )
+    ],
+    "data_subscription": [
+        (
+            DataSubscriptionSchema,
+            {
+                "service_id": "mtn-data",
+                "phone": "08011111111",
+                "billers_code": "08011111111",
+                "variation_code": "mtn-10mb-100",
+                "request_id": REQUEST_ID,
+            },
+        )
+    ],
+    "educational_payment": [
+        (
+            EducationalPaymentSchema,
+            {
+                "service_id": "waec",
+                "variation_code": "waecdirect",
+                "amount": 900,
+                "phone": "08011111111",
+                "request_id": REQUEST_ID,
+                "quantity": 1,
+            },
+        )
+    ],
+    "electricity_payment": [
+        (
+            ElectricityPaymentSchema,
+            {
+                "service_id": "ikeja-electric",
+                "variation_code": "prepaid",
+                "billers_code": "1111111111111",
+                "amount": 1000,
+                "phone": "08011111111",
+                "request_id": REQUEST_ID,
+            },
+        ),
+        (
+            VerifyMeterValueSchema,
+            {
+                "service_id": "ikeja-electric",
+                "type": "prepaid",
+                "billers_code": "1111111111111",
+            },
+        ),
+    ],
+    "tv_subscriptions": [
+        (
+            TVSubscriptionSchema,
+            {
+                "service_id": "dstv",
+                "billers_code": "1212121212",
+                "variation_code": "dstv-padi",
+                "phone": "08011111111",
+                "request_id": REQUEST_ID,
+                "subscription_type": "renew",
+            },
+        )
+    ],
+}
+
+
+def timed(func, repeat):
+    # best of `repeat` runs, without the garbage collector pausing in the middle
+    best = None
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+    finally:
+        gc.enable()
+    return best
+
+
+def bench(schema, row, count, repeat):
+    rows = [dict(row) for _ in range(count)]
+    validated = validate_many(schema, rows)
+    assert validated[0] == schema(**row), "validate_many differs from the constructor"
+    dumped = [model.model_dump() for model in validated]
+    assert construct_many(schema, dumped[:1])[0] == validated[0]
+
+    validate_many(schema, rows[:10])
+    results = {
+        "per row": timed(lambda: [schema(**row) for row in rows], repeat),
+        "validate_many": timed(lambda: validate_many(schema, rows), repeat),
+        "construct_many": timed(lambda: construct_many(schema, dumped), repeat),
+    }
+    for name, elapsed in results.items():
+        print(
+            f"  {schema.__name__:>26} {name:>14}: {elapsed * 1e9 / count:6.0f}ns/row, "
+            f"{results['per row'] / elapsed:.1f}x"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--module", choices=sorted(SAMPLE_ROWS), help="only benchmark this module"
+    )
+    args = parser.parse_args()
+
+    for module, samples in SAMPLE_ROWS.items():
+        if args.module and module != args.module:
+            continue
+        print(f"{module}:")
+        for schema, row in samples:
+            bench(schema, row, args.rows, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
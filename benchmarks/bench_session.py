@@ -0,0 +1,63 @@
+"""
+Compare a fresh connection per call against the pooled session shared by the SDK.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_session --requests 2000
+"""
+
+import argparse
+import logging
+import os
+import time
+
+os.environ.setdefault("API_KEY", "bench")
+os.environ.setdefault("PUBLIC_KEY", "bench")
+os.environ.setdefault("SECRET_KEY", "bench")
+
+from vtpass.main import VtPassPythonSDK  # noqa: E402
+from vtpass.mock_server import start_mock_server  # noqa: E402
+from vtpass.session import build_session  # noqa: E402
+
+
+def run(client, url, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        client.get_credit_wallet_balance(url)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    server = start_mock_server()
+    url = server.url
+    try:
+        fresh = VtPassPythonSDK(session=build_session(keep_alive=False))
+        pooled = VtPassPythonSDK()
+        # warm up both clients so that the pooled one has an open connection
+        run(fresh, url, 10)
+        run(pooled, url, 10)
+
+        fresh_elapsed = run(fresh, url, args.requests)
+        pooled_elapsed = run(pooled, url, args.requests)
+    finally:
+        server.stop()
+
+    for name, elapsed in (
+        ("fresh connection", fresh_elapsed),
+        ("pooled session", pooled_elapsed),
+    ):
+        print(
+            f"{name:>16}: {elapsed:.3f}s total, "
+            f"{elapsed / args.requests * 1e6:.0f}us/request, "
+            f"{args.requests / elapsed:.0f} requests/s"
+        )
+    print(f"{'speedup':>16}: {fresh_elapsed / pooled_elapsed:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Compare decoding a large service-variations response whole against streaming its variations.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_stream --variations 20000
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+from vtpass.streaming import STREAM_CHUNK_SIZE, VARIATION_FIELDS, iter_json_array
+
+
+def variations_body(count: int) -> bytes:
+    return json.dumps(
+        {
+            "response_description": "000",
+            "content": {
+                "ServiceName": "Synthetic Data",
+                "serviceID": "synthetic-data",
+                "convinience_fee": "0 %",
+                "varations": [
+                    {
+                        "variation_code": f"synthetic-{index}",
+                        "name": f"N{index} {index}MB - 30 days, valid on all networks",
+                        "variation_amount": f"{index}.00",
+                        "fixedPrice": "Yes",
+                    }
+                    for index in range(count)
+                ],
+            },
+        }
+    ).encode()
+
+
+def chunks_of(body: bytes):
+    # stands in for response.iter_content(STREAM_CHUNK_SIZE)
+    for start in range(0, len(body), STREAM_CHUNK_SIZE):
+        yield body[start : start + STREAM_CHUNK_SIZE]
+
+
+def whole(chunks, fields):
+    body = b"".join(chunks)
+    for item in json.loads(body)["content"]["varations"]:
+        yield item if fields is None else {field: item.get(field) for field in fields}
+
+
+def streamed(chunks, fields):
+    return iter_json_array(chunks, "varations", fields)
+
+
+def measure(parse, body: bytes, fields):
+    """
+    :return: The seconds to the first item, the seconds to the last one and the peak of the
+        memory allocated while parsing, the body itself aside, since both receive it in chunks.
+    """
+    start = time.perf_counter()
+    first = None
+    count = 0
+    for _ in parse(chunks_of(body), fields):
+        if first is None:
+            first = time.perf_counter() - start
+        count += 1
+    total = time.perf_counter() - start
+    # tracing slows allocations down, so the memory is measured on a second, untimed pass
+    tracemalloc.start()
+    for _ in parse(chunks_of(body), fields):
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return first, total, peak, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--variations", type=int, default=20000)
+    args = parser.parse_args()
+
+    body = variations_body(args.variations)
+    print(f"{args.variations} variations ({len(body) / 1e6:.1f} MB):")
+    for fields in (None, VARIATION_FIELDS):
+        print(f"  fields {'all' if fields is None else ', '.join(fields)}:")
+        for name, parse in (("whole", whole), ("streamed", streamed)):
+            first, total, peak, count = measure(parse, body, fields)
+            assert count == args.variations
+            print(
+                f"    {name:>8}: first item {first * 1e3:7.2f}ms, "
+                f"all items {total * 1e3:7.2f}ms, peak memory {peak / 1e6:6.2f} MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
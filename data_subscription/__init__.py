@@ -1,3 +1,15 @@
 from .data_subscription import DataSubscription
 
-vtpass_data_subscription = DataSubscription()
+
+def __getattr__(name):
+    # The client is created on first access, so importing the package does not read the
+    # environment, and the async client (which needs httpx) is only imported when used.
+    global vtpass_data_subscription
+    if name == "vtpass_data_subscription":
+        vtpass_data_subscription = DataSubscription()
+        return vtpass_data_subscription
+    if name == "AsyncDataSubscription":
+        from .async_data_subscription import AsyncDataSubscription
+
+        return AsyncDataSubscription
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
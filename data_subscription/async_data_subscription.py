@@ -0,0 +1,70 @@
+from vtpass.async_main import AsyncVtPassClient
+from vtpass.coalesce import coalesced
+
+from .schema import DataSubscriptionSchema, VerifySmileEmailSchema
+
+
+class AsyncDataSubscription(AsyncVtPassClient):
+    """
+    The asyncio counterpart of DataSubscription.
+
+    It inherits from the AsyncVtPassClient, which provides the base functionality for API interaction.
+    """
+
+    async def purchase_data_susbscription(
+        self, url: str, data_sub_schema: DataSubscriptionSchema
+    ):
+        """
+        Purchase data subscription for a phone number.
+
+        :param url: The base URL for the VtPass API.
+        :param data_sub_schema: An instance of DataSubscriptionSchema containing the request ID, service ID, amount, phone, billers code and variation code.
+        :return: The response of the transaction. In case of an error, the error message is returned.
+        """
+        amount, error = self._check_variation(
+            data_sub_schema.service_id,
+            data_sub_schema.variation_code,
+            data_sub_schema.amount,
+        )
+        if error is not None:
+            return error
+        data = {
+            "request_id": data_sub_schema.request_id,
+            "serviceID": data_sub_schema.service_id,
+            "amount": amount,
+            "phone": data_sub_schema.phone,
+            "billersCode": data_sub_schema.billers_code,
+            "variation_code": data_sub_schema.variation_code,
+        }
+        return await self._request(
+            "POST",
+            f"{url}/pay",
+            "pay",
+            "Data Subscription purchased successfully",
+            data=data,
+            service_id=data_sub_schema.service_id,
+        )
+
+    @coalesced("merchant-verify")
+    async def verify_smile_email(
+        self, url: str, verify_smile_schema: VerifySmileEmailSchema
+    ):
+        """
+        Verify a smile email before attempting to make payment.
+
+        :param url: The base URL for the VtPass API.
+        :param verify_smile_schema: An instance of VerifySmileEmailSchema containing the service ID and billers code.
+        :return: The response of the transaction. In case of an error, the error message is returned.
+        """
+        data = {
+            "serviceID": verify_smile_schema.service_id,
+            "billersCode": verify_smile_schema.billers_code,
+        }
+        return await self._request(
+            "POST",
+            f"{url}/merchant-verify/smile/email",
+            "merchant-verify",
+            "Email verified successfully",
+            data=data,
+            service_id=verify_smile_schema.service_id,
+        )
@@ -1,14 +1,8 @@
-import json
-import logging
-
-import requests
-
-from vtpass.main import VtPassPythonSDK, jr
+from vtpass.coalesce import coalesced
+from vtpass.main import VtPassPythonSDK
 
 from .schema import DataSubscriptionSchema, VerifySmileEmailSchema
 
-logging.basicConfig(level=logging.INFO)
-
 
 class DataSubscription(VtPassPythonSDK):
     """
@@ -35,44 +29,31 @@ class DataSubscription(VtPassPythonSDK):
         Error: If there is an error in the request to the API
         it returns the error message
         """
-        purchase_data_subscription_url = f"{url}/pay"
-        headers = self.post_request_headers()
+        amount, error = self._check_variation(
+            data_sub_schema.service_id,
+            data_sub_schema.variation_code,
+            data_sub_schema.amount,
+        )
+        if error is not None:
+            return error
         data = {
             "request_id": data_sub_schema.request_id,
             "serviceID": data_sub_schema.service_id,
-            "amount": data_sub_schema.amount,
+            "amount": amount,
             "phone": data_sub_schema.phone,
             "billersCode": data_sub_schema.billers_code,
             "variation_code": data_sub_schema.variation_code,
         }
-        try:
-            purchase_data_subscription_url = f"{url}/pay"
-            response = requests.post(
-                purchase_data_subscription_url, headers=headers, data=json.dumps(data)
-            )
-            response.raise_for_status()
-            result = response.json()
-
-            if "code" in result and result["code"] != "000":
-                logging.error(f"An Error Response received: {response.json()}")
-                return response.json()
-            else:
-                logging.info("Data Subscription purchased successfully")
-                logging.debug(
-                    f"Data Subscription purchased successfully for {data_sub_schema.phone}"
-                )
-                if jr == "True":
-                    return result
-                else:
-                    return result.get("content")
-
-        except requests.exceptions.HTTPError as http_err:
-            logging.error(f"HTTP error occurred: {http_err} - {response.text}")
-            return f"HTTP error occurred: {http_err} - {response.text}"
-        except Exception as err:
-            logging.error(f"An error occurred: {err}")
-            return f"An error occurred: {err}"
-
+        return self._request(
+            "POST",
+            f"{url}/pay",
+            "pay",
+            "Data Subscription purchased successfully",
+            data=data,
+            service_id=data_sub_schema.service_id,
+        )
+
+    @coalesced("merchant-verify")
     def verify_smile_email(self, url: str, verify_smile_schema: VerifySmileEmailSchema):
         """
         This method allows you to verify the Email before attempting to make payment.
@@ -84,34 +65,15 @@ class DataSubscription(VtPassPythonSDK):
         Error: If there is an error in the request to the API
         it returns the error message
         """
-
-        verify_smile_email_url = f"{url}i/merchant-verify/smile/email"
-        headers = self.post_request_headers()
         data = {
             "serviceID": verify_smile_schema.service_id,
             "billersCode": verify_smile_schema.billers_code,
         }
-        try:
-            response = requests.post(
-                verify_smile_email_url, headers=headers, data=json.dumps(data)
-            )
-            response.raise_for_status()
-            result = response.json()
-
-            if "code" in result and result["code"] != "000":
-                logging.error(f"An Error Response received: {response.json()}")
-                return response.json()
-            else:
-                logging.info("Email verified successfully")
-                logging.debug(f"Email verified successfully for {email}")
-                if jr == "True":
-                    return result
-                else:
-                    return result.get("content")
-
-        except requests.exceptions.HTTPError as http_err:
-            logging.error(f"HTTP error occurred: {http_err} - {response.text}")
-            return f"HTTP error occurred: {http_err} - {response.text}"
-        except Exception as err:
-            logging.error(f"An error occurred: {err}")
-            return f"An error occurred: {err}"
+        return self._request(
+            "POST",
+            f"{url}/merchant-verify/smile/email",
+            "merchant-verify",
+            "Email verified successfully",
+            data=data,
+            service_id=verify_smile_schema.service_id,
+        )
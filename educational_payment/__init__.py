@@ -1,3 +1,15 @@
 from .educational_payment import EducationalPayment
 
-vtpass_educational_payment = EducationalPayment()
+
+def __getattr__(name):
+    # The client is created on first access, so importing the package does not read the
+    # environment, and the async client (which needs httpx) is only imported when used.
+    global vtpass_educational_payment
+    if name == "vtpass_educational_payment":
+        vtpass_educational_payment = EducationalPayment()
+        return vtpass_educational_payment
+    if name == "AsyncEducationalPayment":
+        from .async_educational_payment import AsyncEducationalPayment
+
+        return AsyncEducationalPayment
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,112 @@
+from vtpass.async_main import AsyncVtPassClient
+from vtpass.coalesce import coalesced
+
+from .schema import (
+    EducationalPaymentSchema,
+    JambEducationalPaymentSchema,
+    VerifyJambProfileSchema,
+)
+
+
+class AsyncEducationalPayment(AsyncVtPassClient):
+    """
+    The asyncio counterpart of EducationalPayment.
+
+    It inherits from the AsyncVtPassClient, which provides the base functionality for API interaction.
+    """
+
+    @coalesced("merchant-verify")
+    async def verify_jamb_profile(
+        self, url: str, verify_jamb_schema: VerifyJambProfileSchema
+    ):
+        """
+        Verify the JAMB profile of a candidate.
+
+        :param url: The base URL for the VtPass API.
+        :param verify_jamb_schema: An instance of VerifyJambProfileSchema containing the service ID, type, and billers code.
+        :return: The response from the API as a dictionary. If the request is successful, the response content is returned.
+             In case of an error, the error message is returned.
+        """
+        data = {
+            "serviceID": verify_jamb_schema.service_id,
+            "type": verify_jamb_schema.type,
+            "billersCode": verify_jamb_schema.billers_code,
+        }
+        return await self._request(
+            "POST",
+            f"{url}/merchant-verify",
+            "merchant-verify",
+            "Jamb profile verified successfully",
+            data=data,
+            service_id=verify_jamb_schema.service_id,
+        )
+
+    async def educational_payment(
+        self, url: str, educational_payment_schema: EducationalPaymentSchema
+    ):
+        """
+        Make an educational payment.
+
+        :param url: The base URL for the VtPass API.
+        :param educational_payment_schema: An instance of EducationalPaymentSchema containing service ID, variation code, amount, phone, request ID, and quantity.
+        :return: The response from the API as a dictionary. If the request is successful, the response content is returned.
+                In case of an error, the error message is returned.
+        """
+        amount, error = self._check_variation(
+            educational_payment_schema.service_id,
+            educational_payment_schema.variation_code,
+            educational_payment_schema.amount,
+        )
+        if error is not None:
+            return error
+        data = {
+            "serviceID": educational_payment_schema.service_id,
+            "variation_code": educational_payment_schema.variation_code,
+            "amount": amount,
+            "phone": educational_payment_schema.phone,
+            "request_id": educational_payment_schema.request_id,
+            "quantity": educational_payment_schema.quantity,
+        }
+        return await self._request(
+            "POST",
+            f"{url}/pay",
+            "pay",
+            "Educational payment successful",
+            data=data,
+            service_id=educational_payment_schema.service_id,
+        )
+
+    async def jamb_educational_payment(
+        self, url: str, jamb_edu_payment_schema: JambEducationalPaymentSchema
+    ):
+        """
+        Make a JAMB educational payment.
+
+        :param url: The base URL for the VtPass API.
+        :param jamb_edu_payment_schema: An instance of JambEducationalPaymentSchema containing service ID, variation code, amount, phone, request ID, and billers code.
+        :return: The response from the API as a dictionary. If the request is successful, the response content is returned.
+                In case of an error, the error message is returned.
+        """
+        amount, error = self._check_variation(
+            jamb_edu_payment_schema.service_id,
+            jamb_edu_payment_schema.variation_code,
+            jamb_edu_payment_schema.amount,
+        )
+        if error is not None:
+            return error
+        data = {
+            "serviceID": jamb_edu_payment_schema.service_id,
+            "variation_code": jamb_edu_payment_schema.variation_code,
+            "amount": amount,
+            "phone": jamb_edu_payment_schema.phone,
+            "request_id": jamb_edu_payment_schema.request_id,
+            "billersCode": jamb_edu_payment_schema.billers_code,
+        }
+        return await self._request(
+            "POST",
+            f"{url}/pay",
+            "pay",
+            "Jamb Educational payment successful",
+            data=data,
+            service_id=jamb_edu_payment_schema.service_id,
+        )
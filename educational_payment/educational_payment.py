@@ -1,9 +1,5 @@
-import json
-import logging
-
-import requests
-
-from vtpass.main import VtPassPythonSDK, jr
+from vtpass.coalesce import coalesced
+from vtpass.main import VtPassPythonSDK
 
 from .schema import (
     EducationalPaymentSchema,
@@ -11,8 +7,6 @@ from .schema import (
     VerifyJambProfileSchema,
 )
 
-logger = logging.basicConfig(level=logging.INFO)
-
 
 class EducationalPayment(VtPassPythonSDK):
     """
@@ -22,6 +16,7 @@ class EducationalPayment(VtPassPythonSDK):
     It inherits from the VtPassPythonSDK, which provides the base functionality for API interaction.
     """
 
+    @coalesced("merchant-verify")
     def verify_jamb_profile(
         self, url: str, verify_jamb_schema: VerifyJambProfileSchema
     ):
@@ -35,34 +30,19 @@ class EducationalPayment(VtPassPythonSDK):
         :return: The response from the API as a dictionary. If the request is successful, the response content is returned.
              In case of an error, the error message is returned.
         """
-        verify_jamb_profile_url = f"{url}/merchant-verify"
-        headers = self.post_request_headers()
         data = {
             "serviceID": verify_jamb_schema.service_id,
             "type": verify_jamb_schema.type,
             "billersCode": verify_jamb_schema.billers_code,
         }
-        try:
-            response = requests.post(
-                verify_jamb_profile_url, headers=headers, data=json.dumps(data)
-            )
-            response.raise_for_status()
-            result = response.json()
-            if "code" in response and response["code"] != "000":
-                logging.error(f"An Error Response received: {response}")
-                return result
-            else:
-                logging.info("Jamb profile verified successfully")
-                if jr == "True":
-                    return result
-                else:
-                    return result.get("content")
-        except requests.exceptions.HTTPError as http_err:
-            logging.error(f"HTTP error occurred: {http_err} - {response.text}")
-            return f"HTTP error occurred: {http_err} - {response.text}"
-        except Exception as err:
-            logging.error(f"An error occurred: {err}")
-            return f"An error occurred: {err}"
+        return self._request(
+            "POST",
+            f"{url}/merchant-verify",
+            "merchant-verify",
+            "Jamb profile verified successfully",
+            data=data,
+            service_id=verify_jamb_schema.service_id,
+        )
 
     def educational_payment(
         self, url: str, educational_payment_schema: EducationalPaymentSchema
@@ -77,36 +57,29 @@ class EducationalPayment(VtPassPythonSDK):
         :return: The response from the API as a dictionary. If the request is successful, the response content is returned.
                 In case of an error, the error message is returned.
         """
-        educational_payment_url = f"{url}/pay"
-        headers = self.post_request_headers()
+        amount, error = self._check_variation(
+            educational_payment_schema.service_id,
+            educational_payment_schema.variation_code,
+            educational_payment_schema.amount,
+        )
+        if error is not None:
+            return error
         data = {
             "serviceID": educational_payment_schema.service_id,
             "variation_code": educational_payment_schema.variation_code,
-            "amount": educational_payment_schema.amount,
+            "amount": amount,
             "phone": educational_payment_schema.phone,
             "request_id": educational_payment_schema.request_id,
             "quantity": educational_payment_schema.quantity,
         }
-        try:
-            response = requests.post(
-                educational_payment_url, headers=headers, data=json.dumps(data)
-            )
-            response.raise_for_status()
-            result = response.json()
-            if "code" in result and result["code"] != "000":
-                logging.error(f"An Error Response received: {result}")
-                return result
-            else:
-                logging.info("Educational payment successful")
-                if jr == "True":
-                    return result
-                else:
-                    return result.get("content")
-        except requests.exceptions.HTTPError as http_err:
-            logging.error(f"HTTP error occurred: {http_err} - {response.text}")
-            return f"HTTP error occurred: {http_err} - {response.text}"
-        except Exception as err:
-            logging.error(f"An error occurred: {err}")
+        return self._request(
+            "POST",
+            f"{url}/pay",
+            "pay",
+            "Educational payment successful",
+            data=data,
+            service_id=educational_payment_schema.service_id,
+        )
 
     def jamb_educational_payment(
         self, url: str, jamb_edu_payment_schema: JambEducationalPaymentSchema
@@ -121,33 +94,26 @@ class EducationalPayment(VtPassPythonSDK):
         :return: The response from the API as a dictionary. If the request is successful, the response content is returned.
                 In case of an error, the error message is returned.
         """
-        jamb_edu_payment_url = f"{url}/pay"
-        headers = self.post_request_headers()
+        amount, error = self._check_variation(
+            jamb_edu_payment_schema.service_id,
+            jamb_edu_payment_schema.variation_code,
+            jamb_edu_payment_schema.amount,
+        )
+        if error is not None:
+            return error
         data = {
             "serviceID": jamb_edu_payment_schema.service_id,
             "variation_code": jamb_edu_payment_schema.variation_code,
-            "amount": jamb_edu_payment_schema.amount,
+            "amount": amount,
             "phone": jamb_edu_payment_schema.phone,
             "request_id": jamb_edu_payment_schema.request_id,
             "billersCode": jamb_edu_payment_schema.billers_code,
         }
-        try:
-            response = requests.post(
-                jamb_edu_payment_url, headers=headers, data=json.dumps(data)
-            )
-            response.raise_for_status()
-            result = response.json()
-            if "code" in result and result["code"] != "000":
-                logging.error(f"An Error Response received: {result}")
-                return result
-            else:
-                logging.info("Jamb Educational payment successful")
-                if jr == "True":
-                    return result
-                else:
-                    return result.get("content")
-        except requests.exceptions.HTTPError as http_err:
-            logging.error(f"HTTP error occurred: {http_err} - {response.text}")
-            return f"HTTP error occurred: {http_err} - {response.text}"
-        except Exception as err:
-            logging.error(f"An error occurred: {err}")
+        return self._request(
+            "POST",
+            f"{url}/pay",
+            "pay",
+            "Jamb Educational payment successful",
+            data=data,
+            service_id=jamb_edu_payment_schema.service_id,
+        )
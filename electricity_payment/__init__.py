@@ -1,3 +1,15 @@
 from .electricity_payment import ElectricityPayment
 
-vtpass_electricity_payment = ElectricityPayment()
+
+def __getattr__(name):
+    # The client is created on first access, so importing the package does not read the
+    # environment, and the async client (which needs httpx) is only imported when used.
+    global vtpass_electricity_payment
+    if name == "vtpass_electricity_payment":
+        vtpass_electricity_payment = ElectricityPayment()
+        return vtpass_electricity_payment
+    if name == "AsyncElectricityPayment":
+        from .async_electricity_payment import AsyncElectricityPayment
+
+        return AsyncElectricityPayment
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,109 @@
+from vtpass.async_main import AsyncVtPassClient
+from vtpass.bulk import BulkStats, run_bulk_async
+from vtpass.cache import verified
+from vtpass.coalesce import coalesced
+
+from .schema import ElectricityPaymentSchema, VerifyMeterValueSchema
+
+
+class AsyncElectricityPayment(AsyncVtPassClient):
+    """
+    The asyncio counterpart of ElectricityPayment.
+
+    It inherits from the AsyncVtPassClient, which provides the base functionality for API interaction.
+    """
+
+    @verified
+    @coalesced("merchant-verify")
+    async def verify_meter_value(
+        self, url: str, verify_meter_value: VerifyMeterValueSchema
+    ):
+        """
+        Verify the meter value of a given meter number.
+
+        :param url: The base URL for the VtPass API.
+        :param verify_meter_value: An instance of VerifyMeterValueSchema containing the service ID, type, and billers code.
+        :return: The response from the API as a dictionary. If the request is successful, the response content is returned.
+                In case of an error, the error message is returned.
+        """
+        data = {
+            "serviceID": verify_meter_value.service_id,
+            "type": verify_meter_value.type,
+            "billersCode": verify_meter_value.billers_code,
+        }
+        return await self._request(
+            "POST",
+            f"{url}/merchant-verify",
+            "merchant-verify",
+            "Meter value verified successfully",
+            data=data,
+            service_id=verify_meter_value.service_id,
+        )
+
+    async def verify_meters_bulk(
+        self,
+        url: str,
+        verify_meter_values,
+        concurrency: int = 10,
+        stats: BulkStats = None,
+    ):
+        """
+        Verify many meter numbers concurrently, see `ElectricityPayment.verify_meters_bulk`.
+
+        :param url: The base URL for the VtPass API.
+        :param verify_meter_values: An iterable of VerifyMeterValueSchema instances.
+        :param concurrency: The maximum number of verifications in flight.
+        :param stats: An optional BulkStats instance that is updated with the processed, succeeded and failed counts.
+        :return: A dictionary mapping each (service_id, type, billers_code) tuple to what
+                `verify_meter_value` returned for it.
+        """
+        unique = {}
+        for verify_meter_value in verify_meter_values:
+            key = (
+                verify_meter_value.service_id,
+                verify_meter_value.type,
+                verify_meter_value.billers_code,
+            )
+            unique.setdefault(key, verify_meter_value)
+        results = {}
+        async for verify_meter_value, result in run_bulk_async(
+            lambda verify_meter_value: self.verify_meter_value(url, verify_meter_value),
+            unique.values(),
+            concurrency=concurrency,
+            stats=stats,
+        ):
+            key = (
+                verify_meter_value.service_id,
+                verify_meter_value.type,
+                verify_meter_value.billers_code,
+            )
+            results[key] = result
+        return results
+
+    async def electricity_payment(
+        self, url: str, electricity_payment_schema: ElectricityPaymentSchema
+    ):
+        """
+        Make an electricity payment.
+
+        :param url: The base URL for the VtPass API.
+        :param electricity_payment_schema: An instance of ElectricityPaymentSchema containing service ID, variation code, billers code, amount, phone, and request ID.
+        :return: The response from the API as a dictionary. If the request is successful, the response content is returned.
+                In case of an error, the error message is returned.
+        """
+        data = {
+            "serviceID": electricity_payment_schema.service_id,
+            "variation_code": electricity_payment_schema.variation_code,
+            "billersCode": electricity_payment_schema.billers_code,
+            "amount": electricity_payment_schema.amount,
+            "phone": electricity_payment_schema.phone,
+            "request_id": electricity_payment_schema.request_id,
+        }
+        return await self._request(
+            "POST",
+            f"{url}/pay",
+            "pay",
+            "Electricity payment successful",
+            data=data,
+            service_id=electricity_payment_schema.service_id,
+        )
@@ -1,14 +1,10 @@
-import json
-import logging
-
-import requests
-
-from vtpass.main import VtPassPythonSDK, jr
+from vtpass.bulk import BulkStats, run_bulk
+from vtpass.cache import verified
+from vtpass.coalesce import coalesced
+from vtpass.main import VtPassPythonSDK
 
 from .schema import ElectricityPaymentSchema, VerifyMeterValueSchema
 
-logger = logging.basicConfig(level=logging.INFO)
-
 
 class ElectricityPayment(VtPassPythonSDK):
     """
@@ -18,45 +14,76 @@ class ElectricityPayment(VtPassPythonSDK):
     It inherits from the VtPassPythonSDK, which provides the base functionality for API interaction.
     """
 
+    @verified
+    @coalesced("merchant-verify")
     def verify_meter_value(self, url: str, verify_meter_value: VerifyMeterValueSchema):
         """
         Verify the meter value of a given meter number.
 
         This method sends a POST request to the VtPass API to verify a meter number using the provided schema.
+        Successful verifications are kept in the client's `verification_cache`, if it has one.
 
         :param url: The base URL for the VtPass API.
         :param verify_meter_value: An instance of VerifyMeterValueSchema containing the service ID, type, and billers code.
         :return: The response from the API as a dictionary. If the request is successful, the response content is returned.
                 In case of an error, the error message is returned.
         """
-        verify_meter_value_url = f"{url}/merchant-verify"
-        headers = self.post_request_headers()
         data = {
             "serviceID": verify_meter_value.service_id,
             "type": verify_meter_value.type,
             "billersCode": verify_meter_value.billers_code,
         }
-        try:
-            response = requests.post(
-                verify_meter_value_url, headers=headers, data=json.dumps(data)
+        return self._request(
+            "POST",
+            f"{url}/merchant-verify",
+            "merchant-verify",
+            "Meter value verified successfully",
+            data=data,
+            service_id=verify_meter_value.service_id,
+        )
+
+    def verify_meters_bulk(
+        self,
+        url: str,
+        verify_meter_values,
+        concurrency: int = 10,
+        stats: BulkStats = None,
+    ):
+        """
+        Verify many meter numbers in parallel.
+
+        Duplicate (service ID, type, billers code) tuples are verified once, and meters found in the
+        client's `verification_cache` are not sent to the API again.
+
+        :param url: The base URL for the VtPass API.
+        :param verify_meter_values: An iterable of VerifyMeterValueSchema instances.
+        :param concurrency: The maximum number of verifications in flight.
+        :param stats: An optional BulkStats instance that is updated with the processed, succeeded and failed counts.
+        :return: A dictionary mapping each (service_id, type, billers_code) tuple to what
+                `verify_meter_value` returned for it.
+        """
+        unique = {}
+        for verify_meter_value in verify_meter_values:
+            key = (
+                verify_meter_value.service_id,
+                verify_meter_value.type,
+                verify_meter_value.billers_code,
+            )
+            unique.setdefault(key, verify_meter_value)
+        results = {}
+        for verify_meter_value, result in run_bulk(
+            lambda verify_meter_value: self.verify_meter_value(url, verify_meter_value),
+            unique.values(),
+            concurrency=concurrency,
+            stats=stats,
+        ):
+            key = (
+                verify_meter_value.service_id,
+                verify_meter_value.type,
+                verify_meter_value.billers_code,
             )
-            response.raise_for_status()
-            result = response.json()
-            if "code" in result and result["code"] != "000":
-                logging.error(f"An Error Response received: {result}")
-                return result
-            else:
-                logging.info("Meter value verified successfully")
-                if jr == "True":
-                    return result
-                else:
-                    return result.get("content")
-        except requests.exceptions.HTTPError as http_err:
-            logging.error(f"HTTP error occurred: {http_err} - {response.text}")
-            return f"HTTP error occurred: {http_err} - {response.text}"
-        except Exception as err:
-            logging.error(f"An error occurred: {err}")
-            return f"An error occurred: {err}"
+            results[key] = result
+        return results
 
     def electricity_payment(
         self, url: str, electricity_payment_schema: ElectricityPaymentSchema
@@ -71,8 +98,6 @@ class ElectricityPayment(VtPassPythonSDK):
         :return: The response from the API as a dictionary. If the request is successful, the response content is returned.
                 In case of an error, the error message is returned.
         """
-        electricity_payment_url = f"{url}/pay"
-        headers = self.post_request_headers()
         data = {
             "serviceID": electricity_payment_schema.service_id,
             "variation_code": electricity_payment_schema.variation_code,
@@ -81,23 +106,11 @@ class ElectricityPayment(VtPassPythonSDK):
             "phone": electricity_payment_schema.phone,
             "request_id": electricity_payment_schema.request_id,
         }
-        try:
-            response = requests.post(
-                electricity_payment_url, headers=headers, data=json.dumps(data)
-            )
-            response.raise_for_status()
-            result = response.json()
-            if "code" in result and result["code"] != "000":
-                logging.error(f"An Error Response received: {result}")
-                return result
-            else:
-                logging.info("Electricity payment successful")
-                if jr == "True":
-                    return result
-                else:
-                    return result.get("content")
-        except requests.exceptions.HTTPError as http_err:
-            logging.error(f"HTTP error occurred: {http_err} - {response.text}")
-            return f"HTTP error occurred: {http_err} - {response.text}"
-        except Exception as err:
-            logging.error(f"An error occurred: {err}")
+        return self._request(
+            "POST",
+            f"{url}/pay",
+            "pay",
+            "Electricity payment successful",
+            data=data,
+            service_id=electricity_payment_schema.service_id,
+        )
@@ -18,6 +18,13 @@ setup(
         "typing-extensions==4.12.2",
         "urllib3==2.2.1",
     ],
+    extras_require={
+        "async": ["httpx==0.27.0"],
+        "fast": ["orjson==3.8.3"],
+    },
+    entry_points={
+        "console_scripts": ["vtpass-batch=vtpass.batch:main"],
+    },
     author="Abiola Adeshina",
     author_email="abiolaadedayo1993@gmail.com",
     description="VTPass Python SDK to interact with various services provided by VTPass. The SDK allows you to perform operations such as checking wallet balance, purchasing airtime, and subscribing to data services.",
@@ -0,0 +1,7 @@
+import os
+
+# The clients refuse to start without keys, and request IDs need a timezone
+os.environ.setdefault("API_KEY", "test")
+os.environ.setdefault("PUBLIC_KEY", "test")
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("TIMEZONE", "Africa/Lagos")
@@ -0,0 +1,48 @@
+import asyncio
+import unittest
+
+from airtime.async_airtime import AsyncAirtime
+from airtime.schema import AirtimeSchema
+from vtpass.async_main import close_async_client, get_async_client
+from vtpass.mock_server import MockVtPassServer
+
+
+class TestSharedAsyncClient(unittest.TestCase):
+    def setUp(self):
+        self.server = MockVtPassServer().start()
+        self.addCleanup(self.server.stop)
+
+    async def purchase(self):
+        client = AsyncAirtime()
+        return await client.purchase_airtime(
+            self.server.url,
+            AirtimeSchema(
+                service_id="mtn",
+                phone_number="08011111111",
+                amount=100,
+                request_id=client.generate_request_id(),
+            ),
+        )
+
+    def test_successive_event_loops(self):
+        # the second run must not reuse connections bound to the first, closed, loop
+        for _ in range(2):
+            result = asyncio.run(self.purchase())
+            self.assertIsInstance(result, dict)
+            self.assertEqual(result["transactions"]["status"], "delivered")
+
+    def test_one_client_per_loop(self):
+        async def shared():
+            try:
+                return get_async_client(), get_async_client()
+            finally:
+                await close_async_client()
+
+        first, again = asyncio.run(shared())
+        self.assertIs(first, again)
+        second, _ = asyncio.run(shared())
+        self.assertIsNot(first, second)
+
+
+if __name__ == "__main__":
+    unittest.main()
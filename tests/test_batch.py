@@ -0,0 +1,84 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+from vtpass.batch import BatchRunner, read_rows
+from vtpass.mock_server import MockVtPassServer
+
+ROW = {"service_id": "mtn", "phone_number": "08011111111", "amount": 100}
+
+
+class TestBatchRunner(unittest.TestCase):
+    def setUp(self):
+        self.server = MockVtPassServer().start()
+        self.addCleanup(self.server.stop)
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, "purchases.jsonl")
+
+    def run_batch(self, rows):
+        output = io.StringIO()
+        runner = BatchRunner(self.server.url, product="airtime", processes=1)
+        try:
+            runner.run(rows, output)
+        finally:
+            self.records = {
+                record["line"]: record
+                for record in map(json.loads, output.getvalue().splitlines())
+            }
+        return runner
+
+    def test_malformed_lines_are_invalid_rows(self):
+        with open(self.path, "w") as file:
+            file.write(json.dumps(ROW) + "\n")
+            file.write("{not json\n")
+            file.write("[1, 2]\n")
+            file.write("\n")
+            file.write(json.dumps(ROW) + "\n")
+        runner = self.run_batch(read_rows(self.path))
+
+        self.assertEqual(runner.stats.total, 2)
+        self.assertEqual(runner.invalid, 2)
+        self.assertEqual(sorted(self.records), [1, 2, 3, 5])
+        self.assertTrue(self.records[1]["ok"])
+        self.assertTrue(self.records[5]["ok"])
+        self.assertIn("Invalid JSON", self.records[2]["errors"][0])
+        self.assertEqual(self.records[3]["errors"], ["Expected an object, got list"])
+
+    def test_sent_chunks_are_written_before_an_error(self):
+        def rows():
+            for line_number in range(1, 101):
+                yield line_number, dict(ROW)
+            raise OSError("the disk went away")
+
+        with self.assertRaises(OSError):
+            self.run_batch(rows())
+        self.assertEqual(sorted(self.records), list(range(1, 101)))
+        self.assertTrue(all(record["ok"] for record in self.records.values()))
+
+    def test_rows_of_a_failed_worker_are_unknown(self):
+        future = Future()
+        future.set_exception(BrokenProcessPool("a worker died"))
+        output = io.StringIO()
+        runner = BatchRunner(self.server.url, product="airtime", processes=1)
+        rows = [dict(ROW, request_id="1"), dict(ROW, request_id="2")]
+        runner._write_results(output, future, ("airtime", [1, 2], rows))
+
+        records = list(map(json.loads, output.getvalue().splitlines()))
+        self.assertEqual([record["request_id"] for record in records], ["1", "2"])
+        for record in records:
+            self.assertIsNone(record["ok"])
+            self.assertEqual(record["status"], "unknown")
+            self.assertEqual(record["error"], "a worker died")
+            self.assertNotIn("result", record)
+        self.assertEqual(runner.unknown, 2)
+        self.assertEqual(runner.stats.failed, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
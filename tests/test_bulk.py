@@ -0,0 +1,187 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from airtime.airtime import Airtime
+from airtime.async_airtime import AsyncAirtime
+from airtime.schema import AirtimeSchema
+from vtpass.async_main import close_async_client
+from vtpass.bulk import BulkStats, is_successful, run_bulk, run_bulk_async
+from vtpass.mock_server import MockVtPassServer
+
+
+class Gauge(object):
+    """
+    Counts the calls in flight and remembers the most seen at once.
+    """
+
+    def __init__(self):
+        self.current = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        with self._lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+
+    def __exit__(self, *exc_info):
+        with self._lock:
+            self.current -= 1
+
+
+class TestIsSuccessful(unittest.TestCase):
+    def test_results(self):
+        self.assertTrue(is_successful({"code": "000", "content": {}}))
+        self.assertTrue(is_successful({"transactions": {"status": "delivered"}}))
+        self.assertTrue(is_successful(2500.0))
+        self.assertFalse(is_successful({"code": "016"}))
+        self.assertFalse(is_successful("An error occurred: timed out"))
+        self.assertFalse(is_successful(None))
+
+
+class TestRunBulk(unittest.TestCase):
+    def test_completion_order(self):
+        def call(delay):
+            time.sleep(delay)
+            return {"code": "000", "delay": delay}
+
+        results = list(run_bulk(call, [0.2, 0.0, 0.1], concurrency=3))
+        self.assertEqual([item for item, _ in results], [0.0, 0.1, 0.2])
+        self.assertTrue(all(result["delay"] == item for item, result in results))
+
+    def test_concurrency_bound_and_laziness(self):
+        gauge = Gauge()
+        pulled = []
+
+        def items():
+            for item in range(20):
+                pulled.append(item)
+                yield item
+
+        def call(item):
+            with gauge:
+                time.sleep(0.01)
+            return {"code": "000"}
+
+        results = run_bulk(call, items(), concurrency=4)
+        next(results)
+        # the first slots were filled, plus one item pulled to replace the finished call
+        self.assertLessEqual(len(pulled), 5)
+        self.assertEqual(len(list(results)), 19)
+        self.assertEqual(len(pulled), 20)
+        self.assertLessEqual(gauge.peak, 4)
+        self.assertGreater(gauge.peak, 1)
+
+    def test_errors_and_stats(self):
+        def call(item):
+            if item % 2:
+                raise RuntimeError("boom")
+            return {"code": "000"}
+
+        stats = BulkStats()
+        results = dict(run_bulk(call, range(6), concurrency=2, stats=stats))
+        self.assertEqual(results[1], "An error occurred: boom")
+        self.assertEqual((stats.total, stats.succeeded, stats.failed), (6, 3, 3))
+        self.assertIsNotNone(stats.finished_at)
+
+    def test_invalid_concurrency(self):
+        with self.assertRaises(ValueError):
+            next(run_bulk(str, [1], concurrency=0))
+
+
+class TestRunBulkAsync(unittest.TestCase):
+    def test_completion_order_and_concurrency_bound(self):
+        pulled = []
+        in_flight = 0
+        peak = 0
+
+        def items():
+            for delay in (0.05, 0.0, 0.03, 0.01, 0.02, 0.0):
+                pulled.append(delay)
+                yield delay
+
+        async def call(delay):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(delay)
+            in_flight -= 1
+            if delay == 0.03:
+                raise RuntimeError("boom")
+            return {"code": "000"}
+
+        async def run():
+            stats = BulkStats()
+            results = []
+            async for item, result in run_bulk_async(
+                call, items(), concurrency=2, stats=stats
+            ):
+                results.append((item, result))
+                if len(results) == 1:
+                    self.assertLessEqual(len(pulled), 3)
+            return results, stats
+
+        results, stats = asyncio.run(run())
+        self.assertEqual(results[0], (0.0, {"code": "000"}))
+        self.assertEqual(sorted(item for item, _ in results), sorted(pulled))
+        self.assertIn((0.03, "An error occurred: boom"), results)
+        self.assertEqual(peak, 2)
+        self.assertEqual((stats.total, stats.failed), (6, 1))
+
+
+class TestPurchaseAirtimeBulk(unittest.TestCase):
+    def setUp(self):
+        self.server = MockVtPassServer(latency=0.01).start()
+        self.addCleanup(self.server.stop)
+
+    def schemas(self, client, count):
+        return [
+            AirtimeSchema(
+                service_id="mtn",
+                phone_number="08011111111",
+                amount=100,
+                request_id=client.generate_request_id(),
+            )
+            for _ in range(count)
+        ]
+
+    def test_sync(self):
+        client = Airtime()
+        schemas = self.schemas(client, 10)
+        stats = BulkStats()
+        results = list(
+            client.purchase_airtime_bulk(
+                self.server.url, iter(schemas), concurrency=4, stats=stats
+            )
+        )
+        self.assertEqual(
+            sorted(schema.request_id for schema, _ in results),
+            sorted(schema.request_id for schema in schemas),
+        )
+        self.assertTrue(all(is_successful(result) for _, result in results))
+        self.assertEqual(stats.succeeded, 10)
+        self.assertEqual(self.server.requests["pay"], 10)
+
+    def test_async(self):
+        async def run():
+            client = AsyncAirtime()
+            try:
+                return [
+                    result
+                    async for _, result in client.purchase_airtime_bulk(
+                        self.server.url, self.schemas(client, 10), concurrency=4
+                    )
+                ]
+            finally:
+                await close_async_client()
+
+        results = asyncio.run(run())
+        self.assertEqual(len(results), 10)
+        self.assertTrue(all(is_successful(result) for result in results))
+        self.assertEqual(self.server.requests["pay"], 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
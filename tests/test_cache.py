@@ -0,0 +1,212 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from electricity_payment.async_electricity_payment import AsyncElectricityPayment
+from electricity_payment.electricity_payment import ElectricityPayment
+from electricity_payment.schema import VerifyMeterValueSchema
+from vtpass.async_main import AsyncVtPassClient, close_async_client
+from vtpass.cache import (
+    MISS,
+    CatalogCache,
+    DiskBackend,
+    MemoryBackend,
+    VerificationCache,
+)
+from vtpass.main import VtPassPythonSDK
+from vtpass.mock_server import MockVtPassServer
+from vtpass.schema import ServiceIdSchema
+
+
+class RecordingDiskBackend(DiskBackend):
+    """
+    Records the threads its entries are read and written from.
+    """
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self.threads = set()
+
+    def get(self, key: str):
+        self.threads.add(threading.current_thread())
+        return super().get(key)
+
+    def set(self, key: str, value, ttl: float):
+        self.threads.add(threading.current_thread())
+        super().set(key, value, ttl)
+
+
+def meter(billers_code: str = "1111111111111"):
+    return VerifyMeterValueSchema(
+        service_id="ikeja-electric", type="prepaid", billers_code=billers_code
+    )
+
+
+class BackendTests(object):
+    """
+    The behaviour every backend shares, run against each of them by the test cases below.
+    """
+
+    def make_backend(self, max_entries: int = 1024):
+        raise NotImplementedError
+
+    def test_ttl_expiry(self):
+        backend = self.make_backend()
+        backend.set("short", {"a": 1}, 0.05)
+        backend.set("long", {"b": 2}, 60)
+        self.assertEqual(backend.get("short"), {"a": 1})
+        time.sleep(0.1)
+        self.assertIs(backend.get("short"), MISS)
+        self.assertEqual(backend.get("long"), {"b": 2})
+
+    def test_least_recently_used_eviction(self):
+        backend = self.make_backend(max_entries=2)
+        backend.set("a", 1, 60)
+        time.sleep(0.01)
+        backend.set("b", 2, 60)
+        time.sleep(0.01)
+        # reading a makes b the least recently used entry
+        self.assertEqual(backend.get("a"), 1)
+        time.sleep(0.01)
+        backend.set("c", 3, 60)
+        self.assertEqual(backend.get("a"), 1)
+        self.assertIs(backend.get("b"), MISS)
+        self.assertEqual(backend.get("c"), 3)
+
+    def test_delete_and_clear(self):
+        backend = self.make_backend()
+        for key in ("services|a", "services|b", "options|a"):
+            backend.set(key, key, 60)
+        backend.delete("services|a")
+        self.assertIs(backend.get("services|a"), MISS)
+        backend.clear("services|")
+        self.assertIs(backend.get("services|b"), MISS)
+        self.assertEqual(backend.get("options|a"), "options|a")
+        backend.clear()
+        self.assertIs(backend.get("options|a"), MISS)
+
+
+class TestMemoryBackend(BackendTests, unittest.TestCase):
+    def make_backend(self, max_entries: int = 1024):
+        return MemoryBackend(max_entries)
+
+
+class TestDiskBackend(BackendTests, unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, "cache.sqlite")
+
+    def make_backend(self, max_entries: int = 1024):
+        backend = DiskBackend(self.path, max_entries)
+        self.addCleanup(backend.close)
+        return backend
+
+    def test_entries_are_shared_and_survive_restarts(self):
+        first = self.make_backend()
+        second = self.make_backend()
+        first.set("services|a", {"content": [1, 2]}, 60)
+        self.assertEqual(second.get("services|a"), {"content": [1, 2]})
+        first.close()
+        self.assertEqual(self.make_backend().get("services|a"), {"content": [1, 2]})
+
+
+class TestVerificationCache(unittest.TestCase):
+    def test_invalidate(self):
+        cache = VerificationCache()
+        cache.set("dstv", "1212121212", {"Customer_Name": "A"})
+        cache.set("dstv", "3434343434", {"Customer_Name": "B"})
+        cache.set("gotv", "1212121212", {"Customer_Name": "C"})
+
+        cache.invalidate("dstv", "1212121212")
+        self.assertIs(cache.get("dstv", "1212121212"), MISS)
+        self.assertEqual(cache.get("dstv", "3434343434"), {"Customer_Name": "B"})
+        cache.invalidate("dstv")
+        self.assertIs(cache.get("dstv", "3434343434"), MISS)
+        self.assertEqual(cache.get("gotv", "1212121212"), {"Customer_Name": "C"})
+
+    def test_invalidate_a_billers_code_needs_its_service_id(self):
+        cache = VerificationCache()
+        cache.set("gotv", "1212121212", {"Customer_Name": "C"})
+        with self.assertRaises(ValueError):
+            cache.invalidate(billers_code="1212121212")
+        self.assertEqual(cache.get("gotv", "1212121212"), {"Customer_Name": "C"})
+
+
+class TestDecorators(unittest.TestCase):
+    def setUp(self):
+        self.server = MockVtPassServer().start()
+        self.addCleanup(self.server.stop)
+
+    def test_cached(self):
+        client = VtPassPythonSDK(cache=CatalogCache())
+        url = self.server.url
+        for _ in range(3):
+            result = client.get_service_variation_codes(
+                url, ServiceIdSchema(service_id="dstv")
+            )
+        self.assertIsInstance(result, dict)
+        self.assertEqual(self.server.requests["service-variations"], 1)
+
+        # error responses are not cached
+        for _ in range(2):
+            client.get_service_variation_codes(url, ServiceIdSchema(service_id="nope"))
+        self.assertEqual(self.server.requests["service-variations"], 3)
+
+    def test_cached_expires(self):
+        client = VtPassPythonSDK(cache=CatalogCache(ttls={"service-variations": 0.05}))
+        schema = ServiceIdSchema(service_id="dstv")
+        client.get_service_variation_codes(self.server.url, schema)
+        time.sleep(0.1)
+        client.get_service_variation_codes(self.server.url, schema)
+        self.assertEqual(self.server.requests["service-variations"], 2)
+
+    def test_verified(self):
+        client = ElectricityPayment(verification_cache=VerificationCache())
+        url = self.server.url
+        for _ in range(2):
+            result = client.verify_meter_value(url, meter())
+        self.assertEqual(result["Customer_Name"], "TESTMETER1")
+        self.assertEqual(self.server.requests["merchant-verify"], 1)
+
+        # unknown meters answer code 000 with an error, they are not cached
+        for _ in range(2):
+            client.verify_meter_value(url, meter("0000111111111"))
+        self.assertEqual(self.server.requests["merchant-verify"], 3)
+
+    def test_async_decorators_keep_a_disk_backend_off_the_event_loop(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        catalog = RecordingDiskBackend(os.path.join(directory, "catalog.sqlite"))
+        verifications = RecordingDiskBackend(os.path.join(directory, "verify.sqlite"))
+        self.addCleanup(catalog.close)
+        self.addCleanup(verifications.close)
+
+        async def run():
+            try:
+                catalog_client = AsyncVtPassClient(cache=CatalogCache(catalog))
+                meter_client = AsyncElectricityPayment(
+                    verification_cache=VerificationCache(verifications)
+                )
+                for _ in range(2):
+                    await catalog_client.get_service_variation_codes(
+                        self.server.url, ServiceIdSchema(service_id="dstv")
+                    )
+                    await meter_client.verify_meter_value(self.server.url, meter())
+                return threading.current_thread()
+            finally:
+                await close_async_client()
+
+        loop_thread = asyncio.run(run())
+        self.assertEqual(self.server.requests["service-variations"], 1)
+        self.assertEqual(self.server.requests["merchant-verify"], 1)
+        self.assertTrue(catalog.threads)
+        self.assertNotIn(loop_thread, catalog.threads | verifications.threads)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import requests
+
+from airtime.airtime import Airtime
+from airtime.schema import AirtimeSchema
+from vtpass.cassette import RECORD, Cassette
+from vtpass.mock_server import MockVtPassServer
+
+
+def client_through(cassette: Cassette) -> Airtime:
+    return Airtime(session=cassette.mount(requests.Session()))
+
+
+def purchase(client: Airtime, url: str):
+    request_id = client.generate_request_id()
+    client.purchase_airtime(
+        url,
+        AirtimeSchema(
+            service_id="mtn",
+            phone_number="08011111111",
+            amount=100,
+            request_id=request_id,
+        ),
+    )
+    return request_id
+
+
+class TestLazyImport(unittest.TestCase):
+    def test_sync_sdk_does_not_import_httpx(self):
+        code = (
+            "import sys, vtpass.session, airtime; "
+            "print('httpx' in sys.modules, 'vtpass.cassette' in sys.modules)"
+        )
+        output = subprocess.check_output([sys.executable, "-c", code], text=True)
+        self.assertEqual(output.split(), ["False", "False"])
+
+
+class TestReplay(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, "cassette.jsonl")
+        server = MockVtPassServer().start()
+        self.addCleanup(server.stop)
+        self.url = server.url
+        # a delivered payment, then a failed one, each requeried once
+        with Cassette(self.path, mode=RECORD) as cassette:
+            client = client_through(cassette)
+            delivered = purchase(client, server.url)
+            server.failure_rate = 1
+            failed = purchase(client, server.url)
+            client.get_transaction_status(server.url, delivered)
+            client.get_transaction_status(server.url, failed)
+
+    def test_requeries_replay_their_own_transaction(self):
+        client = client_through(Cassette(self.path))
+        delivered = purchase(client, self.url)
+        failed = purchase(client, self.url)
+        # requeried in the other order than recorded
+        for request_id, status in ((failed, "failed"), (delivered, "delivered")):
+            result = client.get_transaction_status(self.url, request_id)
+            # successful responses are returned as their content
+            transactions = result.get("content", result)["transactions"]
+            self.assertEqual(transactions["status"], status)
+            self.assertEqual(transactions["transactionId"], request_id)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import sqlite3
+import time
+import unittest
+
+import httpx
+import requests
+
+from vtpass.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+)
+from vtpass.transport import Hooks, VtPassRequest
+
+
+def server_error() -> requests.HTTPError:
+    response = requests.Response()
+    response.status_code = 503
+    return requests.HTTPError("503 Server Error", response=response)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.breaker = CircuitBreaker(
+            window_size=4, min_calls=2, failure_rate=0.5, open_duration=0.1
+        )
+        self.hooks = Hooks()
+        self.breaker.install(self.hooks)
+
+    def call(self, error: Exception = None, service_id: str = "ikeja-electric"):
+        request = VtPassRequest("POST", "https://vtpass/api/pay", "pay", {}, service_id)
+        request.attempt = 1
+        self.hooks.run_before_send(request)
+        if error is None:
+            self.hooks.run_after_receive(request, None, {"code": "000"})
+        else:
+            self.hooks.run_on_error(request, error)
+
+    def test_open_half_open_closed(self):
+        self.call()
+        self.call(server_error())
+        self.assertEqual(self.breaker.state("ikeja-electric"), OPEN)
+        with self.assertRaises(CircuitOpenError):
+            self.call()
+        # other services are not affected
+        self.call(service_id="eko-electric")
+
+        time.sleep(0.1)
+        self.assertEqual(self.breaker.state("ikeja-electric"), HALF_OPEN)
+        self.call()
+        self.assertEqual(self.breaker.state("ikeja-electric"), CLOSED)
+
+    def test_failed_probe_opens_again(self):
+        self.call(server_error())
+        self.call(server_error())
+        time.sleep(0.1)
+        self.call(server_error())
+        self.assertEqual(self.breaker.state("ikeja-electric"), OPEN)
+        with self.assertRaises(CircuitOpenError):
+            self.call()
+
+    def test_client_errors_do_not_count(self):
+        response = requests.Response()
+        response.status_code = 400
+        for _ in range(4):
+            self.call(requests.HTTPError("400 Bad Request", response=response))
+        self.assertEqual(self.breaker.state("ikeja-electric"), CLOSED)
+
+    def test_transport_errors_count(self):
+        self.call(requests.ConnectionError("connection refused"))
+        self.call(requests.ReadTimeout("read timed out"))
+        self.assertEqual(self.breaker.state("ikeja-electric"), OPEN)
+        time.sleep(0.1)
+        self.call(httpx.ReadTimeout("read timed out"))
+        self.assertEqual(self.breaker.state("ikeja-electric"), OPEN)
+
+    def test_errors_of_other_hooks_do_not_count(self):
+        for _ in range(4):
+            self.call(sqlite3.OperationalError("database is locked"))
+            self.call(RuntimeError("hook bug"))
+        self.assertEqual(self.breaker.state("ikeja-electric"), CLOSED)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from vtpass.coalesce import SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_threads_share_one_call(self):
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            started.set()
+            release.wait()
+            return {"content": "catalog"}
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(flight.do("k", fetch)))
+        leader.start()
+        started.wait()
+        followers = [
+            threading.Thread(target=lambda: results.append(flight.do("k", fetch)))
+            for _ in range(5)
+        ]
+        for thread in followers:
+            thread.start()
+        while flight.coalesced < 5:
+            time.sleep(0.001)
+        release.set()
+        for thread in [leader, *followers]:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{"content": "catalog"}] * 6)
+        # the key is forgotten once the call returned
+        self.assertEqual(flight.do("k", lambda: "again"), "again")
+
+    def test_errors_are_shared(self):
+        flight = SingleFlight()
+
+        async def run():
+            calls = []
+
+            async def fetch():
+                calls.append(1)
+                await asyncio.sleep(0.01)
+                raise ConnectionError("down")
+
+            results = await asyncio.gather(
+                *(flight.do_async("k", fetch) for _ in range(3)), return_exceptions=True
+            )
+            return calls, results
+
+        calls, results = asyncio.run(run())
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(isinstance(result, ConnectionError) for result in results))
+        self.assertEqual(flight.coalesced, 2)
+
+    def test_cancelled_caller_leaves_the_call_running(self):
+        flight = SingleFlight()
+
+        async def run():
+            async def fetch():
+                await asyncio.sleep(0.02)
+                return "catalog"
+
+            first = asyncio.ensure_future(flight.do_async("k", fetch))
+            second = asyncio.ensure_future(flight.do_async("k", fetch))
+            await asyncio.sleep(0)
+            first.cancel()
+            return await second
+
+        self.assertEqual(asyncio.run(run()), "catalog")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+import importlib.util
+import os
+import unittest
+from unittest import mock
+
+from vtpass import codec
+from vtpass.codec import (
+    CODECS,
+    MsgspecCodec,
+    OrjsonCodec,
+    StdlibCodec,
+    build_codec,
+    get_codec,
+)
+from vtpass.main import VtPassPythonSDK
+from vtpass.mock_server import MockVtPassServer
+
+PAYLOAD = {
+    "code": "000",
+    "content": {
+        "transactions": {
+            "status": "delivered",
+            "product_name": "MTN Airtime VTU",
+            "unique_element": "08011111111",
+            "unit_price": 100,
+            "commission": 3.5,
+            "discount": None,
+            "convinience_fee": 0,
+            "is_api": True,
+        }
+    },
+    "response_description": "TRANSACTION SUCCESSFUL",
+    "requestId": "2024010112300123456789abcdef0123456789abcdef",
+    "amount": "100.00",
+    "Customer_Name": "Adéolá Ọlọ́run",
+    "content_list": [1, 2.5, "three", [], {}],
+}
+
+INSTALLED = {
+    name: name == "json" or importlib.util.find_spec(name) is not None
+    for name in CODECS
+}
+
+
+def without(*modules):
+    """
+    :return: A patch making the imports of `modules` fail, as if they were not installed.
+    """
+    return mock.patch.dict("sys.modules", {module: None for module in modules})
+
+
+class TestParity(unittest.TestCase):
+    def assertParity(self, codec_class):
+        reference = StdlibCodec()
+        other = codec_class()
+        encoded = other.dumps(PAYLOAD)
+        self.assertIsInstance(encoded, bytes)
+        self.assertEqual(reference.loads(encoded), PAYLOAD)
+        self.assertEqual(other.loads(reference.dumps(PAYLOAD)), PAYLOAD)
+        self.assertEqual(other.loads(encoded), PAYLOAD)
+        self.assertEqual(other.loads(bytearray(encoded)), PAYLOAD)
+
+    def test_stdlib(self):
+        codec = StdlibCodec()
+        encoded = codec.dumps(PAYLOAD)
+        self.assertIsInstance(encoded, bytes)
+        # compact and not ascii escaped, like orjson and msgspec
+        self.assertNotIn(b", ", encoded)
+        self.assertIn("Adéolá".encode(), encoded)
+        self.assertEqual(codec.loads(encoded), PAYLOAD)
+        self.assertEqual(codec.loads(encoded.decode()), PAYLOAD)
+
+    @unittest.skipUnless(INSTALLED["orjson"], "orjson is not installed")
+    def test_orjson(self):
+        self.assertParity(OrjsonCodec)
+        self.assertEqual(OrjsonCodec().dumps(PAYLOAD), StdlibCodec().dumps(PAYLOAD))
+
+    @unittest.skipUnless(INSTALLED["msgspec"], "msgspec is not installed")
+    def test_msgspec(self):
+        self.assertParity(MsgspecCodec)
+
+    def test_invalid_documents_raise_value_errors(self):
+        for name, installed in INSTALLED.items():
+            if not installed:
+                continue
+            with self.subTest(codec=name), self.assertRaises(ValueError):
+                CODECS[name]().loads(b"<html>Bad Gateway</html>")
+
+
+class TestBuildCodec(unittest.TestCase):
+    def test_preferred_order(self):
+        with mock.patch.dict(os.environ, {}, clear=True):
+            expected = next(name for name in codec.PREFERRED_CODECS if INSTALLED[name])
+            self.assertEqual(build_codec().name, expected)
+            with without("orjson"):
+                self.assertEqual(
+                    build_codec().name, "msgspec" if INSTALLED["msgspec"] else "json"
+                )
+
+    def test_fallback_when_the_extras_are_missing(self):
+        with mock.patch.dict(os.environ, {}, clear=True), without("orjson", "msgspec"):
+            self.assertIsInstance(build_codec(), StdlibCodec)
+
+    def test_explicit_choice(self):
+        with mock.patch.dict(os.environ, {"JSON_CODEC": "json"}):
+            self.assertIsInstance(build_codec(), StdlibCodec)
+        with mock.patch.dict(os.environ, {"JSON_CODEC": "orjson"}):
+            self.assertIsInstance(build_codec("json"), StdlibCodec)
+        with self.assertRaises(ValueError):
+            build_codec("ujson")
+        # an explicitly requested codec that is not installed is an error, not a fallback
+        with without("orjson"), self.assertRaises(ImportError):
+            build_codec("orjson")
+
+    def test_shared_codec(self):
+        with mock.patch.object(codec, "_codec", None), mock.patch.dict(
+            os.environ, {"JSON_CODEC": "json"}
+        ):
+            shared = get_codec()
+            self.assertIsInstance(shared, StdlibCodec)
+            self.assertIs(get_codec(), shared)
+            self.assertIs(VtPassPythonSDK().codec, shared)
+            own = StdlibCodec()
+            self.assertIs(VtPassPythonSDK(codec=own).codec, own)
+
+
+class TestClients(unittest.TestCase):
+    def setUp(self):
+        self.server = MockVtPassServer().start()
+        self.addCleanup(self.server.stop)
+
+    def test_every_installed_codec_gives_the_same_results(self):
+        results = {}
+        for name, installed in INSTALLED.items():
+            if installed:
+                client = VtPassPythonSDK(codec=CODECS[name]())
+                results[name] = client.get_credit_wallet_balance(self.server.url)
+        self.assertEqual(results["json"], 1000000000)
+        self.assertEqual(len(set(results.values())), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import unittest
+
+from airtime.airtime import Airtime
+from airtime.async_airtime import AsyncAirtime
+from airtime.schema import AirtimeSchema
+from vtpass.async_main import close_async_client
+from vtpass.journal import NOT_SENT, TransactionJournal
+from vtpass.mock_server import MockVtPassServer
+from vtpass.transport import Hooks
+
+
+def airtime(client) -> AirtimeSchema:
+    return AirtimeSchema(
+        service_id="mtn",
+        phone_number="08011111111",
+        amount=100,
+        request_id=client.generate_request_id(),
+    )
+
+
+class TestJournal(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, "journal.db")
+        self.server = MockVtPassServer().start()
+        self.addCleanup(self.server.stop)
+
+    def test_recover_after_crash(self):
+        client = Airtime()
+        journal = TransactionJournal(self.path)
+        # the worker crashed after sending the first purchase and before sending the second
+        sent = airtime(client)
+        journal.begin(sent.request_id, "mtn", {"request_id": sent.request_id})
+        client.purchase_airtime(self.server.url, sent)
+        lost = airtime(client)
+        journal.begin(lost.request_id, "mtn", {"request_id": lost.request_id})
+        journal.close()
+
+        journal = TransactionJournal(self.path)
+        self.addCleanup(journal.close)
+        self.assertEqual(set(journal.unresolved()), {sent.request_id, lost.request_id})
+        statuses = journal.recover(client, self.server.url)
+        self.assertEqual(
+            statuses, {sent.request_id: "delivered", lost.request_id: NOT_SENT}
+        )
+        self.assertEqual(journal.unresolved(), {})
+
+    def test_async_client_does_not_block_on_intents(self):
+        journal = TransactionJournal(self.path)
+        self.addCleanup(journal.close)
+
+        def blocking_begin(*args):
+            raise AssertionError("begin blocks the event loop")
+
+        journal.begin = blocking_begin
+        hooks = Hooks()
+        journal.install(hooks)
+
+        async def purchase():
+            client = AsyncAirtime(hooks=hooks)
+            schema = airtime(client)
+            try:
+                await client.purchase_airtime(self.server.url, schema)
+            finally:
+                await close_async_client()
+            return schema.request_id
+
+        request_id = asyncio.run(purchase())
+        journal.flush()
+        self.assertEqual(journal.get(request_id)["status"], "delivered")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,191 @@
+import io
+import json
+import logging
+import os
+import sys
+import unittest
+from unittest import mock
+
+from airtime.airtime import Airtime
+from airtime.schema import AirtimeSchema
+from vtpass import log
+from vtpass.log import (
+    JsonFormatter,
+    configure_logging,
+    get_success_sample_rate,
+    log_response,
+    set_success_sample_rate,
+)
+from vtpass.mock_server import MockVtPassServer
+from vtpass.transport import VtPassRequest
+
+
+class RecordingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def pay_request(attempt: int = 1) -> VtPassRequest:
+    request = VtPassRequest("POST", "https://vtpass/api/pay", "pay", {}, "mtn")
+    request.attempt = attempt
+    return request
+
+
+class LogTestCase(unittest.TestCase):
+    def setUp(self):
+        self.handler = RecordingHandler()
+        log.logger.addHandler(self.handler)
+        self.addCleanup(log.logger.removeHandler, self.handler)
+        self.addCleanup(log.logger.setLevel, log.logger.level)
+        log.logger.setLevel(logging.DEBUG)
+        patcher = mock.patch.object(log, "_success_sample_rate", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class TestSampling(LogTestCase):
+    def test_rate_from_the_environment(self):
+        with mock.patch.dict(os.environ, {"LOG_SUCCESS_SAMPLE_RATE": "0.25"}):
+            self.assertEqual(get_success_sample_rate(), 0.25)
+        # read once
+        self.assertEqual(get_success_sample_rate(), 0.25)
+
+    def test_default_rate(self):
+        with mock.patch.dict(os.environ, clear=True):
+            self.assertEqual(get_success_sample_rate(), 1)
+
+    def test_invalid_rates(self):
+        for rate in (-0.1, 1.5):
+            with self.assertRaises(ValueError):
+                set_success_sample_rate(rate)
+
+    def test_success_events_are_sampled(self):
+        set_success_sample_rate(0.1)
+        with mock.patch.object(
+            log.random, "random", side_effect=[0.05, 0.1, 0.5, 0.0999]
+        ):
+            for _ in range(4):
+                log_response(pay_request(), logging.INFO, "Paid", "000", True)
+        self.assertEqual(len(self.handler.records), 2)
+
+        set_success_sample_rate(0)
+        for _ in range(100):
+            log_response(pay_request(), logging.INFO, "Paid", "000", True)
+        self.assertEqual(len(self.handler.records), 2)
+
+    def test_error_events_are_never_sampled(self):
+        set_success_sample_rate(0)
+        for _ in range(10):
+            log_response(pay_request(), logging.ERROR, "Failed", "016")
+        self.assertEqual(len(self.handler.records), 10)
+
+    def test_disabled_levels_are_skipped_before_sampling(self):
+        log.logger.setLevel(logging.WARNING)
+        set_success_sample_rate(0.5)
+        with mock.patch.object(log.random, "random") as sample:
+            log_response(pay_request(), logging.INFO, "Paid", "000", True)
+        sample.assert_not_called()
+        self.assertEqual(self.handler.records, [])
+
+
+class TestEvents(LogTestCase):
+    def test_event_payload(self):
+        request = pay_request(attempt=2)
+        with mock.patch.object(
+            log.time, "perf_counter", return_value=request.started_at + 0.25
+        ):
+            log_response(
+                request, logging.ERROR, "Failed", "016", detail={"code": "016"}
+            )
+        [record] = self.handler.records
+        self.assertEqual(record.levelno, logging.ERROR)
+        self.assertEqual(
+            record.vtpass_event,
+            {
+                "event": "error",
+                "endpoint": "pay",
+                "service_id": "mtn",
+                "code": "016",
+                "latency": 0.25,
+                "attempt": 2,
+            },
+        )
+        self.assertEqual(
+            record.getMessage(),
+            "Failed: {'code': '016'} "
+            "(endpoint=pay serviceID=mtn code=016 latency=0.250s attempt=2)",
+        )
+
+    def test_client_responses(self):
+        server = MockVtPassServer().start()
+        self.addCleanup(server.stop)
+        client = Airtime()
+        schema = AirtimeSchema(
+            service_id="mtn",
+            phone_number="08011111111",
+            amount=100,
+            request_id=client.generate_request_id(),
+        )
+        client.purchase_airtime(server.url, schema)
+        # a request ID can only be used once
+        client.purchase_airtime(server.url, schema)
+
+        events = [
+            record.vtpass_event
+            for record in self.handler.records
+            if hasattr(record, "vtpass_event")
+        ]
+        self.assertEqual([event["event"] for event in events], ["success", "error"])
+        self.assertEqual(events[0]["code"], "000")
+        self.assertNotEqual(events[1]["code"], "000")
+        self.assertTrue(all(event["endpoint"] == "pay" for event in events))
+        self.assertTrue(all(event["attempt"] >= 1 for event in events))
+
+
+class TestJsonFormatter(LogTestCase):
+    def test_event_fields(self):
+        log_response(pay_request(), logging.INFO, "Paid", "000", True)
+        line = json.loads(JsonFormatter().format(self.handler.records[0]))
+        self.assertEqual(line["level"], "INFO")
+        self.assertEqual(line["logger"], "vtpass")
+        self.assertTrue(line["message"].startswith("Paid ("))
+        self.assertIsInstance(line["time"], float)
+        for key in ("event", "endpoint", "service_id", "code", "latency", "attempt"):
+            self.assertIn(key, line)
+        self.assertEqual(line["event"], "success")
+
+    def test_plain_records_and_exceptions(self):
+        try:
+            raise RuntimeError("boom")
+        except RuntimeError:
+            record = logging.LogRecord(
+                "vtpass.main",
+                logging.ERROR,
+                __file__,
+                1,
+                "%s",
+                (object,),
+                sys.exc_info(),
+            )
+        line = json.loads(JsonFormatter().format(record))
+        self.assertNotIn("event", line)
+        self.assertEqual(line["message"], str(object))
+        self.assertIn("RuntimeError: boom", line["exception"])
+
+    def test_configure_logging(self):
+        stream = io.StringIO()
+        handler = configure_logging(logging.INFO, json_lines=True, stream=stream)
+        self.addCleanup(log.logger.removeHandler, handler)
+        log_response(pay_request(), logging.DEBUG, "Hidden", "000", True)
+        log_response(pay_request(), logging.INFO, "Paid", "000", True)
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])["event"], "success")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+import re
+import unittest
+from unittest import mock
+
+from airtime.airtime import Airtime
+from airtime.schema import AirtimeSchema
+from vtpass.main import VtPassPythonSDK
+from vtpass.metrics import LATENCY_BUCKETS, Metrics, _Series
+from vtpass.mock_server import MockVtPassServer
+from vtpass.retry import RetryPolicy
+from vtpass.transport import Hooks, VtPassRequest
+
+SAMPLE = re.compile(r"^(\w+)\{(.*)\} (\S+)$")
+
+
+def record(metrics: Metrics, latency: float, service_id: str = "mtn", status=200):
+    request = VtPassRequest("POST", "https://vtpass/api/pay", "pay", {}, service_id)
+    with mock.patch("vtpass.metrics.time.perf_counter", side_effect=[0.0, latency]):
+        metrics._before_send(request)
+        metrics._record(request, status, "000", 10, 20)
+
+
+def samples(text: str, name: str) -> list:
+    """
+    :return: The (labels, value) of every sample of a metric in a Prometheus text output.
+    """
+    found = []
+    for line in text.splitlines():
+        match = SAMPLE.match(line)
+        if match and match.group(1) == name:
+            labels = dict(re.findall(r'(\w+)="((?:[^"\\]|\\.)*)"', match.group(2)))
+            found.append((labels, float(match.group(3))))
+    return found
+
+
+class TestHistogram(unittest.TestCase):
+    def test_bucket_bounds_are_inclusive(self):
+        metrics = Metrics()
+        for latency in (0.1, 0.1000001, 500.0):
+            record(metrics, latency)
+        buckets = metrics._series[("pay", "mtn")].buckets
+        self.assertEqual(buckets[LATENCY_BUCKETS.index(0.1)], 1)
+        self.assertEqual(buckets[LATENCY_BUCKETS.index(0.15)], 1)
+        # slower than the last bound, only counted in +Inf
+        self.assertEqual(buckets[-1], 1)
+        self.assertEqual(sum(buckets), 3)
+
+    def test_quantiles_interpolate_inside_the_bucket(self):
+        series = _Series()
+        self.assertIsNone(series.quantile(0.5))
+        index = LATENCY_BUCKETS.index(0.15)
+        series.buckets[index] = 10
+        series.count = 10
+        self.assertAlmostEqual(series.quantile(0.5), 0.125)
+        self.assertAlmostEqual(series.quantile(0.99), 0.1495)
+
+        series.buckets[-1] = 90
+        series.count = 100
+        # past the last bound, the estimate is capped at it
+        self.assertEqual(series.quantile(0.95), LATENCY_BUCKETS[-1])
+
+    def test_snapshot(self):
+        metrics = Metrics()
+        for _ in range(99):
+            record(metrics, 0.01)
+        record(metrics, 2.0, status="error")
+        snapshot = metrics.snapshot()["pay"]["mtn"]
+        self.assertEqual(snapshot["count"], 100)
+        self.assertLessEqual(snapshot["p50"], 0.01)
+        self.assertLessEqual(snapshot["p95"], 0.01)
+        self.assertGreater(snapshot["p99"], 0.0075)
+        self.assertAlmostEqual(snapshot["mean"], (99 * 0.01 + 2.0) / 100)
+        self.assertEqual(snapshot["statuses"], {200: 99, "error": 1})
+        self.assertEqual(snapshot["codes"], {"000": 100})
+        self.assertEqual((snapshot["bytes_out"], snapshot["bytes_in"]), (1000, 2000))
+
+
+class TestPrometheus(unittest.TestCase):
+    def test_text_format(self):
+        metrics = Metrics()
+        for latency in (0.002, 0.02, 0.2, 200.0):
+            record(metrics, latency)
+        record(metrics, 0.02, service_id='we"ird\\id')
+        text = metrics.prometheus()
+        self.assertTrue(text.endswith("\n"))
+        self.assertIn("# TYPE vtpass_request_duration_seconds histogram", text)
+
+        buckets = [
+            (labels, value)
+            for labels, value in samples(text, "vtpass_request_duration_seconds_bucket")
+            if labels["service_id"] == "mtn"
+        ]
+        self.assertEqual(len(buckets), len(LATENCY_BUCKETS) + 1)
+        values = [value for _, value in buckets]
+        self.assertEqual(values, sorted(values))
+        self.assertEqual(
+            buckets[-1], ({"endpoint": "pay", "service_id": "mtn", "le": "+Inf"}, 4)
+        )
+        self.assertEqual(
+            dict((labels["le"], value) for labels, value in buckets)["0.0025"], 1
+        )
+        [(_, count)] = [
+            sample
+            for sample in samples(text, "vtpass_request_duration_seconds_count")
+            if sample[0]["service_id"] == "mtn"
+        ]
+        self.assertEqual(count, 4)
+        quantiles = {
+            labels["quantile"]: value
+            for labels, value in samples(
+                text, "vtpass_request_duration_quantile_seconds"
+            )
+            if labels["service_id"] == "mtn"
+        }
+        self.assertEqual(sorted(quantiles), ["0.5", "0.95", "0.99"])
+        # label values are escaped
+        self.assertIn('service_id="we\\"ird\\\\id"', text)
+
+
+class TestRecording(unittest.TestCase):
+    def setUp(self):
+        self.server = MockVtPassServer().start()
+        self.addCleanup(self.server.stop)
+        self.hooks = Hooks()
+        self.metrics = Metrics()
+        self.metrics.install(self.hooks)
+
+    def test_responses_and_errors(self):
+        client = Airtime(hooks=self.hooks)
+        for _ in range(3):
+            client.purchase_airtime(
+                self.server.url,
+                AirtimeSchema(
+                    service_id="mtn",
+                    phone_number="08011111111",
+                    amount=100,
+                    request_id=client.generate_request_id(),
+                ),
+            )
+        self.server.error_rate = {"balance": 1.0}
+        VtPassPythonSDK(
+            hooks=self.hooks, retry_policies={"catalog": RetryPolicy(max_retries=0)}
+        ).get_credit_wallet_balance(self.server.url)
+
+        snapshot = self.metrics.snapshot()
+        pay = snapshot["pay"]["mtn"]
+        self.assertEqual(pay["count"], 3)
+        self.assertEqual(pay["statuses"], {200: 3})
+        self.assertEqual(pay["codes"], {"000": 3})
+        self.assertGreater(pay["bytes_out"], 0)
+        self.assertGreater(pay["bytes_in"], 0)
+        self.assertEqual(snapshot["balance"][""]["statuses"], {500: 1})
+
+        self.metrics.uninstall(self.hooks)
+        client.get_credit_wallet_balance(self.server.url)
+        self.assertEqual(self.metrics.snapshot()["balance"][""]["count"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
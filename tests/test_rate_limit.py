@@ -0,0 +1,69 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from vtpass.rate_limit import FileBucketBackend, MemoryBucketBackend, RateLimiter
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_burst_then_rate(self):
+        limiter = RateLimiter({"pay": (10, 2)})
+        waits = [limiter.reserve("pay") for _ in range(4)]
+        self.assertEqual(waits[:2], [0.0, 0.0])
+        # each caller past the burst queues behind the previous one
+        self.assertAlmostEqual(waits[2], 0.1, delta=0.01)
+        self.assertAlmostEqual(waits[3], 0.2, delta=0.01)
+
+    def test_service_budgets(self):
+        limiter = RateLimiter({"pay/*": (1, 1), "pay/mtn": (100, 100)})
+        self.assertEqual(limiter.reserve("pay", "glo"), 0.0)
+        self.assertGreater(limiter.reserve("pay", "glo"), 0.5)
+        # a serviceID with its own limit does not draw from the wildcard budget
+        self.assertEqual(limiter.reserve("pay", "mtn"), 0.0)
+        self.assertEqual(limiter.reserve("pay", "etisalat"), 0.0)
+        self.assertEqual(limiter.reserve("merchant-verify", "glo"), 0.0)
+
+    def test_file_backend_is_shared(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, "buckets.sqlite")
+        first = FileBucketBackend(path)
+        second = FileBucketBackend(path)
+        self.addCleanup(first.close)
+        self.addCleanup(second.close)
+        self.assertEqual(first.reserve("pay", 1, 1), 0.0)
+        self.assertGreater(second.reserve("pay", 1, 1), 0.5)
+
+
+class RecordingBackend(MemoryBucketBackend):
+    blocking = True
+
+    def __init__(self):
+        super().__init__()
+        self.threads = []
+
+    def reserve(self, key: str, rate: float, burst: float) -> float:
+        self.threads.append(threading.current_thread())
+        return super().reserve(key, rate, burst)
+
+
+class TestAsyncReserve(unittest.TestCase):
+    def test_blocking_backend_reserves_off_the_loop(self):
+        backend = RecordingBackend()
+        limiter = RateLimiter({"pay": 10}, backend)
+        asyncio.run(limiter.areserve("pay"))
+        self.assertEqual(len(backend.threads), 1)
+        self.assertIsNot(backend.threads[0], threading.main_thread())
+
+    def test_memory_backend_reserves_inline(self):
+        limiter = RateLimiter({"pay": (10, 1)})
+        waits = asyncio.run(limiter.areserve("pay")), limiter.reserve("pay")
+        self.assertEqual(waits[0], 0.0)
+        self.assertGreater(waits[1], 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import asyncio
+import unittest
+
+from airtime.airtime import Airtime
+from airtime.async_airtime import AsyncAirtime
+from airtime.schema import AirtimeSchema
+from vtpass.async_main import close_async_client
+from vtpass.mock_server import MockVtPassServer
+
+
+class TestAsyncRequery(unittest.TestCase):
+    def setUp(self):
+        self.server = MockVtPassServer(pending_rate=1, pending_duration=0.3).start()
+        self.addCleanup(self.server.stop)
+
+    def test_requery_until_final(self):
+        settled = []
+
+        async def run():
+            client = AsyncAirtime()
+            try:
+                request_ids = []
+                for _ in range(3):
+                    request_id = client.generate_request_id()
+                    await client.purchase_airtime(
+                        self.server.url,
+                        AirtimeSchema(
+                            service_id="mtn",
+                            phone_number="08011111111",
+                            amount=100,
+                            request_id=request_id,
+                        ),
+                    )
+                    request_ids.append(request_id)
+                # never sent, VtPass does not know it
+                request_ids.append(client.generate_request_id())
+                return request_ids, await client.requery_transactions(
+                    self.server.url,
+                    request_ids,
+                    concurrency=2,
+                    base_delay=0.05,
+                    max_age=1,
+                    on_result=settled.append,
+                )
+            finally:
+                await close_async_client()
+
+        request_ids, results = asyncio.run(run())
+        self.assertEqual([result.request_id for result in results], request_ids)
+        self.assertEqual(
+            [result.status for result in results],
+            ["delivered", "delivered", "delivered", "not_found"],
+        )
+        self.assertTrue(all(result.attempts > 1 for result in results[:3]))
+        self.assertEqual(results[3].attempts, 1)
+        self.assertEqual(len(settled), 4)
+
+
+class TestRequery(unittest.TestCase):
+    def setUp(self):
+        self.server = MockVtPassServer(pending_rate=1, pending_duration=0.3).start()
+        self.addCleanup(self.server.stop)
+
+    def test_requery_until_final(self):
+        client = Airtime()
+        submitted = []
+        for _ in range(5):
+            request_id = client.generate_request_id()
+            client.purchase_airtime(
+                self.server.url,
+                AirtimeSchema(
+                    service_id="mtn",
+                    phone_number="08011111111",
+                    amount=100,
+                    request_id=request_id,
+                ),
+            )
+            submitted.append(request_id)
+        request_ids = [client.generate_request_id(), *submitted]
+
+        settled = []
+        results = client.requery_transactions(
+            self.server.url,
+            request_ids,
+            concurrency=2,
+            base_delay=0.05,
+            max_age=5,
+            on_result=settled.append,
+        )
+        self.assertEqual([result.request_id for result in results], request_ids)
+        self.assertEqual(
+            [result.status for result in results], ["not_found"] + ["delivered"] * 5
+        )
+        self.assertTrue(all(result.is_final for result in results))
+        self.assertEqual(results[0].attempts, 1)
+        self.assertTrue(all(result.attempts > 1 for result in results[1:]))
+        # the unknown request ID settles first, on its first requery
+        self.assertEqual(settled[0].request_id, request_ids[0])
+        self.assertEqual(
+            sorted(settled, key=lambda result: request_ids.index(result.request_id)),
+            results,
+        )
+        self.assertEqual(
+            self.server.requests["requery"],
+            sum(result.attempts for result in results),
+        )
+
+    def test_timeout_after_max_age(self):
+        self.server.pending_duration = 60
+        client = Airtime()
+        request_id = client.generate_request_id()
+        client.purchase_airtime(
+            self.server.url,
+            AirtimeSchema(
+                service_id="mtn",
+                phone_number="08011111111",
+                amount=100,
+                request_id=request_id,
+            ),
+        )
+        [result] = client.requery_transactions(
+            self.server.url, [request_id], base_delay=0.05, max_age=0.5
+        )
+        self.assertEqual(result.status, "timeout")
+        self.assertFalse(result.is_final)
+        self.assertGreaterEqual(result.age, 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import os
+import re
+import threading
+import unittest
+from datetime import datetime
+
+import pytz
+
+from vtpass.request_id import RequestIdGenerator, get_request_id_generator
+
+REQUEST_ID = re.compile(r"\d{12}[0-9a-f]{32}")
+
+
+class TestRequestIdGenerator(unittest.TestCase):
+    def setUp(self):
+        self.generator = RequestIdGenerator("Africa/Lagos")
+
+    def test_format(self):
+        before = datetime.now(pytz.timezone("Africa/Lagos")).strftime("%Y%m%d%H%M")
+        request_id = self.generator.generate()
+        after = datetime.now(pytz.timezone("Africa/Lagos")).strftime("%Y%m%d%H%M")
+        self.assertEqual(len(request_id), 44)
+        self.assertRegex(request_id, REQUEST_ID)
+        self.assertIn(request_id[:12], (before, after))
+
+    def test_timezone_of_the_prefix(self):
+        lagos = self.generator.generate()[:12]
+        tokyo = RequestIdGenerator("Asia/Tokyo").generate()[:12]
+        lagos_time = datetime.strptime(lagos, "%Y%m%d%H%M")
+        tokyo_time = datetime.strptime(tokyo, "%Y%m%d%H%M")
+        # Tokyo is 8 hours ahead of Lagos, give or take the minute turning
+        self.assertAlmostEqual(
+            (tokyo_time - lagos_time).total_seconds(), 8 * 60 * 60, delta=60
+        )
+
+    def test_generate_many(self):
+        request_ids = self.generator.generate_many(1000)
+        self.assertEqual(len(set(request_ids)), 1000)
+        self.assertTrue(
+            all(REQUEST_ID.fullmatch(request_id) for request_id in request_ids)
+        )
+
+    def test_unique_across_threads(self):
+        request_ids = []
+        lock = threading.Lock()
+
+        def generate():
+            generated = [self.generator.generate() for _ in range(2000)]
+            generated += self.generator.generate_many(2000)
+            with lock:
+                request_ids.extend(generated)
+
+        threads = [threading.Thread(target=generate) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(request_ids), 8 * 4000)
+        self.assertEqual(len(set(request_ids)), len(request_ids))
+
+    @unittest.skipUnless(hasattr(os, "fork"), "needs os.fork")
+    def test_unique_after_fork(self):
+        self.generator.generate()
+        read_end, write_end = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            # the child writes its IDs and exits without running the test runner's cleanup
+            try:
+                os.close(read_end)
+                with os.fdopen(write_end, "w") as pipe:
+                    pipe.write("\n".join(self.generator.generate_many(1000)))
+            finally:
+                os._exit(0)
+        os.close(write_end)
+        with os.fdopen(read_end) as pipe:
+            child_ids = pipe.read().split()
+        os.waitpid(pid, 0)
+        parent_ids = self.generator.generate_many(1000)
+
+        self.assertEqual(len(child_ids), 1000)
+        self.assertFalse(set(child_ids) & set(parent_ids))
+        # the child got its own salt
+        self.assertNotEqual(child_ids[0][12:28], parent_ids[0][12:28])
+
+    def test_shared_per_timezone(self):
+        self.assertIs(
+            get_request_id_generator("Africa/Lagos"),
+            get_request_id_generator("Africa/Lagos"),
+        )
+        self.assertIsNot(
+            get_request_id_generator("Africa/Lagos"),
+            get_request_id_generator("Asia/Tokyo"),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
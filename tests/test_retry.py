@@ -0,0 +1,202 @@
+import asyncio
+import socket
+import time
+import unittest
+
+import requests
+
+from airtime.airtime import Airtime
+from airtime.async_airtime import AsyncAirtime
+from airtime.schema import AirtimeSchema
+from vtpass.async_main import close_async_client
+from vtpass.mock_server import MockVtPassServer
+from vtpass.retry import MAYBE_SENT, NOT_SENT, RetryPolicy
+
+# A response delayed past the read timeout of the test policies
+SLOW = "slow"
+
+
+class ScriptedServer(MockVtPassServer):
+    """
+    A mock server whose next answers per endpoint can be scripted: an HTTP status answered
+    before the request is processed, SLOW to process it and answer too late, or a (status,
+    True) tuple to process it and answer with that status anyway.
+    """
+
+    def __init__(self, **settings):
+        super().__init__(**settings)
+        self.script = {}
+
+    def handle(self, method, path, query, headers, body):
+        endpoint = path.strip("/").split("/")[0]
+        actions = self.script.get(endpoint)
+        action = actions.pop(0) if actions else None
+        if isinstance(action, int):
+            with self._lock:
+                self.requests[endpoint] += 1
+            return action, {"response_description": "SCRIPTED"}
+        answer = super().handle(method, path, query, headers, body)
+        if action == SLOW:
+            time.sleep(0.5)
+        elif action is not None:
+            return action[0], {"response_description": "SCRIPTED"}
+        return answer
+
+
+def policies() -> dict:
+    return {
+        endpoint_class: RetryPolicy(
+            read_timeout=0.2, max_retries=2, backoff=0.01, deadline=5
+        )
+        for endpoint_class in ("catalog", "merchant-verify", "pay", "requery")
+    }
+
+
+def schema(request_id: str) -> AirtimeSchema:
+    return AirtimeSchema(
+        service_id="mtn", phone_number="08011111111", amount=100, request_id=request_id
+    )
+
+
+def transaction_of(result):
+    # successful responses are returned as their content
+    return result.get("content", result)["transactions"]
+
+
+class PaymentRetryTests(object):
+    """
+    The retry behaviour of /pay, run against both clients.
+    """
+
+    def purchase(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.server = ScriptedServer().start()
+        self.addCleanup(self.server.stop)
+
+    def test_timeout_then_requery_finds_the_transaction(self):
+        self.server.script = {"pay": [SLOW]}
+        request_id, result = self.purchase()
+        self.assertEqual(transaction_of(result)["status"], "delivered")
+        self.assertEqual(self.server.requests["pay"], 1)
+        self.assertEqual(self.server.requests["requery"], 1)
+
+    def test_unknown_request_id_is_sent_again_once(self):
+        self.server.script = {"pay": [503]}
+        request_id, result = self.purchase()
+        self.assertEqual(transaction_of(result)["status"], "delivered")
+        self.assertEqual(self.server.requests["pay"], 2)
+        self.assertEqual(self.server.requests["requery"], 1)
+        self.assertEqual(list(self.server.transactions), [request_id])
+
+    def test_failed_requery_raises_the_original_error(self):
+        self.server.script = {"pay": [SLOW], "requery": [500, 500, 500]}
+        request_id, result = self.purchase()
+        self.assertIsInstance(result, str)
+        self.assertRegex(result.lower(), "timed out|timeout")
+        self.assertEqual(self.server.requests["pay"], 1)
+        self.assertEqual(self.server.requests["requery"], 3)
+
+    def test_rate_limited_payment_is_resent(self):
+        self.server.script = {"pay": [429]}
+        request_id, result = self.purchase()
+        self.assertEqual(transaction_of(result)["status"], "delivered")
+        self.assertEqual(self.server.requests["pay"], 2)
+        self.assertEqual(self.server.requests["requery"], 0)
+
+    def test_server_error_is_not_resent_blindly(self):
+        # VtPass processed the payment, then answered with an error
+        self.server.script = {"pay": [(502, True)]}
+        request_id, result = self.purchase()
+        self.assertEqual(transaction_of(result)["status"], "delivered")
+        self.assertEqual(self.server.requests["pay"], 1)
+        self.assertEqual(self.server.requests["requery"], 1)
+
+    def test_client_error_is_not_retried(self):
+        self.server.script = {"pay": [400]}
+        request_id, result = self.purchase()
+        self.assertIsInstance(result, str)
+        self.assertEqual(self.server.requests["pay"], 1)
+        self.assertEqual(self.server.requests["requery"], 0)
+
+
+def closed_port_url() -> str:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}"
+
+
+class TestSyncPaymentRetry(PaymentRetryTests, unittest.TestCase):
+    def purchase(self, url: str = None):
+        client = Airtime(retry_policies=policies())
+        request_id = client.generate_request_id()
+        return request_id, client.purchase_airtime(
+            url or self.server.url, schema(request_id)
+        )
+
+    def test_error_outcomes(self):
+        client = Airtime()
+        with self.assertRaises(requests.ConnectionError) as refused:
+            requests.post(closed_port_url() + "/pay")
+        self.assertEqual(client._error_outcome(refused.exception), NOT_SENT)
+        self.assertEqual(
+            client._error_outcome(requests.exceptions.ReadTimeout()), MAYBE_SENT
+        )
+
+
+class TestAsyncPaymentRetry(PaymentRetryTests, unittest.TestCase):
+    def purchase(self):
+        async def run():
+            client = AsyncAirtime(retry_policies=policies())
+            request_id = client.generate_request_id()
+            try:
+                return request_id, await client.purchase_airtime(
+                    self.server.url, schema(request_id)
+                )
+            finally:
+                await close_async_client()
+
+        return asyncio.run(run())
+
+    def test_error_outcomes(self):
+        import httpx
+
+        client = AsyncAirtime()
+        self.assertEqual(client._error_outcome(httpx.ConnectError("refused")), NOT_SENT)
+        self.assertEqual(client._error_outcome(httpx.ReadTimeout("slow")), MAYBE_SENT)
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_no_retry_past_the_deadline(self):
+        policy = RetryPolicy(backoff=1, max_retries=5)
+        self.assertIsNone(policy.retry_delay(1, time.monotonic() - 1))
+        self.assertIsNone(policy.retry_delay(6, time.monotonic() + 60))
+        for attempt in range(1, 6):
+            delay = policy.retry_delay(attempt, time.monotonic() + 60)
+            self.assertLessEqual(delay, min(policy.max_backoff, 2 ** (attempt - 1)))
+
+    def test_timeouts_shrink_to_the_deadline(self):
+        policy = RetryPolicy(connect_timeout=3, read_timeout=30)
+        connect, read = policy.timeout(time.monotonic() + 1)
+        self.assertLessEqual(connect, 1)
+        self.assertLessEqual(read, 1)
+        self.assertEqual(policy.timeout(time.monotonic() + 60), (3, 30))
+
+    def test_call_ends_by_its_deadline(self):
+        server = ScriptedServer(latency={"balance": 1.0}).start()
+        self.addCleanup(server.stop)
+        client = Airtime(
+            retry_policies=dict(
+                policies(), catalog=RetryPolicy(read_timeout=10, deadline=0.5)
+            )
+        )
+        start = time.monotonic()
+        result = client.get_credit_wallet_balance(server.url)
+        self.assertIsInstance(result, str)
+        self.assertLess(time.monotonic() - start, 0.9)
+
+
+if __name__ == "__main__":
+    unittest.main()
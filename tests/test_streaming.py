@@ -0,0 +1,150 @@
+import asyncio
+import json
+import unittest
+
+from vtpass.async_main import AsyncVtPassClient, close_async_client
+from vtpass.main import VtPassPythonSDK
+from vtpass.mock_server import MockVtPassServer
+from vtpass.schema import ServiceIdVariationSchema
+from vtpass.streaming import JsonArrayStream, items_of, iter_json_array
+
+DOCUMENT = json.dumps(
+    {
+        "response_description": "000",
+        "content": {
+            "ServiceName": "varations",
+            "varations": [
+                {"variation_code": "a", "name": 'A "varations": [1]', "n": -1.5e3},
+                {"variation_code": "b", "name": "B", "n": True},
+                {"variation_code": "c", "name": "C \u20a6", "n": None},
+            ],
+        },
+    }
+).encode()
+
+
+def chunked(body: bytes, size: int):
+    return [body[start : start + size] for start in range(0, len(body), size)]
+
+
+class TestJsonArrayStream(unittest.TestCase):
+    def test_any_chunking(self):
+        expected = json.loads(DOCUMENT)["content"]["varations"]
+        for size in (1, 2, 3, 7, 64, len(DOCUMENT)):
+            with self.subTest(size=size):
+                items = list(iter_json_array(chunked(DOCUMENT, size), "varations"))
+                self.assertEqual(items, expected)
+
+    def test_fields(self):
+        items = iter_json_array([DOCUMENT], "varations", ("variation_code",))
+        self.assertEqual(list(items), [{"variation_code": code} for code in "abc"])
+
+    def test_key_as_value_is_skipped(self):
+        body = b'{"serviceID": "varations", "varations" : [1, 2]}'
+        for size in (1, 5, len(body)):
+            with self.subTest(size=size):
+                items = iter_json_array(chunked(body, size), "varations")
+                self.assertEqual(list(items), [1, 2])
+
+    def test_document_without_the_key(self):
+        body = b'{"response_description": "012", "errors": "Invalid serviceID"}'
+        for size in (1, 4, len(body)):
+            with self.subTest(size=size):
+                with self.assertRaisesRegex(ValueError, "Invalid serviceID"):
+                    list(iter_json_array(chunked(body, size), "varations"))
+        long_body = b'{"padding": "' + b"x" * 2000 + b'"}'
+        with self.assertRaisesRegex(ValueError, "no varations array"):
+            list(iter_json_array(chunked(long_body, 64), "varations"))
+
+    def test_key_without_an_array(self):
+        body = b'{"content": {"varations": null}}'
+        self.assertEqual(list(iter_json_array([body], "varations")), [])
+
+    def test_items_of(self):
+        result = json.loads(DOCUMENT)
+        self.assertEqual(
+            items_of(result, "varations", ("variation_code",)),
+            [{"variation_code": code} for code in "abc"],
+        )
+        with self.assertRaisesRegex(ValueError, "Invalid serviceID"):
+            items_of(
+                {"response_description": "012", "errors": "Invalid serviceID"},
+                "varations",
+            )
+
+    def test_truncated(self):
+        body = DOCUMENT[: DOCUMENT.index(b'"c"')]
+        for size in (1, 16, len(body)):
+            with self.subTest(size=size):
+                items = []
+                with self.assertRaises(ValueError):
+                    for item in iter_json_array(chunked(body, size), "varations"):
+                        items.append(item)
+                self.assertEqual([item["variation_code"] for item in items], ["a", "b"])
+
+    def test_truncated_after_the_key(self):
+        with self.assertRaises(ValueError):
+            list(iter_json_array([b'{"varations": '], "varations"))
+
+    def test_malformed_item(self):
+        body = b'{"varations": [{"a": 1}, {bad}, {"b": 2}]}'
+        for size in (1, 4, len(body)):
+            with self.subTest(size=size):
+                with self.assertRaises(json.JSONDecodeError):
+                    list(iter_json_array(chunked(body, size), "varations"))
+
+    def test_malformed_item_is_reported_without_waiting_for_the_end(self):
+        stream = JsonArrayStream("varations")
+        self.assertEqual(stream.feed(b'{"varations": [{"a": 1}, '), [{"a": 1}])
+        with self.assertRaises(json.JSONDecodeError):
+            stream.feed(b'{bad}, {"b": 2}, {"c": 3}, ')
+
+    def test_item_past_the_size_bound(self):
+        stream = JsonArrayStream("varations", max_item_size=100)
+        stream.feed(b'{"varations": [{"name": "')
+        with self.assertRaises(json.JSONDecodeError):
+            stream.feed(b"x" * 200)
+
+
+class TestIterServiceVariations(unittest.TestCase):
+    def setUp(self):
+        self.server = MockVtPassServer().start()
+        self.addCleanup(self.server.stop)
+
+    def test_sync(self):
+        client = VtPassPythonSDK()
+        variations = client.iter_service_variations(
+            self.server.url, ServiceIdVariationSchema(service_id="gotv")
+        )
+        self.assertEqual(len(list(variations)), 4)
+        with self.assertRaisesRegex(ValueError, "Invalid serviceID"):
+            list(
+                client.iter_service_variations(
+                    self.server.url, ServiceIdVariationSchema(service_id="showmax")
+                )
+            )
+
+    def test_async(self):
+        async def variations(service_id):
+            client = AsyncVtPassClient()
+            schema = ServiceIdVariationSchema(service_id=service_id)
+            return [
+                variation
+                async for variation in client.iter_service_variations(
+                    self.server.url, schema
+                )
+            ]
+
+        async def run():
+            try:
+                self.assertEqual(len(await variations("gotv")), 4)
+                with self.assertRaisesRegex(ValueError, "Invalid serviceID"):
+                    await variations("showmax")
+            finally:
+                await close_async_client()
+
+        asyncio.run(run())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+
+from airtime.airtime import Airtime
+from airtime.schema import AirtimeSchema
+from vtpass.main import VtPassPythonSDK
+from vtpass.mock_server import MockVtPassServer
+from vtpass.schema import ProductOptionSchema
+from vtpass.transport import Hooks
+
+
+class TestHooks(unittest.TestCase):
+    def setUp(self):
+        self.server = MockVtPassServer().start()
+        self.addCleanup(self.server.stop)
+
+    def test_failing_after_receive_hook_does_not_fail_the_call(self):
+        calls = []
+
+        def broken_hook(request, response, result):
+            calls.append(request.endpoint)
+            raise RuntimeError("hook bug")
+
+        hooks = Hooks()
+        hooks.register("after_receive", broken_hook)
+        client = Airtime(hooks=hooks)
+        result = client.purchase_airtime(
+            self.server.url,
+            AirtimeSchema(
+                service_id="mtn",
+                phone_number="08011111111",
+                amount=100,
+                request_id=client.generate_request_id(),
+            ),
+        )
+        self.assertEqual(calls, ["pay"])
+        self.assertIsInstance(result, dict)
+        self.assertEqual(result["transactions"]["status"], "delivered")
+
+    def test_get_error_responses(self):
+        hooks = Hooks()
+        hooks.register(
+            "before_send", lambda request: {"errors": f"{request.endpoint} is down"}
+        )
+        client = VtPassPythonSDK(hooks=hooks)
+        url = self.server.url
+        with self.assertLogs("vtpass", "INFO") as logs:
+            balance = client.get_credit_wallet_balance(url)
+            categories = client.get_available_service_categories(url)
+            options = client.get_product_options(
+                url,
+                # the schema nests a ServiceIdSchema its validator cannot strip
+                ProductOptionSchema.model_construct(
+                    service_id="ui-insure", name="passenger_type"
+                ),
+            )
+        self.assertEqual(balance, {"errors": "balance is down"})
+        self.assertEqual(categories, {"errors": "service-categories is down"})
+        self.assertEqual(options, {"errors": "options is down"})
+        self.assertEqual(
+            [record.levelname for record in logs.records], ["INFO", "INFO", "ERROR"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+from unittest import mock
+
+from pydantic import BaseModel
+
+from airtime.schema import AirtimeSchema
+from vtpass.batch import PRODUCTS, get_schema
+from vtpass import validation
+from vtpass.validation import construct_many, validate_rows
+
+ROW = {
+    "service_id": "mtn",
+    "phone_number": "08011111111",
+    "amount": 100,
+    "request_id": "202610171200" + "0" * 32,
+}
+
+
+class WithPrivate(BaseModel):
+    name: str
+    _seen: int = 0
+
+
+class WithMutableDefault(BaseModel):
+    name: str
+    tags: list = []
+
+
+class TestConstructMany(unittest.TestCase):
+    def assertSameModel(self, model, expected):
+        self.assertEqual(model, expected)
+        self.assertEqual(model.__dict__, expected.__dict__)
+        self.assertEqual(model.model_fields_set, expected.model_fields_set)
+        self.assertEqual(model.__pydantic_extra__, expected.__pydantic_extra__)
+        self.assertEqual(model.__pydantic_private__, expected.__pydantic_private__)
+
+    def test_matches_model_construct(self):
+        [(_, validated)] = validate_rows(AirtimeSchema, [ROW])[0]
+        row = validated.model_dump(mode="json")
+        [model] = construct_many(AirtimeSchema, [row])
+        self.assertSameModel(model, AirtimeSchema.model_construct(**row))
+        self.assertEqual(model, validated)
+
+    def test_unknown_keys_are_dropped(self):
+        row = dict(ROW, note="not a field")
+        [model] = construct_many(AirtimeSchema, [row])
+        self.assertNotIn("note", model.__dict__)
+        self.assertSameModel(model, AirtimeSchema.model_construct(**row))
+
+    def test_missing_required_fields(self):
+        for product in PRODUCTS:
+            schema = get_schema(product)
+            row = {"request_id": ROW["request_id"]}
+            [model] = construct_many(schema, [row])
+            self.assertSameModel(model, schema.model_construct(**row))
+
+    def test_private_attributes(self):
+        [model] = construct_many(WithPrivate, [{"name": "a"}])
+        self.assertSameModel(model, WithPrivate.model_construct(name="a"))
+        self.assertEqual(model._seen, 0)
+
+    def test_mutable_defaults_are_not_shared(self):
+        first, second = construct_many(
+            WithMutableDefault, [{"name": "a"}, {"name": "b"}]
+        )
+        first.tags.append("x")
+        self.assertEqual(second.tags, [])
+        self.assertEqual(WithMutableDefault.model_fields["tags"].default, [])
+
+    def test_other_pydantic_releases_use_model_construct(self):
+        with mock.patch.object(
+            validation, "_CONSTRUCT_FAST_PATH", False
+        ), mock.patch.dict(
+            validation._construct_templates, clear=True
+        ), mock.patch.object(
+            AirtimeSchema, "model_construct", wraps=AirtimeSchema.model_construct
+        ) as model_construct:
+            [model] = construct_many(AirtimeSchema, [ROW])
+        model_construct.assert_called_once_with(**ROW)
+        self.assertSameModel(model, AirtimeSchema.model_construct(**ROW))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+
+from vtpass.cache import CatalogCache
+from vtpass.main import VtPassPythonSDK
+from vtpass.mock_server import MockVtPassServer
+from vtpass.schema import ServiceIdSchema
+from vtpass.variations import VariationIndex
+
+
+class TestVariationIndex(unittest.TestCase):
+    def setUp(self):
+        self.server = MockVtPassServer().start()
+        self.addCleanup(self.server.stop)
+        self.client = VtPassPythonSDK(cache=CatalogCache())
+
+    def test_load_keeps_the_cached_variations_of_other_services(self):
+        url = self.server.url
+        self.client.get_service_variation_codes(url, ServiceIdSchema(service_id="gotv"))
+        self.client.get_service_variation_codes(url, ServiceIdSchema(service_id="dstv"))
+        self.assertEqual(self.server.requests["service-variations"], 2)
+
+        index = VariationIndex(self.client, url)
+        self.assertEqual(index.load(["dstv"]), set())
+        # dstv was fetched again, gotv is still served from the cache
+        self.assertEqual(self.server.requests["service-variations"], 3)
+        self.client.get_service_variation_codes(url, ServiceIdSchema(service_id="gotv"))
+        self.assertEqual(self.server.requests["service-variations"], 3)
+
+    def test_load_rejects_a_single_service_id(self):
+        index = VariationIndex(self.client, self.server.url)
+        with self.assertRaises(TypeError):
+            index.load("dstv")
+        self.assertEqual(self.server.requests["service-variations"], 0)
+
+    def test_check(self):
+        index = VariationIndex(self.client, self.server.url, ["dstv", "nope"])
+        self.assertEqual(index.service_ids, {"dstv"})
+        self.assertEqual(len(index), 5)
+
+        # a fixed price variation is charged its amount
+        self.assertEqual(index.check("dstv", "dstv-padi", 100), (2950, None))
+        amount, error = index.check("dstv", "dstv-unknown", 100)
+        self.assertEqual(amount, 100)
+        self.assertIn("Unknown variation code", error)
+        # services that were never loaded are not checked
+        self.assertEqual(index.check("gotv", "anything", 100), (100, None))
+
+    def test_refresh_keeps_failed_services(self):
+        index = VariationIndex(self.client, self.server.url, ["dstv"])
+        self.server.error_rate = 1.0
+        self.assertEqual(index.refresh(), {"dstv"})
+        self.assertIsNotNone(index.get("dstv", "dstv-padi"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,203 @@
+import asyncio
+import unittest
+
+from electricity_payment.async_electricity_payment import AsyncElectricityPayment
+from electricity_payment.electricity_payment import ElectricityPayment
+from electricity_payment.schema import VerifyMeterValueSchema
+from tv_subscriptions.async_tv_subscription import AsyncTVSubscription
+from tv_subscriptions.schema import TVSubscriptionSchema, VerifySmartCardNumberSchema
+from tv_subscriptions.tv_subscription import TVSubscription
+from vtpass.async_main import close_async_client
+from vtpass.bulk import BulkStats
+from vtpass.cache import VerificationCache
+from vtpass.mock_server import MockVtPassServer
+
+GOOD = "1111111111111"
+# the mock server answers code 000 with an error for billers codes starting with 0000
+WRONG = "0000111111111"
+
+
+def meter(billers_code: str, service_id: str = "ikeja-electric", type: str = "prepaid"):
+    return VerifyMeterValueSchema(
+        service_id=service_id, type=type, billers_code=billers_code
+    )
+
+
+METERS = [
+    meter(GOOD),
+    meter(GOOD),
+    meter(GOOD, type="postpaid"),
+    meter(GOOD, service_id="eko-electric"),
+    meter(WRONG),
+    meter(WRONG),
+]
+
+
+class TestVerifyMetersBulk(unittest.TestCase):
+    def setUp(self):
+        self.server = MockVtPassServer().start()
+        self.addCleanup(self.server.stop)
+
+    def assertResults(self, results, stats):
+        self.assertEqual(len(results), 4)
+        good = results[("ikeja-electric", "prepaid", GOOD)]
+        self.assertEqual(good["Meter_Number"], GOOD)
+        self.assertIn(("ikeja-electric", "postpaid", GOOD), results)
+        self.assertIn(("eko-electric", "prepaid", GOOD), results)
+        self.assertTrue(
+            results[("ikeja-electric", "prepaid", WRONG)]["WrongBillersCode"]
+        )
+        # duplicates are sent once
+        self.assertEqual(self.server.requests["merchant-verify"], 4)
+        self.assertEqual(stats.total, 4)
+
+    def test_sync(self):
+        client = ElectricityPayment(verification_cache=VerificationCache())
+        stats = BulkStats()
+        results = client.verify_meters_bulk(self.server.url, iter(METERS), stats=stats)
+        self.assertResults(results, stats)
+
+        # verified meters come from the cache, unknown ones are asked again
+        client.verify_meters_bulk(self.server.url, METERS)
+        self.assertEqual(self.server.requests["merchant-verify"], 5)
+
+    def test_async(self):
+        async def run():
+            client = AsyncElectricityPayment(verification_cache=VerificationCache())
+            try:
+                stats = BulkStats()
+                results = await client.verify_meters_bulk(
+                    self.server.url, METERS, stats=stats
+                )
+                self.assertResults(results, stats)
+                await client.verify_meters_bulk(self.server.url, METERS)
+            finally:
+                await close_async_client()
+
+        asyncio.run(run())
+        self.assertEqual(self.server.requests["merchant-verify"], 5)
+
+    def test_failures(self):
+        self.server.error_rate = {"merchant-verify": 1.0}
+        client = ElectricityPayment(verification_cache=VerificationCache())
+        stats = BulkStats()
+        results = client.verify_meters_bulk(
+            self.server.url, [meter(GOOD), meter("2222222222222")], stats=stats
+        )
+        self.assertEqual(len(results), 2)
+        for result in results.values():
+            self.assertIsInstance(result, str)
+            self.assertIn("500", result)
+        self.assertEqual((stats.succeeded, stats.failed), (0, 2))
+
+        # failed verifications are not cached
+        self.server.error_rate = 0.0
+        results = client.verify_meters_bulk(self.server.url, [meter(GOOD)])
+        self.assertEqual(
+            results[("ikeja-electric", "prepaid", GOOD)]["Meter_Number"], GOOD
+        )
+
+
+def card(billers_code: str, service_id: str = "dstv"):
+    return VerifySmartCardNumberSchema(service_id=service_id, billers_code=billers_code)
+
+
+def subscription(client, billers_code: str):
+    return TVSubscriptionSchema(
+        service_id="dstv",
+        billers_code=billers_code,
+        request_id=client.generate_request_id(),
+        variation_code="dstv-padi",
+        phone="08011111111",
+    )
+
+
+class TestVerifySmartCardsBulk(unittest.TestCase):
+    def setUp(self):
+        self.server = MockVtPassServer().start()
+        self.addCleanup(self.server.stop)
+
+    def test_lazy_results_and_failures(self):
+        pulled = []
+
+        def cards():
+            for billers_code in (GOOD, "2222222222", WRONG, GOOD):
+                pulled.append(billers_code)
+                yield card(billers_code)
+
+        client = TVSubscription(verification_cache=VerificationCache())
+        stats = BulkStats()
+        results = client.verify_smart_cards_bulk(
+            self.server.url, cards(), concurrency=2, stats=stats
+        )
+        # nothing is pulled or sent until the results are iterated
+        self.assertEqual(pulled, [])
+        results = list(results)
+        self.assertEqual(len(results), 4)
+        self.assertEqual(
+            sorted(schema.billers_code for schema, _ in results),
+            sorted([GOOD, GOOD, "2222222222", WRONG]),
+        )
+        for schema, result in results:
+            if schema.billers_code == WRONG:
+                self.assertTrue(result["WrongBillersCode"])
+            else:
+                self.assertEqual(result["Customer_Name"], "TESTMETER1")
+        self.assertEqual(stats.total, 4)
+
+        self.server.error_rate = {"merchant-verify": 1.0}
+        stats = BulkStats()
+        results = {
+            schema.billers_code: result
+            for schema, result in client.verify_smart_cards_bulk(
+                self.server.url, [card(GOOD), card("3333333333")], stats=stats
+            )
+        }
+        # the verified card comes from the cache, the new one fails
+        self.assertEqual(results[GOOD]["Customer_Name"], "TESTMETER1")
+        self.assertIsInstance(results["3333333333"], str)
+        self.assertEqual((stats.succeeded, stats.failed), (1, 1))
+
+    def test_sync_payment_invalidates_the_card(self):
+        client = TVSubscription(verification_cache=VerificationCache())
+        cards = [card(GOOD), card("2222222222")]
+        list(client.verify_smart_cards_bulk(self.server.url, cards))
+        list(client.verify_smart_cards_bulk(self.server.url, cards))
+        self.assertEqual(self.server.requests["merchant-verify"], 2)
+
+        client.tv_susbscription(self.server.url, subscription(client, GOOD))
+        self.assertEqual(self.server.requests["pay"], 1)
+        list(client.verify_smart_cards_bulk(self.server.url, cards))
+        # only the paid card is verified again
+        self.assertEqual(self.server.requests["merchant-verify"], 3)
+
+    def test_async_payment_invalidates_the_card(self):
+        async def run():
+            client = AsyncTVSubscription(verification_cache=VerificationCache())
+            cards = [card(GOOD), card("2222222222")]
+            try:
+                for _ in range(2):
+                    results = [
+                        result
+                        async for _, result in client.verify_smart_cards_bulk(
+                            self.server.url, cards
+                        )
+                    ]
+                self.assertEqual(len(results), 2)
+                self.assertEqual(self.server.requests["merchant-verify"], 2)
+
+                await client.tv_susbscription(
+                    self.server.url, subscription(client, GOOD)
+                )
+                async for _ in client.verify_smart_cards_bulk(self.server.url, cards):
+                    pass
+            finally:
+                await close_async_client()
+
+        asyncio.run(run())
+        self.assertEqual(self.server.requests["pay"], 1)
+        self.assertEqual(self.server.requests["merchant-verify"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import threading
+import unittest
+
+from vtpass.async_main import AsyncVtPassClient
+from vtpass.transport import VtPassRequest
+from vtpass.wallet import WalletLedger
+
+
+class FakeClient(object):
+    """
+    Answers /balance with the wallet balance, the first call waiting until `release` is set.
+    """
+
+    def __init__(self, balance: float):
+        self.balance = balance
+        self.calls = 0
+        self.in_flight = threading.Event()
+        self.release = threading.Event()
+
+    def get_credit_wallet_balance(self, url):
+        self.calls += 1
+        if self.calls == 1:
+            balance = self.balance
+            self.in_flight.set()
+            self.release.wait()
+            return balance
+        return self.balance
+
+
+def pay(ledger: WalletLedger, request_id: str, amount: float):
+    request = VtPassRequest(
+        "POST",
+        "https://vtpass/api/pay",
+        "pay",
+        {"request_id": request_id, "amount": amount},
+    )
+    ledger._after_receive(
+        request,
+        None,
+        {
+            "code": "000",
+            "content": {
+                "transactions": {"status": "delivered", "total_amount": amount}
+            },
+        },
+    )
+
+
+class TestWalletLedger(unittest.TestCase):
+    def test_debits_during_overlapping_reconciliations(self):
+        client = FakeClient(1000.0)
+        ledger = WalletLedger(client, "https://vtpass/api", reconcile_every=0)
+        ledger.balance = 1000.0
+
+        balances = []
+
+        def reconcile():
+            balances.append(ledger.reconcile())
+
+        first = threading.Thread(target=reconcile)
+        first.start()
+        client.in_flight.wait()
+        second = threading.Thread(target=reconcile)
+        second.start()
+        # debited while the first /balance is in flight, which answered before seeing it
+        pay(ledger, "1", 100.0)
+        client.balance = 900.0
+        client.release.set()
+        first.join()
+        second.join()
+
+        self.assertEqual(balances, [900.0, 900.0])
+        self.assertEqual(client.calls, 2)
+        self.assertEqual(ledger.balance, 900.0)
+        self.assertEqual(ledger.drift, 0.0)
+
+    def test_async_clients_are_rejected(self):
+        with self.assertRaises(TypeError):
+            WalletLedger(AsyncVtPassClient(), "https://vtpass/api")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,15 @@
 from .tv_subscription import TVSubscription
 
 
-vtpass_tv_subscription = TVSubscription()
+def __getattr__(name):
+    # The client is created on first access, so importing the package does not read the
+    # environment, and the async client (which needs httpx) is only imported when used.
+    global vtpass_tv_subscription
+    if name == "vtpass_tv_subscription":
+        vtpass_tv_subscription = TVSubscription()
+        return vtpass_tv_subscription
+    if name == "AsyncTVSubscription":
+        from .async_tv_subscription import AsyncTVSubscription
+
+        return AsyncTVSubscription
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
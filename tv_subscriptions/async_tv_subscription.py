@@ -0,0 +1,105 @@
+from vtpass.async_main import AsyncVtPassClient
+from vtpass.bulk import BulkStats, run_bulk_async
+from vtpass.cache import verified
+from vtpass.coalesce import coalesced
+
+from .schema import TVSubscriptionSchema, VerifySmartCardNumberSchema
+
+
+class AsyncTVSubscription(AsyncVtPassClient):
+    """
+    The asyncio counterpart of TVSubscription.
+
+    It inherits from the AsyncVtPassClient, which provides the base functionality for API interaction.
+    """
+
+    async def tv_susbscription(self, url: str, tv_sub_schema: TVSubscriptionSchema):
+        """
+        Purchase a TV subscription for a smart card number.
+
+        :param url: The base URL for the VtPass API.
+        :param tv_sub_schema: An instance of TVSubscriptionSchema containing the request ID, service ID, amount, phone, billers code, variation code, subscription type, and quantity.
+        :return: The response from the API as a dictionary. If the request is successful, the response content is returned.
+                In case of an error, the error message is returned.
+        """
+        amount, error = self._check_variation(
+            tv_sub_schema.service_id, tv_sub_schema.variation_code, tv_sub_schema.amount
+        )
+        if error is not None:
+            return error
+        data = {
+            "request_id": tv_sub_schema.request_id,
+            "serviceID": tv_sub_schema.service_id,
+            "amount": amount,
+            "phone": tv_sub_schema.phone,
+            "billersCode": tv_sub_schema.billers_code,
+            "variation_code": tv_sub_schema.variation_code,
+            "subscription_type": tv_sub_schema.subscription_type,
+            "quantity": tv_sub_schema.quantity,
+        }
+        result = await self._request(
+            "POST",
+            f"{url}/pay",
+            "pay",
+            "TV Subscription purchased successfully",
+            data=data,
+            service_id=tv_sub_schema.service_id,
+        )
+        if self.verification_cache is not None:
+            # the bouquet, due date and renewal amount change once the subscription is paid.
+            # A payment that failed or timed out may still go through, so drop the card anyway.
+            await self.verification_cache.ainvalidate(
+                tv_sub_schema.service_id, tv_sub_schema.billers_code
+            )
+        return result
+
+    @verified
+    @coalesced("merchant-verify")
+    async def verify_smart_card_number(
+        self, url: str, verify_smart_card: VerifySmartCardNumberSchema
+    ):
+        """
+        Verify a smart card number for a TV subscription.
+
+        :param url: The base URL for the VtPass API.
+        :param verify_smart_card: An instance of VerifySmartCardNumberSchema containing the service ID and billers code.
+        :return: The response from the API as a dictionary. If the request is successful, the response content is returned.
+                In case of an error, the error message is returned.
+        """
+        data = {
+            "serviceID": verify_smart_card.service_id,
+            "billersCode": verify_smart_card.billers_code,
+        }
+        return await self._request(
+            "POST",
+            f"{url}/merchant-verify",
+            "merchant-verify",
+            "Smart Card Number verified successfully",
+            data=data,
+            service_id=verify_smart_card.service_id,
+        )
+
+    def verify_smart_cards_bulk(
+        self,
+        url: str,
+        verify_smart_cards,
+        concurrency: int = 10,
+        stats: BulkStats = None,
+    ):
+        """
+        Verify many smart card numbers concurrently, see `TVSubscription.verify_smart_cards_bulk`.
+
+        :param url: The base URL for the VtPass API.
+        :param verify_smart_cards: An iterable of VerifySmartCardNumberSchema instances, it can be a generator.
+        :param concurrency: The maximum number of verifications in flight.
+        :param stats: An optional BulkStats instance that is updated with the processed, succeeded and failed counts.
+        :return: An async generator of (verify_smart_card, result) tuples in completion order.
+        """
+        return run_bulk_async(
+            lambda verify_smart_card: self.verify_smart_card_number(
+                url, verify_smart_card
+            ),
+            verify_smart_cards,
+            concurrency=concurrency,
+            stats=stats,
+        )
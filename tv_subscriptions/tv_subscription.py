@@ -1,14 +1,10 @@
-import json
-import logging
-
-import requests
-
-from vtpass.main import VtPassPythonSDK, jr
+from vtpass.bulk import BulkStats, run_bulk
+from vtpass.cache import verified
+from vtpass.coalesce import coalesced
+from vtpass.main import VtPassPythonSDK
 
 from .schema import TVSubscriptionSchema, VerifySmartCardNumberSchema
 
-logging.basicConfig(level=logging.INFO)
-
 
 class TVSubscription(VtPassPythonSDK):
     """
@@ -29,47 +25,39 @@ class TVSubscription(VtPassPythonSDK):
         :return: The response from the API as a dictionary. If the request is successful, the response content is returned.
                 In case of an error, the error message is returned.
         """
-        tv_subscription_url = f"{url}/pay"
-        headers = self.post_request_headers()
+        amount, error = self._check_variation(
+            tv_sub_schema.service_id, tv_sub_schema.variation_code, tv_sub_schema.amount
+        )
+        if error is not None:
+            return error
         data = {
             "request_id": tv_sub_schema.request_id,
             "serviceID": tv_sub_schema.service_id,
-            "amount": tv_sub_schema.amount,
+            "amount": amount,
             "phone": tv_sub_schema.phone,
             "billersCode": tv_sub_schema.billers_code,
             "variation_code": tv_sub_schema.variation_code,
             "subscription_type": tv_sub_schema.subscription_type,
             "quantity": tv_sub_schema.quantity,
         }
-        try:
-            print(data)
-            tv_subscription_url = f"{url}/pay"
-            response = requests.post(
-                tv_subscription_url, headers=headers, data=json.dumps(data)
+        result = self._request(
+            "POST",
+            f"{url}/pay",
+            "pay",
+            "TV Subscription purchased successfully",
+            data=data,
+            service_id=tv_sub_schema.service_id,
+        )
+        if self.verification_cache is not None:
+            # the bouquet, due date and renewal amount change once the subscription is paid.
+            # A payment that failed or timed out may still go through, so drop the card anyway.
+            self.verification_cache.invalidate(
+                tv_sub_schema.service_id, tv_sub_schema.billers_code
             )
-            response.raise_for_status()
-            result = response.json()
-
-            if "code" in result and result["code"] != "000":
-                logging.error(f"An Error Response received: {response.json()}")
-                return response.json()
-            else:
-                logging.info("TV Subscription purchased successfully")
-                logging.debug(
-                    f"TV Subscription purchased successfully for {tv_sub_schema.billers_code}"
-                )
-                if jr == "True":
-                    return result
-                else:
-                    return result.get("content")
-
-        except requests.exceptions.HTTPError as http_err:
-            logging.error(f"HTTP error occurred: {http_err} - {response.text}")
-            return f"HTTP error occurred: {http_err} - {response.text}"
-        except Exception as err:
-            logging.error(f"An error occurred: {err}")
-            return f"An error occurred: {err}"
+        return result
 
+    @verified
+    @coalesced("merchant-verify")
     def verify_smart_card_number(
         self, url: str, verify_smart_card: VerifySmartCardNumberSchema
     ):
@@ -77,42 +65,53 @@ class TVSubscription(VtPassPythonSDK):
         Verify a smart card number for a TV subscription.
 
         This method sends a POST request to the VtPass API to verify a smart card number using the provided schema.
+        Successful verifications are kept in the client's `verification_cache`, if it has one, until
+        a subscription is paid for the card.
 
         :param url: The base URL for the VtPass API.
         :param verify_smart_card: An instance of VerifySmartCardNumberSchema containing the service ID and billers code.
         :return: The response from the API as a dictionary. If the request is successful, the response content is returned.
                 In case of an error, the error message is returned.
         """
-
-        verify_smart_card_url = f"{url}/merchant-verify"
-        headers = self.post_request_headers()
         data = {
             "serviceID": verify_smart_card.service_id,
             "billersCode": verify_smart_card.billers_code,
         }
-        try:
-            response = requests.post(
-                verify_smart_card_url, headers=headers, data=json.dumps(data)
-            )
-            response.raise_for_status()
-            result = response.json()
+        return self._request(
+            "POST",
+            f"{url}/merchant-verify",
+            "merchant-verify",
+            "Smart Card Number verified successfully",
+            data=data,
+            service_id=verify_smart_card.service_id,
+        )
+
+    def verify_smart_cards_bulk(
+        self,
+        url: str,
+        verify_smart_cards,
+        concurrency: int = 10,
+        stats: BulkStats = None,
+    ):
+        """
+        Verify many smart card numbers in parallel, e.g before a renewal run.
 
-            if "code" in result and result["code"] != "000":
-                logging.error(f"An Error Response received: {response.json()}")
-                return response.json()
-            else:
-                logging.info("Smart Card Number verified successfully")
-                logging.debug(
-                    f"Smart Card Number verified successfully for {verify_smart_card.billers_code}"
-                )
-                if jr == "True":
-                    return result
-                else:
-                    return result.get("content")
+        Schemas are pulled from `verify_smart_cards` only as slots free up, so a generator of
+        hundreds of thousands of cards never has to be held in memory. Cards found in the client's
+        `verification_cache` are not sent to the API again.
 
-        except requests.exceptions.HTTPError as http_err:
-            logging.error(f"HTTP error occurred: {http_err} - {response.text}")
-            return f"HTTP error occurred: {http_err} - {response.text}"
-        except Exception as err:
-            logging.error(f"An error occurred: {err}")
-            return f"An error occurred: {err}"
+        :param url: The base URL for the VtPass API.
+        :param verify_smart_cards: An iterable of VerifySmartCardNumberSchema instances, it can be a generator.
+        :param concurrency: The maximum number of verifications in flight.
+        :param stats: An optional BulkStats instance that is updated with the processed, succeeded and failed counts.
+        :return: A generator of (verify_smart_card, result) tuples in completion order, where result is
+                what `verify_smart_card_number` returned for that schema.
+        """
+        return run_bulk(
+            lambda verify_smart_card: self.verify_smart_card_number(
+                url, verify_smart_card
+            ),
+            verify_smart_cards,
+            concurrency=concurrency,
+            stats=stats,
+        )
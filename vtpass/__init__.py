@@ -1,3 +1,15 @@
 from .main import VtPassPythonSDK
 
-vtPass = VtPassPythonSDK()
+
+def __getattr__(name):
+    # The client is created on first access, so importing the package does not read the
+    # environment, and the async client (which needs httpx) is only imported when used.
+    global vtPass
+    if name == "vtPass":
+        vtPass = VtPassPythonSDK()
+        return vtPass
+    if name == "AsyncVtPassClient":
+        from .async_main import AsyncVtPassClient
+
+        return AsyncVtPassClient
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
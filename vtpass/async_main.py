@@ -0,0 +1,605 @@
+import asyncio
+import logging
+import os
+import time
+import weakref
+
+from vtpass.cache import (
+    CatalogCache,
+    VerificationCache,
+    cached,
+    get_catalog_cache,
+    get_verification_cache,
+)
+from vtpass.cassette import get_cassette
+from vtpass.coalesce import SingleFlight, coalesced, get_coalescer
+from vtpass.codec import JsonCodec, get_codec
+from vtpass.config import get_config
+from vtpass.log import log_response
+from vtpass.main import VtPassPythonSDK
+from vtpass.rate_limit import RateLimiter, get_rate_limiter
+from vtpass.requery import RequeryScheduler
+from vtpass.streaming import STREAM_CHUNK_SIZE, JsonArrayStream, items_of
+from vtpass.retry import (
+    MAYBE_SENT,
+    NOT_SENT,
+    UNKNOWN_REQUEST_ID_CODE,
+    get_retry_policies,
+    policy_for,
+    status_outcome,
+)
+from vtpass.transport import Hooks, VtPassRequest, default_hooks, shape_result
+from vtpass.variations import VariationIndex
+from vtpass.schema import (
+    ProductOptionSchema,
+    ServiceIdentifierSchema,
+    ServiceIdSchema,
+    ServiceIdVariationSchema,
+)
+
+try:
+    import httpx
+except ImportError:  # httpx is only needed for the async client
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of open connections in the shared async pool
+DEFAULT_MAX_CONNECTIONS = 100
+# Maximum number of idle connections kept alive in the shared async pool
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 20
+
+# event loop: the httpx.AsyncClient shared on it, a client's connections belong to one loop
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def build_async_client(
+    max_connections: int = None, max_keepalive_connections: int = None
+):
+    """
+    Build a pooled httpx.AsyncClient for talking to the VtPass API.
+
+    Any argument left as None falls back to its environment variable
+    (ASYNC_MAX_CONNECTIONS, ASYNC_MAX_KEEPALIVE_CONNECTIONS) and then to the defaults.
+    When a cassette is configured through CASSETTE_PATH, requests go through it, see `vtpass.cassette`.
+
+    :param max_connections: The maximum number of connections open at once.
+    :param max_keepalive_connections: The maximum number of idle connections kept alive.
+    :return: A configured httpx.AsyncClient.
+    """
+    if httpx is None:
+        raise ImportError(
+            "The async client requires httpx, install it with `pip install vtpass-python-sdk[async]`"
+        )
+    if max_connections is None:
+        max_connections = int(
+            os.getenv("ASYNC_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS)
+        )
+    if max_keepalive_connections is None:
+        max_keepalive_connections = int(
+            os.getenv(
+                "ASYNC_MAX_KEEPALIVE_CONNECTIONS", DEFAULT_MAX_KEEPALIVE_CONNECTIONS
+            )
+        )
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive_connections,
+    )
+    cassette = get_cassette()
+    if cassette is not None:
+        return httpx.AsyncClient(
+            transport=cassette.async_transport(httpx.AsyncHTTPTransport(limits=limits))
+        )
+    return httpx.AsyncClient(limits=limits)
+
+
+def get_async_client():
+    """
+    Return the httpx.AsyncClient shared by every async VtPass client on the running event loop,
+    creating it on first use.
+
+    Each event loop gets its own client, so successive `asyncio.run` calls do not reuse
+    connections bound to a closed loop.
+
+    :return: The shared httpx.AsyncClient.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        client = _async_clients[loop] = build_async_client()
+    return client
+
+
+async def close_async_client():
+    """
+    Close the httpx.AsyncClient shared on the running event loop and release its pooled connections.
+    """
+    old_client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if old_client is not None:
+        await old_client.aclose()
+
+
+class AsyncVtPassClient(object):
+    """
+    AsyncVtPassClient is the asyncio counterpart of VtPassPythonSDK.
+
+    It exposes the same methods as VtPassPythonSDK as coroutines, takes the same schemas
+    and returns the same shapes. Requests go through one shared httpx.AsyncClient, so a
+    single event loop can keep many calls in flight over a pooled set of connections.
+
+    This client requires the optional `httpx` dependency
+    (`pip install vtpass-python-sdk[async]`) and the same environment variables as VtPassPythonSDK.
+
+    Attributes:
+        api_key (str): The API key for authentication.
+        public_key (str): The public key for authentication.
+        secret_key (str): The secret key for authentication.
+        client (httpx.AsyncClient): The pooled HTTP client used for every request.
+            Unless a client is passed in, all async clients share the one from `get_async_client`.
+        cache (CatalogCache): The cache for catalog responses, None when caching is disabled.
+        verification_cache (VerificationCache): The cache for successful merchant verifications,
+            None when caching is disabled.
+        hooks (Hooks): The hooks run around every request, shared with the sync clients by default.
+        retry_policies (dict): The timeouts and retries of each endpoint class, shared with the
+            sync clients by default.
+        rate_limiter (RateLimiter): The limiter pacing the requests, shared with the sync clients
+            by default, so that both draw from the same budgets.
+        variation_index (VariationIndex): The index purchases are checked against before being
+            sent, None to send them unchecked.
+        codec (JsonCodec): The codec encoding request bodies and decoding responses, see
+            `vtpass.codec`. Unless a codec is passed in, all clients share the fastest one installed.
+        coalescer (SingleFlight): Coalesces the identical catalog and verification calls made while
+            one is in flight, see `vtpass.coalesce`. None when coalescing is disabled. Unless a
+            coalescer is passed in, all clients share the one configured by COALESCE.
+    """
+
+    def __init__(
+        self,
+        client: "httpx.AsyncClient" = None,
+        cache: CatalogCache = None,
+        hooks: Hooks = None,
+        retry_policies: dict = None,
+        rate_limiter: RateLimiter = None,
+        verification_cache: VerificationCache = None,
+        variation_index: VariationIndex = None,
+        codec: JsonCodec = None,
+        coalescer: SingleFlight = None,
+    ):
+        if httpx is None:
+            raise ImportError(
+                "AsyncVtPassClient requires httpx, install it with `pip install vtpass-python-sdk[async]`"
+            )
+        config = get_config()
+        self.api_key = config.api_key
+        self.public_key = config.public_key
+        self.secret_key = config.secret_key
+        # json full response
+        self.jr = config.json_response
+        self._client = client
+        self.cache = cache if cache is not None else get_catalog_cache()
+        self.verification_cache = (
+            verification_cache
+            if verification_cache is not None
+            else get_verification_cache()
+        )
+        self.hooks = hooks if hooks is not None else default_hooks
+        self.retry_policies = (
+            retry_policies if retry_policies is not None else get_retry_policies()
+        )
+        self._rate_limiter = rate_limiter
+        self.variation_index = variation_index
+        self.codec = codec if codec is not None else get_codec()
+        self.coalescer = coalescer if coalescer is not None else get_coalescer()
+        # Verify if the api_key, public_key and secret_key are set
+        self.verify_keys_added()
+
+    verify_keys_added = VtPassPythonSDK.verify_keys_added
+    get_request_headers = VtPassPythonSDK.get_request_headers
+    post_request_headers = VtPassPythonSDK.post_request_headers
+    generate_request_id = VtPassPythonSDK.generate_request_id
+    generate_request_ids = VtPassPythonSDK.generate_request_ids
+    _extract_balance = VtPassPythonSDK._extract_balance
+    _check_variation = VtPassPythonSDK._check_variation
+
+    @property
+    def client(self):
+        """
+        The HTTP client used for requests to the VtPass API.
+        """
+        if self._client is not None:
+            return self._client
+        return get_async_client()
+
+    rate_limiter = VtPassPythonSDK.rate_limiter
+
+    async def _request(
+        self,
+        method: str,
+        request_url: str,
+        endpoint: str,
+        success_message: str,
+        data: dict = None,
+        service_id: str = None,
+        extract=None,
+        error_level: int = logging.INFO,
+    ):
+        """
+        Send a request to the VtPass API through the same pipeline as `VtPassPythonSDK._request`.
+
+        The registered hooks are run, failed attempts retried and the response shaped the same way.
+
+        :param method: The HTTP method, GET or POST.
+        :param request_url: The full URL of the endpoint.
+        :param endpoint: The VtPass endpoint, e.g pay, merchant-verify, service-variations.
+        :param success_message: The message logged when the request succeeds.
+        :param data: The JSON body of a POST request.
+        :param service_id: The serviceID the request is about, if any.
+        :param extract: An optional callable turning a successful response into the returned value.
+        :param error_level: The level GET responses carrying an "errors" key are logged at.
+        :return: The response from the API. In case of an error, the error message is returned.
+        """
+        if method == "GET":
+            headers = self.get_request_headers()
+        else:
+            headers = self.post_request_headers()
+        request = VtPassRequest(
+            method, request_url, endpoint, data, service_id, headers
+        )
+        try:
+            result = await self._send(request)
+            return shape_result(
+                request, result, self.jr, success_message, extract, error_level
+            )
+        except httpx.HTTPStatusError as http_err:
+            message = f"HTTP error occurred: {http_err} - {http_err.response.text}"
+        except Exception as err:
+            # httpx timeouts carry no message
+            message = f"An error occurred: {str(err) or type(err).__name__}"
+        log_response(request, logging.ERROR, message)
+        return message
+
+    async def _send(self, request: VtPassRequest, send_attempt=None):
+        """
+        Send a request with the same timeouts and retries as `VtPassPythonSDK._send`.
+        """
+        send_attempt = send_attempt or self._send_attempt
+        policy = policy_for(self.retry_policies, request.endpoint)
+        deadline_at = time.monotonic() + policy.deadline
+        while True:
+            request.attempt += 1
+            try:
+                return await send_attempt(request, policy.timeout(deadline_at))
+            except Exception as err:
+                outcome = self._error_outcome(err)
+                delay = None
+                if outcome is not None:
+                    delay = policy.retry_delay(request.attempt, deadline_at)
+                if delay is None:
+                    raise
+                logger.warning(
+                    "Attempt %s of %s failed (%s), retrying in %.2fs",
+                    request.attempt,
+                    request.endpoint,
+                    err,
+                    delay,
+                )
+                await asyncio.sleep(delay)
+                if request.endpoint == "pay" and outcome == MAYBE_SENT:
+                    result = await self._requery_payment(request, err)
+                    if result is not None:
+                        return result
+
+    async def _send_attempt(self, request: VtPassRequest, timeout: tuple):
+        rate_limiter = self.rate_limiter
+        if rate_limiter is not None:
+            delay = await rate_limiter.areserve(request.endpoint, request.service_id)
+            if delay:
+                await asyncio.sleep(delay)
+        hooks = self.hooks
+        codec = self.codec
+        try:
+            result = (
+                await hooks.arun_before_send(request) if hooks.before_send else None
+            )
+            if result is None:
+                connect_timeout, read_timeout = timeout
+                response = await self.client.request(
+                    request.method,
+                    request.url,
+                    headers=request.headers,
+                    content=(
+                        codec.dumps(request.data) if request.data is not None else None
+                    ),
+                    timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+                )
+                response.raise_for_status()
+                result = codec.loads(response.content)
+                if hooks.after_receive:
+                    hooks.run_after_receive(request, response, result)
+            return result
+        except Exception as err:
+            if hooks.on_error:
+                hooks.run_on_error(request, err)
+            raise
+
+    async def _open_stream(self, request: VtPassRequest, timeout: tuple):
+        rate_limiter = self.rate_limiter
+        if rate_limiter is not None:
+            delay = await rate_limiter.areserve(request.endpoint, request.service_id)
+            if delay:
+                await asyncio.sleep(delay)
+        hooks = self.hooks
+        try:
+            result = (
+                await hooks.arun_before_send(request) if hooks.before_send else None
+            )
+            if result is not None:
+                return result
+            connect_timeout, read_timeout = timeout
+            client = self.client
+            response = await client.send(
+                client.build_request(
+                    request.method,
+                    request.url,
+                    headers=request.headers,
+                    timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+                ),
+                stream=True,
+            )
+            try:
+                response.raise_for_status()
+            except httpx.HTTPStatusError:
+                await response.aread()
+                await response.aclose()
+                raise
+            return response
+        except Exception as err:
+            if hooks.on_error:
+                hooks.run_on_error(request, err)
+            raise
+
+    async def _stream(self, request: VtPassRequest, key: str, fields=None):
+        """
+        The async counterpart of `VtPassPythonSDK._stream`.
+        """
+        try:
+            response = await self._send(request, self._open_stream)
+        except Exception as err:
+            logger.error("An error occurred: %s", err)
+            raise
+        if not isinstance(response, httpx.Response):
+            for item in items_of(response, key, fields):
+                yield item
+            return
+        hooks = self.hooks
+        stream = JsonArrayStream(key, fields)
+        try:
+            try:
+                async for chunk in response.aiter_bytes(STREAM_CHUNK_SIZE):
+                    for item in stream.feed(chunk):
+                        yield item
+                    if stream.done:
+                        break
+                else:
+                    stream.close()
+            finally:
+                await response.aclose()
+        except Exception as err:
+            if hooks.on_error:
+                hooks.run_on_error(request, err)
+            logger.error("An error occurred: %s", err)
+            raise
+        if hooks.after_receive:
+            hooks.run_after_receive(request, response, None)
+
+    async def _requery_payment(self, request: VtPassRequest, error: Exception):
+        request_id = request.data["request_id"]
+        requery = VtPassRequest(
+            "POST",
+            f"{request.url.rsplit('/', 1)[0]}/requery",
+            "requery",
+            {"request_id": request_id},
+            request.service_id,
+            self.post_request_headers(),
+        )
+        try:
+            result = await self._send(requery)
+        except Exception as requery_err:
+            logger.error(
+                "Could not requery payment %s (%s), not sending it again",
+                request_id,
+                requery_err,
+            )
+            raise error
+        if result.get("code") == UNKNOWN_REQUEST_ID_CODE:
+            logger.info("Payment %s did not reach VtPass, sending it again", request_id)
+            return None
+        logger.info("Payment %s reached VtPass, returning its requery", request_id)
+        return result
+
+    def _error_outcome(self, error: Exception):
+        if isinstance(
+            error, (httpx.ConnectTimeout, httpx.ConnectError, httpx.PoolTimeout)
+        ):
+            return NOT_SENT
+        if isinstance(error, httpx.HTTPStatusError):
+            return status_outcome(error.response.status_code)
+        if isinstance(error, (httpx.TimeoutException, httpx.TransportError)):
+            return MAYBE_SENT
+        return None
+
+    async def get_credit_wallet_balance(self, url: str):
+        """
+        Retrieve the balance of the wallet associated with the API key.
+
+        :param url: The base URL for the VtPass API.
+        :return: The balance of the wallet if the request is successful.
+             In case of an error, it returns the error message.
+        """
+        return await self._request(
+            "GET",
+            f"{url}/balance",
+            "balance",
+            "Credit Wallet Balance Retrieved successfully",
+            extract=self._extract_balance,
+        )
+
+    @cached("service-categories")
+    @coalesced("service-categories")
+    async def get_available_service_categories(self, url: str):
+        """
+        Retrieve all the available service categories.
+
+        :param url: The base URL for the VtPass API.
+        :return: The available service categories. Each category includes an identifier and name.
+                In case of an error, it returns the error message.
+        """
+        return await self._request(
+            "GET",
+            f"{url}/service-categories",
+            "service-categories",
+            "Available Service Categories Retrieved successfully",
+        )
+
+    @cached("services")
+    @coalesced("services")
+    async def get_service_identify_details(
+        self, url: str, identifier_schema: ServiceIdentifierSchema
+    ):
+        """
+        Get the details of a service identified by its ID.
+
+        :param url: The base URL for the VtPass API.
+        :param identifier_schema: An instance of ServiceIdentifierSchema containing the service identifier.
+        :return: The details of the service. In case of an error, it returns the error message.
+        """
+        service_identifier = identifier_schema.identifier
+        return await self._request(
+            "GET",
+            f"{url}/services?identifier={service_identifier}",
+            "services",
+            "Service Details Retrieved successfully",
+        )
+
+    @cached("service-variations")
+    @coalesced("service-variations")
+    async def get_service_variation_details(
+        self, url: str, service_id_schema: ServiceIdVariationSchema
+    ):
+        """
+        Get the details of a service variation identified by its ID.
+
+        :param url: The base URL for the VtPass API.
+        :param service_id_schema: An instance of ServiceIdVariationSchema containing the service ID.
+        :return: The details of the service variation. In case of an error, it returns the error message.
+        """
+        service_id = service_id_schema.service_id
+        return await self._request(
+            "GET",
+            f"{url}/service-variations?serviceID={service_id}",
+            "service-variations",
+            "Service Variation Details Retrieved successfully",
+            service_id=service_id,
+        )
+
+    def iter_service_variations(
+        self, url: str, service_id_schema: ServiceIdVariationSchema, fields=None
+    ):
+        """
+        Yield the variations of a service one at a time, as the response streams in.
+
+        :param url: The base URL for the VtPass API.
+        :param service_id_schema: An instance of ServiceIdVariationSchema containing the service ID.
+        :param fields: The keys kept of every variation, e.g `vtpass.streaming.VARIATION_FIELDS`.
+            None keeps whole variations.
+        :return: An async generator of variation dictionaries, see `VtPassPythonSDK.iter_service_variations`.
+        :raises httpx.HTTPError: If the request failed.
+        :raises ValueError: If the response has no variations, e.g an unknown serviceID, or is
+            malformed.
+        """
+        service_id = service_id_schema.service_id
+        request = VtPassRequest(
+            "GET",
+            f"{url}/service-variations?serviceID={service_id}",
+            "service-variations",
+            None,
+            service_id,
+            self.get_request_headers(),
+        )
+        return self._stream(request, "varations", fields)
+
+    @cached("options")
+    @coalesced("options")
+    async def get_product_options(
+        self, url: str, product_options_schema: ProductOptionSchema
+    ):
+        """
+        Get the product options for products that have options on the VTpass RESTful API.
+
+        :param url: The base URL for the VtPass API.
+        :param product_options_schema: An instance of ProductOptionSchema containing the service ID and option name.
+        :return: The product options. In case of an error, it returns the error message.
+        """
+        service_id = product_options_schema.service_id
+        name = product_options_schema.name
+        return await self._request(
+            "GET",
+            f"{url}/options?serviceID={service_id}&name={name}",
+            "options",
+            "Product Options Retrieved successfully",
+            service_id=service_id,
+            error_level=logging.ERROR,
+        )
+
+    @cached("service-variations")
+    @coalesced("service-variations")
+    async def get_service_variation_codes(
+        self, url: str, service_id_schema: ServiceIdSchema
+    ):
+        """
+        Get the service variation codes for a service variation identified by its ID.
+
+        :param url: The base URL for the VtPass API.
+        :param service_id_schema: An instance of ServiceIdSchema containing the service ID.
+        :return: The service variation codes. In case of an error, it returns the error message.
+        """
+        service_id = service_id_schema.service_id
+        return await self._request(
+            "GET",
+            f"{url}/service-variations?serviceID={service_id}",
+            "service-variations",
+            "Service Variation Codes Retrieved successfully",
+            service_id=service_id,
+        )
+
+    async def get_transaction_status(self, url: str, request_id: str):
+        """
+        Get the status of a transaction identified by its request ID.
+
+        :param url: The base URL for the VtPass API.
+        :param request_id: The request ID of the transaction.
+        :return: The status of the transaction. In case of an error, it returns the error message.
+        """
+        return await self._request(
+            "POST",
+            f"{url}/requery",
+            "requery",
+            "Transaction Status Retrieved successfully",
+            data={"request_id": request_id},
+        )
+
+    async def requery_transactions(self, url: str, request_ids, **kwargs) -> list:
+        """
+        Requery many pending transactions concurrently until each one reaches a final state.
+
+        Each transaction is requeried with its own exponential backoff and jitter, see
+        `vtpass.requery.RequeryScheduler` for the keyword arguments (concurrency, base_delay,
+        max_delay, age_factor, max_age and on_result).
+
+        :param url: The base URL for the VtPass API.
+        :param request_ids: An iterable of request IDs, or a dictionary mapping request IDs to the time.time() they were submitted at.
+        :return: The list of RequeryResult, in the order of request_ids. A transaction still
+            pending after max_age seconds is reported with the "timeout" status. Use on_result
+            to act on transactions as they settle.
+        """
+        return await RequeryScheduler(self, url, **kwargs).arun(request_ids)
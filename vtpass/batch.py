@@ -0,0 +1,485 @@
+import argparse
+import csv
+import importlib
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+
+from vtpass.bulk import BulkStats, is_successful, run_bulk
+from vtpass.config import get_config
+from vtpass.log import configure_logging
+from vtpass.rate_limit import configure_rate_limiter, parse_rate_limits
+from vtpass.request_id import get_request_id_generator
+from vtpass.validation import construct_many, validate_rows
+
+logger = logging.getLogger(__name__)
+
+# product: (client module, client class, purchase method, schema module, schema class)
+PRODUCTS = {
+    "airtime": (
+        "airtime.airtime",
+        "Airtime",
+        "purchase_airtime",
+        "airtime.schema",
+        "AirtimeSchema",
+    ),
+    "data": (
+        "data_subscription.data_subscription",
+        "DataSubscription",
+        "purchase_data_susbscription",
+        "data_subscription.schema",
+        "DataSubscriptionSchema",
+    ),
+    "tv": (
+        "tv_subscriptions.tv_subscription",
+        "TVSubscription",
+        "tv_susbscription",
+        "tv_subscriptions.schema",
+        "TVSubscriptionSchema",
+    ),
+    "electricity": (
+        "electricity_payment.electricity_payment",
+        "ElectricityPayment",
+        "electricity_payment",
+        "electricity_payment.schema",
+        "ElectricityPaymentSchema",
+    ),
+    "education": (
+        "educational_payment.educational_payment",
+        "EducationalPayment",
+        "educational_payment",
+        "educational_payment.schema",
+        "EducationalPaymentSchema",
+    ),
+    "jamb": (
+        "educational_payment.educational_payment",
+        "EducationalPayment",
+        "jamb_educational_payment",
+        "educational_payment.schema",
+        "JambEducationalPaymentSchema",
+    ),
+}
+
+# The clients of a worker process, one per product, created on first use
+_clients = {}
+
+
+def get_schema(product: str):
+    """
+    :param product: One of PRODUCTS, e.g airtime.
+    :return: The schema class the rows of the product are validated against.
+    """
+    if product not in PRODUCTS:
+        raise ValueError(
+            f"Unknown product {product!r}, expected one of {', '.join(PRODUCTS)}"
+        )
+    _, _, _, schema_module, schema_class = PRODUCTS[product]
+    return getattr(importlib.import_module(schema_module), schema_class)
+
+
+def _get_client(product: str):
+    client = _clients.get(product)
+    if client is None:
+        client_module, client_class, _, _, _ = PRODUCTS[product]
+        client = _clients[product] = getattr(
+            importlib.import_module(client_module), client_class
+        )()
+    return client
+
+
+def read_rows(path: str, file_format: str = None):
+    """
+    Read a purchase file one row at a time.
+
+    CSV files have a header row naming the fields of the schema, e.g service_id,phone_number,amount.
+    Empty cells are left out, so optional fields keep their default. JSONL files hold one
+    object per line, a line that is not valid JSON is read as the error decoding it.
+
+    :param path: The path of the file, - for the standard input.
+    :param file_format: csv or jsonl, guessed from the extension of the path when None.
+    :return: A generator of (line number, row) tuples, see `validate_chunk`.
+    """
+    if file_format is None:
+        file_format = "csv" if path.lower().endswith(".csv") else "jsonl"
+    file = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+    try:
+        if file_format == "csv":
+            reader = csv.DictReader(file)
+            for row in reader:
+                yield reader.line_num, {
+                    key: value for key, value in row.items() if key and value != ""
+                }
+        else:
+            for line_number, line in enumerate(file, 1):
+                if line.strip():
+                    try:
+                        row = json.loads(line)
+                    except ValueError as err:
+                        row = err
+                    yield line_number, row
+    finally:
+        if file is not sys.stdin:
+            file.close()
+
+
+def validate_chunk(rows: list, product: str = None, request_ids=None) -> tuple:
+    """
+    Validate a chunk of rows, grouping them by product.
+
+    :param rows: A list of (line number, row dictionary) tuples. A product key in a row
+        overrides the default product. Rows that are not dictionaries, or are the error
+        raised reading them, are invalid.
+    :param product: The product of the rows without a product key.
+    :param request_ids: A RequestIdGenerator used for the rows without a request_id.
+    :return: A tuple of the list of (product, line numbers, validated rows) tasks and the list
+        of the output records of the invalid rows.
+    """
+    groups = {}
+    invalid = []
+    for line_number, row in rows:
+        if not isinstance(row, dict):
+            invalid.append(
+                {
+                    "line": line_number,
+                    "product": product,
+                    "request_id": None,
+                    "ok": False,
+                    "errors": [
+                        (
+                            f"Invalid JSON: {row}"
+                            if isinstance(row, Exception)
+                            else f"Expected an object, got {type(row).__name__}"
+                        )
+                    ],
+                }
+            )
+            continue
+        row_product = row.pop("product", None) or product
+        if row_product not in PRODUCTS:
+            invalid.append(
+                {
+                    "line": line_number,
+                    "product": row_product,
+                    "request_id": row.get("request_id"),
+                    "ok": False,
+                    "errors": [f"Unknown product {row_product!r}"],
+                }
+            )
+            continue
+        if not row.get("request_id") and request_ids is not None:
+            row["request_id"] = request_ids.generate()
+        lines, product_rows = groups.setdefault(row_product, ([], []))
+        lines.append(line_number)
+        product_rows.append(row)
+
+    tasks = []
+    for row_product, (lines, product_rows) in groups.items():
+        valid, errors = validate_rows(get_schema(row_product), product_rows)
+        for index, row_errors in errors.items():
+            invalid.append(
+                {
+                    "line": lines[index],
+                    "product": row_product,
+                    "request_id": product_rows[index].get("request_id"),
+                    "ok": False,
+                    "errors": row_errors,
+                }
+            )
+        if valid:
+            tasks.append(
+                (
+                    row_product,
+                    [lines[index] for index, _ in valid],
+                    [model.model_dump() for _, model in valid],
+                )
+            )
+    return tasks, invalid
+
+
+def _init_worker(rate_limits: dict, rate_limit_path: str, log_level: int):
+    # every worker draws from the same budgets, kept in the file shared by the pool
+    configure_rate_limiter(rate_limits, rate_limit_path)
+    if log_level is not None:
+        configure_logging(log_level)
+
+
+def _run_task(product: str, url: str, lines: list, rows: list, concurrency: int):
+    # runs in a worker process, the rows were validated by the parent
+    client = _get_client(product)
+    purchase = getattr(client, PRODUCTS[product][2])
+    schemas = construct_many(get_schema(product), rows)
+    return [
+        (line_number, schema.request_id, result)
+        for (line_number, schema), result in run_bulk(
+            lambda item: purchase(url, item[1]),
+            zip(lines, schemas),
+            concurrency=concurrency,
+        )
+    ]
+
+
+class BatchRunner(object):
+    """
+    Run the purchases of a file on a pool of processes.
+
+    The file is read and validated in chunks by the parent process, and each chunk of valid rows
+    is purchased by a worker process running `concurrency` requests at a time. At most
+    `max_pending` chunks are queued, so memory stays flat whatever the size of the file. Results
+    are written to the output file, one JSON line per row, as soon as their chunk completes.
+
+    The workers share one rate limit: the token buckets live in a file all of them draw from,
+    see `vtpass.rate_limit.FileBucketBackend`.
+
+    Attributes:
+        url (str): The base URL for the VtPass API.
+        product (str): The product of the rows without a product column, one of PRODUCTS.
+        processes (int): The number of worker processes.
+        concurrency (int): The number of purchases in flight in each worker process.
+        chunk_size (int): The number of rows validated and sent to a worker at a time.
+        max_pending (int): The maximum number of chunks queued or running, 2 per process by default.
+        rate_limits (dict): The rate limits shared by the workers, see `RateLimiter`.
+        rate_limit_path (str): The file holding the shared buckets, a temporary one when None.
+        log_level (int): The level the workers log at to their standard error, None to leave
+            their logging unconfigured.
+        stats (BulkStats): The counts of the purchases, invalid and unknown rows aside.
+        invalid (int): The number of rows that failed validation.
+        unknown (int): The number of rows whose worker failed, which may or may not have been
+            purchased and must be requeried before being sent again.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        product: str = None,
+        processes: int = None,
+        concurrency: int = 10,
+        chunk_size: int = 100,
+        max_pending: int = None,
+        rate_limits: dict = None,
+        rate_limit_path: str = None,
+        log_level: int = None,
+    ):
+        if product is not None and product not in PRODUCTS:
+            raise ValueError(
+                f"Unknown product {product!r}, expected one of {', '.join(PRODUCTS)}"
+            )
+        self.url = url
+        self.product = product
+        self.processes = processes or os.cpu_count() or 1
+        self.concurrency = concurrency
+        self.chunk_size = chunk_size
+        self.max_pending = max_pending or 2 * self.processes
+        self.rate_limits = rate_limits
+        self.rate_limit_path = rate_limit_path
+        self.log_level = log_level
+        self.stats = BulkStats()
+        self.invalid = 0
+        self.unknown = 0
+
+    def _tasks(self, rows, output, request_ids):
+        # validate chunk by chunk, writing the invalid rows as they are found
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                return
+            tasks, invalid = validate_chunk(chunk, self.product, request_ids)
+            self._write(output, invalid)
+            self.invalid += len(invalid)
+            yield from tasks
+
+    def _write(self, output, records):
+        for record in records:
+            output.write(json.dumps(record, default=str) + "\n")
+        output.flush()
+
+    def _write_results(self, output, future, task):
+        product, lines, task_rows = task
+        try:
+            results = future.result()
+        except Exception as err:
+            # the worker may have sent any number of the purchases before failing
+            logger.error("Batch chunk of %s rows failed: %s", len(lines), err)
+            self.unknown += len(lines)
+            self._write(
+                output,
+                [
+                    {
+                        "line": line_number,
+                        "product": product,
+                        "request_id": row["request_id"],
+                        "ok": None,
+                        "status": "unknown",
+                        "error": str(err) or type(err).__name__,
+                    }
+                    for line_number, row in zip(lines, task_rows)
+                ],
+            )
+            return
+        records = []
+        for line_number, request_id, result in results:
+            self.stats.record(result)
+            records.append(
+                {
+                    "line": line_number,
+                    "product": product,
+                    "request_id": request_id,
+                    "ok": is_successful(result),
+                    "result": result,
+                }
+            )
+        self._write(output, records)
+
+    def run(self, rows, output, dry_run: bool = False) -> BulkStats:
+        """
+        Purchase every valid row.
+
+        :param rows: An iterable of (line number, row dictionary) tuples, e.g from `read_rows`.
+        :param output: A text file the results are written to, as JSON lines with the line, product,
+            request_id and ok of every row, and its result or validation errors. The rows of a
+            worker that failed have ok set to None, the "unknown" status and the error.
+        :param dry_run: Only validate the rows, writing the invalid ones.
+        :return: The stats of the purchases.
+        """
+        # rows without a request_id get one, when TIMEZONE allows generating it
+        timezone = get_config().timezone
+        request_ids = get_request_id_generator(timezone) if timezone else None
+        tasks = self._tasks(rows, output, request_ids)
+        if dry_run:
+            for _, lines, _ in tasks:
+                self.stats.total += len(lines)
+            return self.stats
+
+        temporary_dir = None
+        rate_limit_path = self.rate_limit_path
+        if self.rate_limits and rate_limit_path is None:
+            temporary_dir = tempfile.mkdtemp(prefix="vtpass-batch-")
+            rate_limit_path = os.path.join(temporary_dir, "rate_limit.sqlite")
+        stats = self.stats
+        stats.start()
+        try:
+            # spawned workers start clean, without the threads and sockets of the parent
+            with ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.rate_limits, rate_limit_path, self.log_level),
+            ) as executor:
+                in_flight = {}
+
+                def submit(count: int):
+                    for task in islice(tasks, count):
+                        product, lines, task_rows = task
+                        future = executor.submit(
+                            _run_task,
+                            product,
+                            self.url,
+                            lines,
+                            task_rows,
+                            self.concurrency,
+                        )
+                        in_flight[future] = task
+
+                try:
+                    submit(self.max_pending)
+                    while in_flight:
+                        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            self._write_results(output, future, in_flight.pop(future))
+                            submit(1)
+                except BaseException:
+                    # the purchases already sent must be on record before the error propagates
+                    for future in in_flight:
+                        future.cancel()
+                    for future, task in in_flight.items():
+                        if not future.cancelled():
+                            self._write_results(output, future, task)
+                    raise
+        finally:
+            stats.finish()
+            if temporary_dir is not None:
+                shutil.rmtree(temporary_dir, ignore_errors=True)
+        return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run the purchases of a CSV or JSONL file against the VtPass API."
+    )
+    parser.add_argument("input", help="The purchase file, - for the standard input.")
+    parser.add_argument(
+        "--output", "-o", required=True, help="The JSON lines file of the results."
+    )
+    parser.add_argument(
+        "--product",
+        choices=sorted(PRODUCTS),
+        help="The product of the rows without a product column.",
+    )
+    parser.add_argument("--format", choices=("csv", "jsonl"), dest="file_format")
+    parser.add_argument(
+        "--url",
+        default=os.getenv("Sandbox_URL"),
+        help="The base URL for the VtPass API, Sandbox_URL by default.",
+    )
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--chunk-size", type=int, default=100)
+    parser.add_argument(
+        "--rate-limits",
+        default=os.getenv("RATE_LIMITS"),
+        help="The limits shared by the workers, e.g pay=20:40, RATE_LIMITS by default.",
+    )
+    parser.add_argument(
+        "--rate-limit-path",
+        default=os.getenv("RATE_LIMIT_PATH"),
+        help="The file holding the shared buckets, a temporary file by default.",
+    )
+    parser.add_argument(
+        "--log-level",
+        default="WARNING",
+        choices=("DEBUG", "INFO", "WARNING", "ERROR"),
+        help="The level of the logs written to the standard error.",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only validate the rows, writing the invalid ones.",
+    )
+    args = parser.parse_args(argv)
+    if not args.url and not args.dry_run:
+        parser.error("--url is required when Sandbox_URL is not set")
+
+    runner = BatchRunner(
+        args.url,
+        product=args.product,
+        processes=args.processes,
+        concurrency=args.concurrency,
+        chunk_size=args.chunk_size,
+        rate_limits=parse_rate_limits(args.rate_limits) if args.rate_limits else None,
+        rate_limit_path=args.rate_limit_path,
+        log_level=getattr(logging, args.log_level),
+    )
+    configure_logging(runner.log_level)
+    with open(args.output, "w", encoding="utf-8") as output:
+        stats = runner.run(
+            read_rows(args.input, args.file_format), output, dry_run=args.dry_run
+        )
+    if args.dry_run:
+        print(f"{stats.total} valid rows, {runner.invalid} invalid rows")
+    else:
+        print(
+            f"{stats.total} purchases, {stats.succeeded} succeeded, {stats.failed} failed, "
+            f"{runner.unknown} unknown, {runner.invalid} invalid rows in {stats.elapsed:.1f}s "
+            f"({stats.throughput:.1f}/s)"
+        )
+    return 1 if stats.failed or runner.unknown or runner.invalid else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+
+logger = logging.getLogger(__name__)
+
+
+def is_successful(result) -> bool:
+    """
+    Tell whether a result returned by an SDK method is a successful response.
+
+    SDK methods return an error message string on HTTP or network errors and the full
+    response dictionary when VtPass answers with a code other than "000".
+
+    :param result: The value returned by an SDK method.
+    :return: True if the call succeeded, False otherwise.
+    """
+    if not isinstance(result, dict):
+        return result is not None and not isinstance(result, str)
+    return result.get("code", "000") == "000"
+
+
+class BulkStats(object):
+    """
+    Counters collected while a bulk run is in progress.
+
+    Attributes:
+        total (int): The number of items processed so far.
+        succeeded (int): The number of successful calls.
+        failed (int): The number of calls that returned an error.
+        started_at (float): The time.perf_counter() value when the run started.
+        finished_at (float): The time.perf_counter() value when the run finished, None while running.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.started_at = None
+        self.finished_at = None
+
+    def start(self):
+        self.started_at = time.perf_counter()
+
+    def record(self, result):
+        self.total += 1
+        if is_successful(result):
+            self.succeeded += 1
+        else:
+            self.failed += 1
+
+    def finish(self):
+        self.finished_at = time.perf_counter()
+        logger.info(
+            "Bulk run finished: %s processed, %s succeeded, %s failed in %.2fs (%.1f/s)",
+            self.total,
+            self.succeeded,
+            self.failed,
+            self.elapsed,
+            self.throughput,
+        )
+
+    @property
+    def elapsed(self) -> float:
+        """The number of seconds the run has taken so far."""
+        if self.started_at is None:
+            return 0.0
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        return end - self.started_at
+
+    @property
+    def throughput(self) -> float:
+        """The number of items processed per second."""
+        elapsed = self.elapsed
+        return self.total / elapsed if elapsed else 0.0
+
+    def __repr__(self):
+        return (
+            f"BulkStats(total={self.total}, succeeded={self.succeeded}, "
+            f"failed={self.failed}, elapsed={self.elapsed:.2f}s, "
+            f"throughput={self.throughput:.1f}/s)"
+        )
+
+
+def run_bulk(func, items, concurrency: int = 10, stats: BulkStats = None):
+    """
+    Call `func` on every item using a pool of threads and yield the results as they complete.
+
+    Items are pulled from the iterable lazily and at most `concurrency` calls are in flight
+    at any time, so the whole batch is never held in memory.
+
+    :param func: A callable taking one item and returning the SDK result for it.
+    :param items: An iterable of items, it can be a generator.
+    :param concurrency: The maximum number of calls in flight.
+    :param stats: An optional BulkStats instance that is updated as results come in.
+    :return: A generator of (item, result) tuples in completion order.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    stats = stats if stats is not None else BulkStats()
+    stats.start()
+    items = iter(items)
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        in_flight = {
+            executor.submit(func, item): item for item in islice(items, concurrency)
+        }
+        try:
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    item = in_flight.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as err:
+                        result = f"An error occurred: {err}"
+                    stats.record(result)
+                    for next_item in islice(items, 1):
+                        in_flight[executor.submit(func, next_item)] = next_item
+                    yield item, result
+        finally:
+            for future in in_flight:
+                future.cancel()
+            stats.finish()
+
+
+async def run_bulk_async(func, items, concurrency: int = 10, stats: BulkStats = None):
+    """
+    Await `func` on every item concurrently and yield the results as they complete.
+
+    This is the asyncio counterpart of `run_bulk`. At most `concurrency` calls are in flight
+    at any time and items are pulled from the iterable lazily.
+
+    :param func: A coroutine function taking one item and returning the SDK result for it.
+    :param items: An iterable of items, it can be a generator.
+    :param concurrency: The maximum number of calls in flight.
+    :param stats: An optional BulkStats instance that is updated as results come in.
+    :return: An async generator of (item, result) tuples in completion order.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    stats = stats if stats is not None else BulkStats()
+    stats.start()
+    items = iter(items)
+    in_flight = {
+        asyncio.ensure_future(func(item)): item for item in islice(items, concurrency)
+    }
+    try:
+        while in_flight:
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                item = in_flight.pop(task)
+                try:
+                    result = task.result()
+                except Exception as err:
+                    result = f"An error occurred: {err}"
+                stats.record(result)
+                for next_item in islice(items, 1):
+                    in_flight[asyncio.ensure_future(func(next_item))] = next_item
+                yield item, result
+    finally:
+        for task in in_flight:
+            task.cancel()
+        stats.finish()
@@ -0,0 +1,491 @@
+import asyncio
+import functools
+import inspect
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Returned by backends when a key is missing or expired, since None can be a cached value
+MISS = object()
+
+# Default time to live in seconds for each catalog endpoint
+DEFAULT_TTLS = {
+    "service-categories": 24 * 60 * 60,
+    "services": 24 * 60 * 60,
+    "service-variations": 60 * 60,
+    "options": 60 * 60,
+}
+DEFAULT_TTL = 60 * 60
+DEFAULT_MAX_ENTRIES = 1024
+# Default time to live in seconds of a successful merchant verification
+DEFAULT_VERIFICATION_TTL = 24 * 60 * 60
+
+_catalog_cache = MISS
+_catalog_cache_lock = threading.Lock()
+_verification_cache = MISS
+_verification_cache_lock = threading.Lock()
+
+
+class CacheBackend(object):
+    """
+    Base class for cache backends.
+
+    A backend stores values under string keys with an expiry time and evicts entries
+    once it holds more than its maximum number of entries. Subclass it to plug in another store.
+
+    Attributes:
+        blocking (bool): Whether the backend may block, e.g on disk or on the network. The
+            async clients then use it in a thread, off the event loop.
+    """
+
+    blocking = True
+
+    def get(self, key: str):
+        """
+        :return: The value stored under key, or MISS if it is missing or expired.
+        """
+        raise NotImplementedError
+
+    def set(self, key: str, value, ttl: float):
+        """
+        Store value under key for ttl seconds.
+        """
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        """
+        Remove key from the cache if it is present.
+        """
+        raise NotImplementedError
+
+    def clear(self, prefix: str = ""):
+        """
+        Remove every key starting with prefix, or every key if prefix is empty.
+        """
+        raise NotImplementedError
+
+
+class MemoryBackend(CacheBackend):
+    """
+    In-process cache backend with least recently used eviction.
+
+    Values are returned as they were stored, without copying, so callers must not mutate them.
+
+    Attributes:
+        max_entries (int): The maximum number of entries kept before the least recently used one is evicted.
+    """
+
+    blocking = False
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISS
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return MISS
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value, ttl: float):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self, prefix: str = ""):
+        with self._lock:
+            if not prefix:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DiskBackend(CacheBackend):
+    """
+    On-disk cache backend stored in a SQLite database, shared by every process on the host.
+
+    Values must be JSON serialisable. Entries survive restarts and are evicted in least
+    recently used order.
+
+    Attributes:
+        path (str): The path of the SQLite database file.
+        max_entries (int): The maximum number of entries kept before the least recently used one is evicted.
+    """
+
+    def __init__(self, path: str, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._connection.commit()
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return MISS
+            value, expires_at = row
+            if expires_at <= now:
+                self._connection.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._connection.commit()
+                return MISS
+            self._connection.execute(
+                "UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self._connection.commit()
+        return json.loads(value)
+
+    def set(self, key: str, value, ttl: float):
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + ttl, now),
+            )
+            (count,) = self._connection.execute("SELECT COUNT(*) FROM cache").fetchone()
+            if count > self.max_entries:
+                self._connection.execute(
+                    "DELETE FROM cache WHERE key IN "
+                    "(SELECT key FROM cache ORDER BY accessed_at LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+            self._connection.commit()
+
+    def delete(self, key: str):
+        with self._lock:
+            self._connection.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self._connection.commit()
+
+    def clear(self, prefix: str = ""):
+        with self._lock:
+            self._connection.execute(
+                "DELETE FROM cache WHERE substr(key, 1, length(?)) = ?",
+                (prefix, prefix),
+            )
+            self._connection.commit()
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+class CatalogCache(object):
+    """
+    A cache for the catalog endpoints of the VtPass API with a time to live per endpoint.
+
+    The endpoints are service-categories, services, service-variations and options.
+    Only successful responses are cached.
+
+    Attributes:
+        backend (CacheBackend): Where the entries are stored, in-process by default.
+        ttls (dict): The time to live in seconds for each endpoint.
+        default_ttl (float): The time to live for endpoints missing from ttls.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend = None,
+        ttls: dict = None,
+        default_ttl: float = DEFAULT_TTL,
+    ):
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.ttls = dict(DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self.default_ttl = default_ttl
+
+    def make_key(self, endpoint: str, url: str, *schemas) -> str:
+        parts = [endpoint, url]
+        parts.extend(schema.model_dump_json() for schema in schemas)
+        return "|".join(parts)
+
+    def get(self, key: str):
+        return self.backend.get(key)
+
+    def set(self, endpoint: str, key: str, value):
+        self.backend.set(key, value, self.ttls.get(endpoint, self.default_ttl))
+
+    def delete(self, endpoint: str, url: str, *schemas):
+        """
+        Drop the cached response of one call, leaving the rest of the endpoint cached.
+
+        :param endpoint: The endpoint of the call, e.g service-variations.
+        :param url: The base URL the call was made with.
+        :param schemas: The schemas the call was made with.
+        """
+        self.backend.delete(self.make_key(endpoint, url, *schemas))
+
+    def invalidate(self, endpoint: str = None):
+        """
+        Drop cached responses.
+
+        :param endpoint: The endpoint to drop, e.g service-variations. Everything is dropped when it is None.
+        """
+        self.backend.clear(f"{endpoint}|" if endpoint else "")
+
+
+def catalog_cache_from_env():
+    """
+    Build the catalog cache configured through environment variables.
+
+    CATALOG_CACHE=True enables an in-process cache, and CATALOG_CACHE_PATH switches it
+    to an on-disk cache stored at that path.
+
+    :return: A CatalogCache, or None when caching is disabled.
+    """
+    if os.getenv("CATALOG_CACHE") != "True":
+        return None
+    path = os.getenv("CATALOG_CACHE_PATH")
+    return CatalogCache(DiskBackend(path) if path else None)
+
+
+def get_catalog_cache():
+    """
+    Return the catalog cache shared by every client, built from the environment on first use.
+
+    :return: The shared CatalogCache, or None when caching is disabled.
+    """
+    global _catalog_cache
+    if _catalog_cache is MISS:
+        with _catalog_cache_lock:
+            if _catalog_cache is MISS:
+                _catalog_cache = catalog_cache_from_env()
+    return _catalog_cache
+
+
+class VerificationCache(object):
+    """
+    A cache of successful merchant verifications, e.g the customer name, address and minimum
+    amount of a meter number, with a time to live.
+
+    Entries are keyed by serviceID, type (for meters) and billers code, so customers who pay
+    for the same meter or smart card again skip the verification round trip.
+
+    Attributes:
+        backend (CacheBackend): Where the entries are stored, in-process by default.
+        ttl (float): The time to live of an entry in seconds.
+    """
+
+    def __init__(
+        self, backend: CacheBackend = None, ttl: float = DEFAULT_VERIFICATION_TTL
+    ):
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.ttl = ttl
+
+    def make_key(self, service_id: str, billers_code: str, type: str = None) -> str:
+        return f"merchant-verify|{service_id}|{billers_code}|{type or ''}"
+
+    def get(self, service_id: str, billers_code: str, type: str = None):
+        return self.backend.get(self.make_key(service_id, billers_code, type))
+
+    def set(self, service_id: str, billers_code: str, value, type: str = None):
+        self.backend.set(self.make_key(service_id, billers_code, type), value, self.ttl)
+
+    def invalidate(self, service_id: str = None, billers_code: str = None):
+        """
+        Drop cached verifications.
+
+        :param service_id: The serviceID to drop, everything is dropped when it is None.
+        :param billers_code: The billers code to drop, every billers code of the serviceID is
+            dropped when it is None.
+        :raises ValueError: If billers_code is given without service_id.
+        """
+        if service_id is None and billers_code is not None:
+            raise ValueError("billers_code needs the service_id it belongs to")
+        prefix = "merchant-verify|"
+        if service_id is not None:
+            prefix += f"{service_id}|"
+            if billers_code is not None:
+                prefix += f"{billers_code}|"
+        self.backend.clear(prefix)
+
+    async def ainvalidate(self, service_id: str = None, billers_code: str = None):
+        """
+        The coroutine counterpart of `invalidate`, run in the default executor when the backend is blocking.
+        """
+        await _arun(self.backend, self.invalidate, service_id, billers_code)
+
+
+def verification_cache_from_env():
+    """
+    Build the verification cache configured through environment variables.
+
+    VERIFICATION_CACHE=True enables an in-process cache, VERIFICATION_CACHE_TTL sets the time
+    to live in seconds and VERIFICATION_CACHE_PATH switches it to an on-disk cache stored at
+    that path.
+
+    :return: A VerificationCache, or None when caching is disabled.
+    """
+    if os.getenv("VERIFICATION_CACHE") != "True":
+        return None
+    path = os.getenv("VERIFICATION_CACHE_PATH")
+    ttl = float(os.getenv("VERIFICATION_CACHE_TTL", DEFAULT_VERIFICATION_TTL))
+    return VerificationCache(DiskBackend(path) if path else None, ttl)
+
+
+def get_verification_cache():
+    """
+    Return the verification cache shared by every client, built from the environment on first use.
+
+    :return: The shared VerificationCache, or None when caching is disabled.
+    """
+    global _verification_cache
+    if _verification_cache is MISS:
+        with _verification_cache_lock:
+            if _verification_cache is MISS:
+                _verification_cache = verification_cache_from_env()
+    return _verification_cache
+
+
+async def _arun(backend: CacheBackend, func, *args):
+    # keep blocking backends, e.g DiskBackend, off the event loop
+    if not backend.blocking:
+        return func(*args)
+    return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+
+def _is_cacheable(value) -> bool:
+    if value is None or isinstance(value, str):
+        return False
+    return not (isinstance(value, dict) and "errors" in value)
+
+
+def cached(endpoint: str):
+    """
+    Cache the result of a catalog method in the client's `cache`, if it has one.
+
+    The decorated method must take the base URL followed by its schemas. It works for
+    both regular methods and coroutines, which use a blocking backend in a thread.
+
+    :param endpoint: The catalog endpoint the method calls, used to pick the time to live.
+    """
+
+    def decorator(method):
+        if inspect.iscoroutinefunction(method):
+
+            @functools.wraps(method)
+            async def async_wrapper(self, url, *schemas, **kwargs):
+                cache = self.cache
+                if cache is None:
+                    return await method(self, url, *schemas, **kwargs)
+                key = cache.make_key(endpoint, url, *schemas, *kwargs.values())
+                value = await _arun(cache.backend, cache.get, key)
+                if value is MISS:
+                    value = await method(self, url, *schemas, **kwargs)
+                    if _is_cacheable(value):
+                        await _arun(cache.backend, cache.set, endpoint, key, value)
+                return value
+
+            return async_wrapper
+
+        @functools.wraps(method)
+        def wrapper(self, url, *schemas, **kwargs):
+            cache = self.cache
+            if cache is None:
+                return method(self, url, *schemas, **kwargs)
+            key = cache.make_key(endpoint, url, *schemas, *kwargs.values())
+            value = cache.get(key)
+            if value is MISS:
+                value = method(self, url, *schemas, **kwargs)
+                if _is_cacheable(value):
+                    cache.set(endpoint, key, value)
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+def _is_verified(value) -> bool:
+    # merchant-verify answers code 000 with an "error" in the content for unknown billers codes
+    if not isinstance(value, dict):
+        return False
+    if "code" in value:
+        if value["code"] != "000":
+            return False
+        value = value.get("content")
+        if not isinstance(value, dict):
+            return False
+    return "error" not in value and not value.get("WrongBillersCode")
+
+
+def verified(method):
+    """
+    Cache the successful results of a merchant verification method in the client's
+    `verification_cache`, if it has one.
+
+    The decorated method must take the base URL followed by a schema with service_id and
+    billers_code fields, and optionally a type field. It works for both regular methods
+    and coroutines, which use a blocking backend in a thread.
+    """
+    if inspect.iscoroutinefunction(method):
+
+        @functools.wraps(method)
+        async def async_wrapper(self, url, schema):
+            cache = self.verification_cache
+            if cache is None:
+                return await method(self, url, schema)
+            type = getattr(schema, "type", None)
+            value = await _arun(
+                cache.backend, cache.get, schema.service_id, schema.billers_code, type
+            )
+            if value is MISS:
+                value = await method(self, url, schema)
+                if _is_verified(value):
+                    await _arun(
+                        cache.backend,
+                        cache.set,
+                        schema.service_id,
+                        schema.billers_code,
+                        value,
+                        type,
+                    )
+            return value
+
+        return async_wrapper
+
+    @functools.wraps(method)
+    def wrapper(self, url, schema):
+        cache = self.verification_cache
+        if cache is None:
+            return method(self, url, schema)
+        type = getattr(schema, "type", None)
+        value = cache.get(schema.service_id, schema.billers_code, type)
+        if value is MISS:
+            value = method(self, url, schema)
+            if _is_verified(value):
+                cache.set(schema.service_id, schema.billers_code, value, type)
+        return value
+
+    return wrapper
@@ -0,0 +1,498 @@
+import asyncio
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from datetime import timedelta
+from http.client import responses as reasons
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+RECORD = "record"
+REPLAY = "replay"
+CASSETTE_MODES = (RECORD, REPLAY)
+
+# The network errors a cassette keeps, and the exception each one is replayed as
+REQUESTS_ERRORS = {
+    "connect_timeout": requests.exceptions.ConnectTimeout,
+    "connect_error": requests.exceptions.ConnectionError,
+    "read_timeout": requests.exceptions.ReadTimeout,
+    "transport_error": requests.exceptions.ConnectionError,
+}
+# The httpx exception names of the network errors, httpx is only imported by the async transport
+HTTPX_ERRORS = {
+    "connect_timeout": "ConnectTimeout",
+    "connect_error": "ConnectError",
+    "read_timeout": "ReadTimeout",
+    "transport_error": "ReadError",
+}
+
+_cassette = None
+_cassette_lock = threading.Lock()
+
+
+class CassetteMiss(Exception):
+    """
+    Raised when a replayed request has no recorded interaction left in the cassette.
+    """
+
+    def __init__(self, method: str, url: str):
+        self.method = method
+        self.url = url
+        super().__init__(f"No recorded interaction for {method} {url}")
+
+
+def _requests_error_kind(error: Exception) -> str:
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return "connect_timeout"
+    if isinstance(error, requests.exceptions.Timeout):
+        return "read_timeout"
+    return "transport_error"
+
+
+def _httpx_error_kind(error: Exception) -> str:
+    import httpx
+
+    if isinstance(error, (httpx.ConnectTimeout, httpx.PoolTimeout)):
+        return "connect_timeout"
+    if isinstance(error, httpx.ConnectError):
+        return "connect_error"
+    if isinstance(error, httpx.TimeoutException):
+        return "read_timeout"
+    return "transport_error"
+
+
+def _match_key(method: str, url: str, body) -> tuple:
+    # Requests match on their method, path, query and body, whatever the host. The request_id
+    # is left out, since it is generated anew on every run.
+    parts = urlsplit(url)
+    path = f"{parts.path}?{parts.query}" if parts.query else parts.path
+    request_id = None
+    if body:
+        if isinstance(body, bytes):
+            body = body.decode()
+        try:
+            data = json.loads(body)
+        except ValueError:
+            data = None
+        if isinstance(data, dict):
+            request_id = data.pop("request_id", None)
+            body = json.dumps(data, sort_keys=True, separators=(",", ":"))
+    return (method, path, body or None), request_id
+
+
+class Cassette(object):
+    """
+    A file of recorded request/response pairs, to replay VtPass traffic without the network.
+
+    In record mode every request goes to the API and its response, or the network error it
+    raised, is appended to the file as it arrives. In replay mode requests never leave the
+    process: each one gets the next recorded response for the same method, path, query and
+    body, at full speed, or after the recorded latency when `realtime` is set.
+
+    A cassette plugs in below the SDK, as a requests adapter (`mount`) or an httpx transport
+    (`async_transport`), so retries, hooks and every client and product class behave exactly
+    as they do against the API. The request_id of payments is ignored when matching, each new
+    request_id is paired with a recorded one so its requeries replay the right transaction, and
+    the recorded one is replaced by the new one in replayed responses.
+
+    The file holds one JSON interaction per line, gzip compressed when the path ends with .gz.
+
+    Attributes:
+        path (str): The path of the cassette file.
+        mode (str): record or replay.
+        realtime (bool): Replay each response after its recorded latency.
+        repeat (bool): Once every recording of a request was replayed, start over from the
+            first one instead of raising CassetteMiss.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        mode: str = REPLAY,
+        realtime: bool = False,
+        repeat: bool = True,
+    ):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(
+                f"Unknown cassette mode {mode!r}, expected one of {CASSETTE_MODES}"
+            )
+        self.path = path
+        self.mode = mode
+        self.realtime = realtime
+        self.repeat = repeat
+        self._lock = threading.Lock()
+        # match key: [interactions, index of the next one to replay, recorded request_id: interactions]
+        self._interactions = {}
+        # live request_id: the recorded request_id it replays
+        self._recorded_ids = {}
+        # the recorded request_ids already paired with a live one
+        self._paired = set()
+        # (match key, recorded request_id): index of the next interaction of the id to replay
+        self._cursors = {}
+        self._file = None
+        if mode == RECORD:
+            self._file = self._open("wt")
+        else:
+            self._load()
+
+    def _open(self, mode: str):
+        if self.path.endswith(".gz"):
+            return gzip.open(self.path, mode, encoding="utf-8")
+        return open(self.path, mode, encoding="utf-8")
+
+    def _load(self):
+        count = 0
+        with self._open("rt") as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                interaction = json.loads(line)
+                key = (
+                    interaction["method"],
+                    interaction["url"],
+                    interaction["request"],
+                )
+                entry = self._interactions.setdefault(key, [[], 0, {}])
+                entry[0].append(interaction)
+                if interaction["request_id"]:
+                    entry[2].setdefault(interaction["request_id"], []).append(
+                        interaction
+                    )
+                count += 1
+        logger.info("Loaded %s interactions from the cassette %s", count, self.path)
+
+    def __len__(self):
+        return sum(len(entry[0]) for entry in self._interactions.values())
+
+    def record(
+        self,
+        method: str,
+        url: str,
+        body,
+        elapsed: float,
+        status: int = None,
+        content_type: str = None,
+        content: bytes = None,
+        error: str = None,
+    ):
+        """
+        Append an interaction to the cassette.
+
+        :param method: The HTTP method of the request.
+        :param url: The full URL of the request.
+        :param body: The body of the request, None for GET requests.
+        :param elapsed: The seconds between sending the request and receiving the response.
+        :param status: The HTTP status of the response, None when the request failed.
+        :param content_type: The Content-Type of the response.
+        :param content: The body of the response.
+        :param error: The network error the request failed with, one of REQUESTS_ERRORS.
+        """
+        (method, path, request), request_id = _match_key(method, url, body)
+        line = json.dumps(
+            {
+                "method": method,
+                "url": path,
+                "request": request,
+                "request_id": request_id,
+                "status": status,
+                "content_type": content_type,
+                "body": (
+                    content.decode("utf-8", "replace") if content is not None else None
+                ),
+                "elapsed": round(elapsed, 4),
+                "error": error,
+            },
+            separators=(",", ":"),
+        )
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def play(self, method: str, url: str, body) -> dict:
+        """
+        Return the next recorded interaction for a request.
+
+        The first request carrying a new request_id, a payment usually, gets the next recorded
+        interaction, and its request_id is paired with the recorded one. Later requests carrying
+        it, its retries and requeries, get the interactions recorded for the paired request_id,
+        whatever order they come in.
+
+        :param method: The HTTP method of the request.
+        :param url: The full URL of the request.
+        :param body: The body of the request, None for GET requests.
+        :return: The interaction, with the request_id of the request in its body.
+        :raises CassetteMiss: If the cassette has no interaction left for the request.
+        """
+        key, request_id = _match_key(method, url, body)
+        with self._lock:
+            entry = self._interactions.get(key)
+            if entry is None:
+                raise CassetteMiss(method, url)
+            recorded_id = self._recorded_ids.get(request_id)
+            if recorded_id is not None:
+                interaction = self._next_of(key, entry, recorded_id)
+                if interaction is None:
+                    raise CassetteMiss(method, url)
+            else:
+                interaction = self._next(entry)
+                if interaction is None:
+                    raise CassetteMiss(method, url)
+                recorded_id = interaction["request_id"]
+                if recorded_id and request_id:
+                    self._recorded_ids[request_id] = recorded_id
+                    self._paired.add(recorded_id)
+                    self._cursors[key, recorded_id] = (
+                        entry[2][recorded_id].index(interaction) + 1
+                    )
+        if recorded_id and request_id and recorded_id != request_id:
+            interaction = dict(
+                interaction,
+                body=interaction["body"].replace(recorded_id, request_id),
+            )
+        return interaction
+
+    def _next(self, entry: list):
+        # the next interaction whose request_id is not paired yet
+        interactions, index = entry[0], entry[1]
+        while (
+            index < len(interactions)
+            and interactions[index]["request_id"] in self._paired
+        ):
+            index += 1
+        if index >= len(interactions) and not self.repeat:
+            return None
+        entry[1] = index + 1
+        return interactions[index % len(interactions)]
+
+    def _next_of(self, key: tuple, entry: list, recorded_id: str):
+        interactions = entry[2].get(recorded_id)
+        if not interactions:
+            return None
+        index = self._cursors.get((key, recorded_id), 0)
+        if index >= len(interactions) and not self.repeat:
+            return None
+        self._cursors[key, recorded_id] = index + 1
+        return interactions[index % len(interactions)]
+
+    def mount(self, session: requests.Session) -> requests.Session:
+        """
+        Route the requests of a session through the cassette.
+
+        :param session: A requests.Session, e.g from `vtpass.session.build_session`.
+        :return: The session.
+        """
+        for prefix in ("https://", "http://"):
+            adapter = session.adapters.get(prefix)
+            if not isinstance(adapter, CassetteAdapter):
+                session.mount(prefix, CassetteAdapter(self, adapter))
+        return session
+
+    def async_transport(self, transport=None):
+        """
+        Build an httpx transport routed through the cassette, for `httpx.AsyncClient(transport=...)`.
+
+        :param transport: The httpx transport used to record, a default one when None.
+        :return: An AsyncCassetteTransport.
+        """
+        return AsyncCassetteTransport(self, transport)
+
+    def close(self):
+        """
+        Close the cassette file, when recording.
+        """
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __repr__(self):
+        return f"Cassette({self.path!r}, mode={self.mode!r})"
+
+
+class CassetteAdapter(BaseAdapter):
+    """
+    A requests transport adapter recording to, or replaying from, a Cassette.
+    """
+
+    def __init__(self, cassette: Cassette, adapter: BaseAdapter = None):
+        super().__init__()
+        self.cassette = cassette
+        self.adapter = adapter if adapter is not None else HTTPAdapter()
+
+    def send(self, request, **kwargs):
+        cassette = self.cassette
+        if cassette.mode == REPLAY:
+            interaction = cassette.play(request.method, request.url, request.body)
+            if cassette.realtime:
+                time.sleep(interaction["elapsed"])
+            if interaction["error"]:
+                raise REQUESTS_ERRORS[interaction["error"]](
+                    f"Replayed {interaction['error']}", request=request
+                )
+            return self._build_response(request, interaction)
+
+        start = time.perf_counter()
+        try:
+            response = self.adapter.send(request, **kwargs)
+        except requests.exceptions.RequestException as err:
+            cassette.record(
+                request.method,
+                request.url,
+                request.body,
+                time.perf_counter() - start,
+                error=_requests_error_kind(err),
+            )
+            raise
+        cassette.record(
+            request.method,
+            request.url,
+            request.body,
+            time.perf_counter() - start,
+            status=response.status_code,
+            content_type=response.headers.get("Content-Type"),
+            content=response.content,
+        )
+        return response
+
+    def _build_response(self, request, interaction: dict):
+        response = requests.Response()
+        response.status_code = interaction["status"]
+        response.reason = reasons.get(interaction["status"], "")
+        response.headers = CaseInsensitiveDict(
+            {"Content-Type": interaction["content_type"] or "application/json"}
+        )
+        response._content = (interaction["body"] or "").encode()
+        # the body is already read, so iter_content yields it instead of reading the raw stream
+        response._content_consumed = True
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        response.elapsed = timedelta(seconds=interaction["elapsed"])
+        return response
+
+    def close(self):
+        self.adapter.close()
+
+
+class AsyncCassetteTransport(object):
+    """
+    An httpx transport recording to, or replaying from, a Cassette.
+
+    It implements the interface of httpx.AsyncBaseTransport without subclassing it, so
+    that importing the cassette does not import httpx.
+    """
+
+    def __init__(self, cassette: Cassette, transport=None):
+        try:
+            import httpx
+        except ImportError:
+            raise ImportError(
+                "The async client requires httpx, install it with `pip install vtpass-python-sdk[async]`"
+            ) from None
+        self._httpx = httpx
+        self.cassette = cassette
+        self.transport = (
+            transport if transport is not None else httpx.AsyncHTTPTransport()
+        )
+
+    async def handle_async_request(self, request):
+        httpx = self._httpx
+        cassette = self.cassette
+        body = request.read()
+        url = str(request.url)
+        if cassette.mode == REPLAY:
+            interaction = cassette.play(request.method, url, body)
+            if cassette.realtime:
+                await asyncio.sleep(interaction["elapsed"])
+            if interaction["error"]:
+                error = getattr(httpx, HTTPX_ERRORS[interaction["error"]])
+                raise error(f"Replayed {interaction['error']}", request=request)
+            return httpx.Response(
+                interaction["status"],
+                headers={
+                    "Content-Type": interaction["content_type"] or "application/json"
+                },
+                content=(interaction["body"] or "").encode(),
+                request=request,
+            )
+
+        start = time.perf_counter()
+        try:
+            response = await self.transport.handle_async_request(request)
+            content = await response.aread()
+        except httpx.TransportError as err:
+            cassette.record(
+                request.method,
+                url,
+                body,
+                time.perf_counter() - start,
+                error=_httpx_error_kind(err),
+            )
+            raise
+        cassette.record(
+            request.method,
+            url,
+            body,
+            time.perf_counter() - start,
+            status=response.status_code,
+            content_type=response.headers.get("Content-Type"),
+            content=content,
+        )
+        return response
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+    async def __aenter__(self):
+        await self.transport.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.transport.__aexit__(*exc_info)
+
+
+def cassette_from_env():
+    """
+    Build the cassette configured through environment variables.
+
+    CASSETTE_PATH enables the cassette, CASSETTE_MODE is record or replay (the default) and
+    CASSETTE_REALTIME=True replays responses after their recorded latency.
+
+    :return: A Cassette, or None when no cassette is configured.
+    """
+    path = os.getenv("CASSETTE_PATH")
+    if not path:
+        return None
+    return Cassette(
+        path,
+        mode=os.getenv("CASSETTE_MODE", REPLAY),
+        realtime=os.getenv("CASSETTE_REALTIME") == "True",
+    )
+
+
+def get_cassette():
+    """
+    Return the cassette the shared session and async client go through, built from the environment on first use.
+
+    :return: The shared Cassette, or None when no cassette is configured.
+    """
+    global _cassette
+    if _cassette is None:
+        with _cassette_lock:
+            if _cassette is None:
+                _cassette = cassette_from_env() or False
+    return _cassette or None
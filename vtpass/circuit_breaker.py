@@ -0,0 +1,338 @@
+import logging
+import sys
+import threading
+import time
+from collections import deque
+
+import requests
+
+from vtpass.transport import Hooks, VtPassRequest, default_hooks
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+# The value of each state in the Prometheus output
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+_circuit_breaker = None
+_circuit_breaker_lock = threading.Lock()
+
+
+def is_transport_error(error: Exception) -> bool:
+    """
+    :return: Whether the error is a network error or a timeout of requests or httpx.
+    """
+    if isinstance(
+        error,
+        (
+            requests.exceptions.ConnectionError,
+            requests.exceptions.Timeout,
+            requests.exceptions.ChunkedEncodingError,
+        ),
+    ):
+        return True
+    # httpx is only imported by the async transport, none of its errors exist without it
+    httpx = sys.modules.get("httpx")
+    return httpx is not None and isinstance(error, httpx.TransportError)
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of sending a request to a serviceID whose circuit is open.
+    """
+
+    def __init__(self, service_id: str, retry_in: float):
+        self.service_id = service_id
+        self.retry_in = retry_in
+        super().__init__(
+            f"Circuit open for {service_id}, the service is failing. Retry in {retry_in:.0f}s"
+        )
+
+
+class _Circuit(object):
+    def __init__(self, window_size: int):
+        self.state = CLOSED
+        # (failed, slow) outcome of the latest calls
+        self.outcomes = deque(maxlen=window_size)
+        self.failures = 0
+        self.slow_calls = 0
+        self.opened_at = None
+        self.probes = 0
+
+    def add(self, failed: bool, slow: bool):
+        outcomes = self.outcomes
+        if len(outcomes) == outcomes.maxlen:
+            old_failed, old_slow = outcomes[0]
+            self.failures -= old_failed
+            self.slow_calls -= old_slow
+        outcomes.append((failed, slow))
+        self.failures += failed
+        self.slow_calls += slow
+
+    def reset(self, state: str, now: float = None):
+        self.state = state
+        self.outcomes.clear()
+        self.failures = 0
+        self.slow_calls = 0
+        self.opened_at = now
+        self.probes = 0
+
+
+class CircuitBreaker(object):
+    """
+    Stop calling a serviceID that keeps failing, e.g a biller that is down.
+
+    Every serviceID has its own circuit. A closed circuit lets calls through and watches the
+    outcome of the latest window_size calls. Once at least min_calls were seen, the circuit
+    opens when the share of failed calls reaches failure_rate, or the share of calls slower
+    than slow_call_duration reaches slow_call_rate. Calls to an open circuit fail at once with
+    CircuitOpenError. After open_duration seconds the circuit is half-open: up to
+    half_open_probes calls go through, and the circuit closes if they all succeed and opens
+    again otherwise.
+
+    Failures are connection errors, timeouts and HTTP 5xx responses. VtPass responses with a
+    non "000" code are answers from a working service and do not count.
+
+    Attributes:
+        endpoints (tuple): The endpoints guarded by the breaker, pay and merchant-verify by default.
+        window_size (int): The number of latest calls considered.
+        min_calls (int): The number of calls needed before the circuit may open.
+        failure_rate (float): The share of failed calls opening the circuit.
+        slow_call_duration (float): The number of seconds after which a call is slow.
+        slow_call_rate (float): The share of slow calls opening the circuit.
+        open_duration (float): The number of seconds a circuit stays open before probing.
+        half_open_probes (int): The number of calls let through by a half-open circuit.
+    """
+
+    def __init__(
+        self,
+        endpoints: tuple = ("pay", "merchant-verify"),
+        window_size: int = 20,
+        min_calls: int = 10,
+        failure_rate: float = 0.5,
+        slow_call_duration: float = 10.0,
+        slow_call_rate: float = 0.8,
+        open_duration: float = 30.0,
+        half_open_probes: int = 1,
+    ):
+        self.endpoints = tuple(endpoints)
+        self.window_size = window_size
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_duration = slow_call_duration
+        self.slow_call_rate = slow_call_rate
+        self.open_duration = open_duration
+        self.half_open_probes = half_open_probes
+        self._circuits = {}
+        self._lock = threading.Lock()
+
+    def install(self, hooks: Hooks = default_hooks):
+        """
+        Guard the requests going through the given hooks.
+        """
+        hooks.register("before_send", self._before_send)
+        hooks.register("after_receive", self._after_receive)
+        hooks.register("on_error", self._on_error)
+
+    def uninstall(self, hooks: Hooks = default_hooks):
+        """
+        Stop guarding the requests going through the given hooks.
+        """
+        hooks.unregister("before_send", self._before_send)
+        hooks.unregister("after_receive", self._after_receive)
+        hooks.unregister("on_error", self._on_error)
+
+    def _guards(self, request: VtPassRequest) -> bool:
+        return request.service_id is not None and request.endpoint in self.endpoints
+
+    def _before_send(self, request: VtPassRequest):
+        if not self._guards(request):
+            return None
+        service_id = request.service_id
+        now = time.monotonic()
+        with self._lock:
+            circuit = self._circuits.get(service_id)
+            if circuit is None:
+                circuit = self._circuits[service_id] = _Circuit(self.window_size)
+            if circuit.state == OPEN:
+                retry_in = circuit.opened_at + self.open_duration - now
+                if retry_in > 0:
+                    raise CircuitOpenError(service_id, retry_in)
+                circuit.reset(HALF_OPEN, now)
+                logger.info("Circuit for %s is half-open, probing", service_id)
+            if circuit.state == HALF_OPEN:
+                if circuit.probes >= self.half_open_probes:
+                    if now - circuit.opened_at < self.open_duration:
+                        raise CircuitOpenError(service_id, 0)
+                    # the probes never reported back, let new ones through
+                    circuit.reset(HALF_OPEN, now)
+                circuit.probes += 1
+        request.context["circuit_started_at"] = now
+        return None
+
+    def _after_receive(self, request: VtPassRequest, response, result):
+        if self._guards(request):
+            self._record(request, False)
+
+    def _on_error(self, request: VtPassRequest, error: Exception):
+        if not self._guards(request) or isinstance(error, CircuitOpenError):
+            return
+        response = getattr(error, "response", None)
+        if response is not None:
+            # a 4xx is an answer about the request itself, not a sign the service is down
+            failed = response.status_code >= 500
+        elif is_transport_error(error):
+            failed = True
+        else:
+            # e.g a failing hook, the journal or the rate limiter, nothing to do with the service
+            return
+        self._record(request, failed)
+
+    def _record(self, request: VtPassRequest, failed: bool):
+        started_at = request.context.get("circuit_started_at")
+        if started_at is None:
+            return
+        now = time.monotonic()
+        slow = now - started_at >= self.slow_call_duration
+        service_id = request.service_id
+        with self._lock:
+            circuit = self._circuits.get(service_id)
+            if circuit is None:
+                # reset while the call was in flight
+                return
+            if circuit.state == HALF_OPEN:
+                if failed or slow:
+                    circuit.reset(OPEN, now)
+                    logger.warning("Circuit for %s opened again", service_id)
+                else:
+                    circuit.add(False, False)
+                    if len(circuit.outcomes) >= self.half_open_probes:
+                        circuit.reset(CLOSED)
+                        logger.info("Circuit for %s closed", service_id)
+                return
+            if circuit.state == OPEN:
+                return
+            circuit.add(failed, slow)
+            calls = len(circuit.outcomes)
+            if calls >= self.min_calls and (
+                circuit.failures >= self.failure_rate * calls
+                or circuit.slow_calls >= self.slow_call_rate * calls
+            ):
+                logger.warning(
+                    "Circuit for %s opened: %s failed and %s slow calls out of %s",
+                    service_id,
+                    circuit.failures,
+                    circuit.slow_calls,
+                    calls,
+                )
+                circuit.reset(OPEN, now)
+
+    def state(self, service_id: str) -> str:
+        """
+        :param service_id: The serviceID, e.g ikeja-electric.
+        :return: The state of its circuit: closed, open or half-open.
+        """
+        with self._lock:
+            circuit = self._circuits.get(service_id)
+            if circuit is None:
+                return CLOSED
+            if (
+                circuit.state == OPEN
+                and time.monotonic() >= circuit.opened_at + self.open_duration
+            ):
+                return HALF_OPEN
+            return circuit.state
+
+    def states(self) -> dict:
+        """
+        Return the state of every circuit, e.g for a dashboard.
+
+        :return: A dictionary mapping each serviceID to its state, the number of calls in the
+            window, the failed and slow calls among them, and the number of seconds until an
+            open circuit is probed.
+        """
+        now = time.monotonic()
+        states = {}
+        with self._lock:
+            for service_id, circuit in self._circuits.items():
+                state = circuit.state
+                retry_in = None
+                if state == OPEN:
+                    retry_in = max(circuit.opened_at + self.open_duration - now, 0)
+                    if not retry_in:
+                        state = HALF_OPEN
+                states[service_id] = {
+                    "state": state,
+                    "calls": len(circuit.outcomes),
+                    "failures": circuit.failures,
+                    "slow_calls": circuit.slow_calls,
+                    "retry_in": retry_in,
+                }
+        return states
+
+    def prometheus(self) -> str:
+        """
+        Return the state of every circuit in the Prometheus text exposition format,
+        0 for closed, 1 for half-open and 2 for open.
+        """
+        lines = [
+            "# HELP vtpass_circuit_state State of the circuit of each serviceID (0 closed, 1 half-open, 2 open).",
+            "# TYPE vtpass_circuit_state gauge",
+        ]
+        for service_id, state in sorted(self.states().items()):
+            lines.append(
+                f'vtpass_circuit_state{{service_id="{service_id}"}} {STATE_VALUES[state["state"]]}'
+            )
+        return "\n".join(lines) + "\n"
+
+    def reset(self, service_id: str = None):
+        """
+        Close the circuit of a serviceID, or of every serviceID.
+        """
+        with self._lock:
+            if service_id is None:
+                self._circuits = {}
+            else:
+                self._circuits.pop(service_id, None)
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    """
+    Return the CircuitBreaker shared by the SDK, creating it on first use. It guards nothing
+    until it is enabled with `enable_circuit_breaker`.
+    """
+    global _circuit_breaker
+    if _circuit_breaker is None:
+        with _circuit_breaker_lock:
+            if _circuit_breaker is None:
+                _circuit_breaker = CircuitBreaker()
+    return _circuit_breaker
+
+
+def enable_circuit_breaker(hooks: Hooks = default_hooks, **settings) -> CircuitBreaker:
+    """
+    Guard every client using the given hooks, the shared ones by default.
+
+    :param settings: The settings of a new shared CircuitBreaker, see CircuitBreaker.
+        Without settings the current shared breaker is kept.
+    :return: The shared CircuitBreaker.
+    """
+    global _circuit_breaker
+    disable_circuit_breaker(hooks)
+    if settings:
+        with _circuit_breaker_lock:
+            _circuit_breaker = CircuitBreaker(**settings)
+    circuit_breaker = get_circuit_breaker()
+    circuit_breaker.install(hooks)
+    return circuit_breaker
+
+
+def disable_circuit_breaker(hooks: Hooks = default_hooks):
+    """
+    Stop guarding the clients using the given hooks.
+    """
+    if _circuit_breaker is not None:
+        _circuit_breaker.uninstall(hooks)
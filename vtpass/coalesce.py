@@ -0,0 +1,173 @@
+import asyncio
+import functools
+import inspect
+import os
+import threading
+
+_coalescer = None
+_coalescer_lock = threading.Lock()
+
+
+class _Call(object):
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """
+    Coalesce identical calls made while one of them is in flight.
+
+    The first caller of a key runs the call, and every caller of the same key arriving before
+    it returns waits for it and gets the same result, or the same exception, instead of making
+    the call again. Once the call returned the key is forgotten, so results are never reused
+    after the fact, which is what the caches are for.
+
+    Threads and coroutines are coalesced separately, coroutines with those of the same event loop.
+    Results are shared, not copied, so callers must not mutate them.
+
+    Attributes:
+        coalesced (int): The number of calls that waited for another one instead of running.
+    """
+
+    def __init__(self):
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._calls = {}
+        # (event loop, key): the task running the call
+        self._tasks = {}
+
+    def do(self, key, func):
+        """
+        Run func, unless a call with the same key is in flight, in which case wait for its result.
+
+        :param key: A hashable identifying the call.
+        :param func: A callable taking no argument.
+        :return: What func returned.
+        :raises: What func raised.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as err:
+            call.error = err
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def do_async(self, key, func):
+        """
+        The coroutine counterpart of `do`.
+
+        :param key: A hashable identifying the call.
+        :param func: A coroutine function taking no argument.
+        :return: What func returned.
+        :raises: What func raised.
+        """
+        loop = asyncio.get_running_loop()
+        key = (loop, key)
+        task = self._tasks.get(key)
+        if task is None:
+            task = self._tasks[key] = loop.create_task(func())
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        else:
+            self.coalesced += 1
+        # a cancelled caller leaves the call running for the others
+        return await asyncio.shield(task)
+
+    def __repr__(self):
+        return f"SingleFlight(in_flight={len(self._calls) + len(self._tasks)}, coalesced={self.coalesced})"
+
+
+def coalescer_from_env():
+    """
+    Build the coalescer configured through environment variables.
+
+    Coalescing is enabled unless COALESCE is set to False.
+
+    :return: A SingleFlight, or None when coalescing is disabled.
+    """
+    if os.getenv("COALESCE", "True") != "True":
+        return None
+    return SingleFlight()
+
+
+def get_coalescer():
+    """
+    Return the coalescer shared by every client, built from the environment on first use.
+
+    :return: The shared SingleFlight, or None when coalescing is disabled.
+    """
+    global _coalescer
+    if _coalescer is None:
+        with _coalescer_lock:
+            if _coalescer is None:
+                _coalescer = coalescer_from_env() or False
+    return _coalescer or None
+
+
+def _make_key(endpoint: str, client, url: str, schemas: tuple) -> tuple:
+    # clients with other credentials must not share results
+    return (
+        endpoint,
+        client.api_key,
+        url,
+        *(schema.model_dump_json() for schema in schemas),
+    )
+
+
+def coalesced(endpoint: str):
+    """
+    Coalesce the concurrent identical calls of a read or verification method through the
+    client's `coalescer`, if it has one.
+
+    The decorated method must take the base URL followed by its schemas. It works for both
+    regular methods and coroutines. Place it below `cached` or `verified`, so cache hits
+    return without going through the coalescer.
+
+    :param endpoint: The endpoint the method calls, part of the key of the calls.
+    """
+
+    def decorator(method):
+        if inspect.iscoroutinefunction(method):
+
+            @functools.wraps(method)
+            async def async_wrapper(self, url, *schemas, **kwargs):
+                coalescer = self.coalescer
+                if coalescer is None:
+                    return await method(self, url, *schemas, **kwargs)
+                key = _make_key(endpoint, self, url, schemas + tuple(kwargs.values()))
+                return await coalescer.do_async(
+                    key, lambda: method(self, url, *schemas, **kwargs)
+                )
+
+            return async_wrapper
+
+        @functools.wraps(method)
+        def wrapper(self, url, *schemas, **kwargs):
+            coalescer = self.coalescer
+            if coalescer is None:
+                return method(self, url, *schemas, **kwargs)
+            key = _make_key(endpoint, self, url, schemas + tuple(kwargs.values()))
+            return coalescer.do(key, lambda: method(self, url, *schemas, **kwargs))
+
+        return wrapper
+
+    return decorator
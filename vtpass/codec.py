@@ -0,0 +1,138 @@
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+# The codecs tried, in order, when JSON_CODEC is not set
+PREFERRED_CODECS = ("orjson", "msgspec", "json")
+
+_codec = None
+_codec_lock = threading.Lock()
+
+
+class JsonCodec(object):
+    """
+    Base class for the JSON codecs used to encode request bodies and decode responses.
+
+    A codec encodes straight to bytes, so request bodies are sent as they are encoded, and
+    decodes the raw response body, so every response is parsed exactly once.
+
+    Attributes:
+        name (str): The name of the codec, e.g json, orjson, msgspec.
+    """
+
+    name = None
+
+    def dumps(self, value) -> bytes:
+        """
+        :param value: The value to encode, e.g a request body.
+        :return: The JSON encoded value.
+        """
+        raise NotImplementedError
+
+    def loads(self, data: bytes):
+        """
+        :param data: A JSON document, e.g a response body.
+        :return: The decoded value.
+        """
+        raise NotImplementedError
+
+    def __repr__(self):
+        return f"{type(self).__name__}()"
+
+
+class StdlibCodec(JsonCodec):
+    """
+    The codec of the standard library json module, always available.
+    """
+
+    name = "json"
+
+    def __init__(self):
+        self._encoder = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False)
+        self._decode = json.JSONDecoder().decode
+
+    def dumps(self, value) -> bytes:
+        return self._encoder.encode(value).encode()
+
+    def loads(self, data: bytes):
+        if isinstance(data, (bytes, bytearray)):
+            data = data.decode()
+        return self._decode(data)
+
+
+class OrjsonCodec(JsonCodec):
+    """
+    The codec of orjson, `pip install vtpass-python-sdk[fast]`.
+    """
+
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+
+        self.dumps = orjson.dumps
+        self.loads = orjson.loads
+
+
+class MsgspecCodec(JsonCodec):
+    """
+    The codec of msgspec, `pip install msgspec`.
+    """
+
+    name = "msgspec"
+
+    def __init__(self):
+        import msgspec
+
+        self.dumps = msgspec.json.Encoder().encode
+        self.loads = msgspec.json.Decoder().decode
+
+
+CODECS = {
+    "json": StdlibCodec,
+    "orjson": OrjsonCodec,
+    "msgspec": MsgspecCodec,
+}
+
+
+def build_codec(name: str = None) -> JsonCodec:
+    """
+    Build a JSON codec.
+
+    :param name: The codec to build, one of json, orjson and msgspec. When it is None, the
+        JSON_CODEC environment variable is used, and when that is not set either, the first
+        installed codec of PREFERRED_CODECS.
+    :return: A JsonCodec.
+    :raises ImportError: If the requested codec is not installed.
+    """
+    if name is None:
+        name = os.getenv("JSON_CODEC")
+    if name:
+        if name not in CODECS:
+            raise ValueError(
+                f"Unknown JSON codec {name!r}, expected one of {tuple(CODECS)}"
+            )
+        return CODECS[name]()
+    for name in PREFERRED_CODECS:
+        try:
+            return CODECS[name]()
+        except ImportError:
+            continue
+
+
+def get_codec() -> JsonCodec:
+    """
+    Return the JSON codec shared by every client that was not given its own, building it on first use.
+
+    :return: The shared JsonCodec.
+    """
+    global _codec
+    if _codec is None:
+        with _codec_lock:
+            if _codec is None:
+                _codec = build_codec()
+                logger.debug("Using the %s JSON codec", _codec.name)
+    return _codec
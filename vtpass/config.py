@@ -0,0 +1,57 @@
+import os
+import threading
+
+from dotenv import load_dotenv
+
+_config = None
+_config_lock = threading.Lock()
+
+
+class Config(object):
+    """
+    Settings read from the environment, and from a .env file if there is one.
+
+    Attributes:
+        api_key (str): The API key for authentication.
+        public_key (str): The public key for authentication.
+        secret_key (str): The secret key for authentication.
+        json_response (str): The JSON_RESPONSE setting, "True" to return the full JSON responses.
+        timezone (str): The TIMEZONE used for request IDs, e.g Africa/Lagos.
+    """
+
+    def __init__(self):
+        self.api_key = os.getenv("API_KEY")
+        self.public_key = os.getenv("PUBLIC_KEY")
+        self.secret_key = os.getenv("SECRET_KEY")
+        self.json_response = os.getenv("JSON_RESPONSE")
+        self.timezone = os.getenv("TIMEZONE")
+
+
+def get_config():
+    """
+    Return the SDK settings, loading the .env file and reading the environment on first use only.
+
+    Nothing is read at import time, so importing the SDK stays cheap.
+
+    :return: The shared Config.
+    """
+    global _config
+    if _config is None:
+        with _config_lock:
+            if _config is None:
+                # Load environment variables from .env file
+                load_dotenv()
+                _config = Config()
+    return _config
+
+
+def reload_config():
+    """
+    Read the environment again, for example after changing the keys in tests.
+
+    :return: The new shared Config.
+    """
+    global _config
+    with _config_lock:
+        _config = None
+    return get_config()
@@ -0,0 +1,427 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+
+from vtpass.bulk import run_bulk
+from vtpass.requery import FINAL_STATES, NOT_FOUND, transaction_state
+from vtpass.retry import UNKNOWN_REQUEST_ID_CODE
+from vtpass.transport import Hooks, VtPassRequest, default_hooks, in_async_pipeline
+
+logger = logging.getLogger(__name__)
+
+# VtPass refused the purchase, e.g a low wallet balance or an invalid variation code
+REJECTED = "rejected"
+# VtPass never received the purchase, its requery answered with an unknown request ID
+NOT_SENT = "not_sent"
+# The states after which a journal entry needs no recovery
+RESOLVED_STATES = FINAL_STATES + (REJECTED, NOT_SENT)
+
+# Response codes meaning the purchase may exist even though this response carries no state
+_AMBIGUOUS_CODES = ("000", "099", "019", UNKNOWN_REQUEST_ID_CODE)
+
+_journal = None
+_journal_lock = threading.Lock()
+
+
+class _Write(object):
+    __slots__ = ("sql", "params", "done", "future", "error")
+
+    def __init__(self, sql: str, params: tuple, wait: bool, future=None):
+        self.sql = sql
+        self.params = params
+        self.done = threading.Event() if wait else None
+        # awaited on its event loop by `abegin` instead of blocking on done
+        self.future = future
+        self.error = None
+
+    def finish(self):
+        if self.done is not None:
+            self.done.set()
+        if self.future is not None:
+            try:
+                self.future.get_loop().call_soon_threadsafe(
+                    _settle, self.future, self.error
+                )
+            except RuntimeError:  # the event loop was closed meanwhile
+                pass
+
+
+def _settle(future: asyncio.Future, error: Exception):
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(None)
+
+
+class TransactionJournal(object):
+    """
+    A write-ahead journal of /pay requests, to know what happened to purchases after a crash.
+
+    The intent of every purchase is committed to disk before its /pay request is sent, and its
+    outcome is recorded when a response or a requery arrives. Purchases that never got a final
+    outcome, e.g because the worker crashed mid-request, are settled by `recover`.
+
+    The journal is an SQLite database in WAL mode written by a single thread with group commit:
+    the writes queued while a commit is being flushed to disk go out together in the next
+    transaction, so concurrent purchases share one fsync instead of paying for one each.
+    Purchases wait for their intent to be durable, outcomes are written in the background.
+
+    Attributes:
+        path (str): The path of the SQLite database.
+        commit_delay (float): Extra seconds the writer waits for more writes before a commit,
+            0 to commit as soon as the previous commit finished.
+        max_batch (int): The maximum number of writes committed together.
+    """
+
+    def __init__(self, path: str, commit_delay: float = 0.0, max_batch: int = 512):
+        self.path = path
+        self.commit_delay = commit_delay
+        self.max_batch = max_batch
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._pid = None
+        self._writer = None
+        self._read_lock = threading.Lock()
+        self._reader = None
+        self._connect().close()
+
+    def _connect(self):
+        connection = sqlite3.connect(
+            self.path, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        # in WAL mode FULL syncs every commit, so an acknowledged intent survives a power loss
+        connection.execute("PRAGMA synchronous=FULL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS journal ("
+            "request_id TEXT PRIMARY KEY, service_id TEXT, data TEXT, status TEXT, "
+            "result TEXT, created_at REAL, updated_at REAL)"
+        )
+        connection.execute(
+            "CREATE INDEX IF NOT EXISTS journal_status ON journal (status)"
+        )
+        return connection
+
+    def _start_writer(self):
+        # a forked process inherits neither the writer thread nor the queue of its parent
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._queue = deque()
+            self._reader = None
+            self._writer = threading.Thread(
+                target=self._write_loop, name="vtpass-journal", daemon=True
+            )
+            self._writer.start()
+
+    def _write_loop(self):
+        connection = self._connect()
+        queue = self._queue
+        condition = self._condition
+        try:
+            while True:
+                with condition:
+                    while not queue and not self._closed:
+                        condition.wait()
+                    if not queue:
+                        return
+                if self.commit_delay:
+                    time.sleep(self.commit_delay)
+                with condition:
+                    batch = [
+                        queue.popleft() for _ in range(min(len(queue), self.max_batch))
+                    ]
+                try:
+                    connection.execute("BEGIN IMMEDIATE")
+                    for write in batch:
+                        if write.sql is not None:
+                            connection.execute(write.sql, write.params)
+                    connection.execute("COMMIT")
+                except Exception as err:
+                    logger.error(
+                        "Journal commit of %s writes failed: %s", len(batch), err
+                    )
+                    if connection.in_transaction:
+                        connection.execute("ROLLBACK")
+                    for write in batch:
+                        write.error = err
+                for write in batch:
+                    write.finish()
+        finally:
+            connection.close()
+
+    def _submit(self, sql, params: tuple = (), wait: bool = False, future=None):
+        write = _Write(sql, params, wait, future)
+        with self._condition:
+            if self._closed:
+                raise RuntimeError(f"The journal {self.path} is closed")
+            self._start_writer()
+            self._queue.append(write)
+            self._condition.notify()
+        if wait:
+            write.done.wait()
+            if write.error is not None:
+                raise write.error
+
+    def begin(self, request_id: str, service_id: str = None, data: dict = None):
+        """
+        Record the intent of a purchase, returning once it is on disk.
+
+        :param request_id: The request ID of the purchase.
+        :param service_id: The serviceID of the purchase.
+        :param data: The body of the /pay request.
+        :raises sqlite3.Error: If the intent could not be written, the purchase must not be sent.
+        """
+        now = time.time()
+        self._submit(
+            "INSERT OR IGNORE INTO journal VALUES (?, ?, ?, NULL, NULL, ?, ?)",
+            (request_id, service_id, json.dumps(data), now, now),
+            wait=True,
+        )
+
+    async def abegin(self, request_id: str, service_id: str = None, data: dict = None):
+        """
+        The coroutine counterpart of `begin`, it waits for the intent without blocking the event loop.
+        """
+        now = time.time()
+        future = asyncio.get_running_loop().create_future()
+        self._submit(
+            "INSERT OR IGNORE INTO journal VALUES (?, ?, ?, NULL, NULL, ?, ?)",
+            (request_id, service_id, json.dumps(data), now, now),
+            future=future,
+        )
+        await future
+
+    def resolve(self, request_id: str, status: str, result=None):
+        """
+        Record the outcome of a purchase, in the background.
+
+        :param request_id: The request ID of the purchase.
+        :param status: The transaction status, e.g delivered, pending, failed, rejected.
+        :param result: The response the status was read from.
+        """
+        self._submit(
+            "UPDATE journal SET status = ?, result = ?, updated_at = ? "
+            "WHERE request_id = ?",
+            (status, json.dumps(result, default=str), time.time(), request_id),
+        )
+
+    def flush(self):
+        """
+        Wait until every write queued so far is on disk.
+        """
+        self._submit(None, wait=True)
+
+    def _read(self, sql: str, params: tuple = ()) -> list:
+        with self._read_lock:
+            if self._reader is None:
+                self._reader = self._connect()
+            return self._reader.execute(sql, params).fetchall()
+
+    def get(self, request_id: str):
+        """
+        :return: A dictionary with the service_id, data, status, result, created_at and
+            updated_at of a purchase, or None if it is not in the journal.
+        """
+        rows = self._read(
+            "SELECT service_id, data, status, result, created_at, updated_at "
+            "FROM journal WHERE request_id = ?",
+            (request_id,),
+        )
+        if not rows:
+            return None
+        service_id, data, status, result, created_at, updated_at = rows[0]
+        return {
+            "service_id": service_id,
+            "data": json.loads(data),
+            "status": status,
+            "result": json.loads(result) if result is not None else None,
+            "created_at": created_at,
+            "updated_at": updated_at,
+        }
+
+    def unresolved(self, min_age: float = 0.0) -> dict:
+        """
+        :param min_age: Only return purchases whose intent is at least that many seconds old.
+        :return: A dictionary mapping the request ID of every purchase without a final outcome
+            to the time.time() its intent was recorded at.
+        """
+        placeholders = ", ".join("?" * len(RESOLVED_STATES))
+        return dict(
+            self._read(
+                "SELECT request_id, created_at FROM journal WHERE created_at <= ? AND "
+                f"(status IS NULL OR status NOT IN ({placeholders}))",
+                (time.time() - min_age, *RESOLVED_STATES),
+            )
+        )
+
+    def recover(
+        self, client, url: str, min_age: float = 0.0, concurrency: int = 10, **kwargs
+    ) -> dict:
+        """
+        Settle every purchase without a final outcome, e.g on startup after a crash.
+
+        Each one is requeried once with `get_transaction_status`. Purchases VtPass does not know
+        are marked not_sent, so they can safely be sent again, and purchases still pending are
+        requeried with `requery_transactions` until they are final or reach its max_age.
+
+        :param client: The client used to requery, e.g `vtPass`.
+        :param url: The base URL for the VtPass API.
+        :param min_age: Leave out purchases younger than that many seconds, which may still be in
+            flight in another process sharing the journal.
+        :param concurrency: The maximum number of requeries in flight.
+        :param kwargs: The keyword arguments of `requery_transactions`, e.g max_age.
+        :return: A dictionary mapping each request ID to its status, or to "timeout" when it was
+            still not final after max_age.
+        """
+        unresolved = self.unresolved(min_age)
+        if not unresolved:
+            return {}
+        logger.info("Recovering %s unresolved purchases", len(unresolved))
+        statuses = {}
+        pending = {}
+        for request_id, result in run_bulk(
+            lambda request_id: client.get_transaction_status(url, request_id),
+            unresolved,
+            concurrency=concurrency,
+        ):
+            status = transaction_state(result)
+            if status == NOT_FOUND:
+                status = NOT_SENT
+            if status in RESOLVED_STATES:
+                self.resolve(request_id, status, result)
+                statuses[request_id] = status
+            else:
+                pending[request_id] = unresolved[request_id]
+        if pending:
+            kwargs.setdefault("concurrency", concurrency)
+            for requery_result in client.requery_transactions(url, pending, **kwargs):
+                status = requery_result.status
+                if status == NOT_FOUND:
+                    status = NOT_SENT
+                if requery_result.is_final:
+                    self.resolve(
+                        requery_result.request_id, status, requery_result.result
+                    )
+                statuses[requery_result.request_id] = status
+        self.flush()
+        logger.info(
+            "Recovered %s of %s unresolved purchases",
+            sum(status != "timeout" for status in statuses.values()),
+            len(unresolved),
+        )
+        return statuses
+
+    def install(self, hooks: Hooks = default_hooks):
+        """
+        Start journaling the purchases going through the given hooks.
+        """
+        hooks.register("before_send", self._before_send)
+        hooks.register("after_receive", self._after_receive)
+
+    def uninstall(self, hooks: Hooks = default_hooks):
+        """
+        Stop journaling the purchases going through the given hooks.
+        """
+        hooks.unregister("before_send", self._before_send)
+        hooks.unregister("after_receive", self._after_receive)
+
+    def _before_send(self, request: VtPassRequest):
+        # retries reuse the request ID, the intent was committed before the first attempt
+        if request.endpoint == "pay" and request.attempt == 1 and request.data:
+            request_id = request.data.get("request_id")
+            if request_id:
+                if in_async_pipeline():
+                    return self._abefore_send(request_id, request)
+                self.begin(request_id, request.service_id, request.data)
+        return None
+
+    async def _abefore_send(self, request_id: str, request: VtPassRequest):
+        await self.abegin(request_id, request.service_id, request.data)
+        return None
+
+    def _after_receive(self, request: VtPassRequest, response, result):
+        if request.endpoint not in ("pay", "requery") or not request.data:
+            return
+        request_id = request.data.get("request_id")
+        if not request_id or not isinstance(result, dict):
+            return
+        status = transaction_state(result)
+        if status == NOT_FOUND:
+            # the retry of a /pay sends the purchase again when its requery finds nothing
+            return
+        if status is None:
+            if result.get("code") in _AMBIGUOUS_CODES:
+                return
+            if request.endpoint == "requery":
+                return
+            status = REJECTED
+        self.resolve(request_id, status, result)
+
+    def close(self):
+        """
+        Write what is queued and stop the writer.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+            writer = self._writer if self._pid == os.getpid() else None
+        if writer is not None:
+            writer.join()
+        with self._read_lock:
+            if self._reader is not None:
+                self._reader.close()
+                self._reader = None
+
+    def __repr__(self):
+        return f"TransactionJournal({self.path!r})"
+
+
+def get_journal():
+    """
+    Return the journal enabled with `enable_journal`, None when journaling is disabled.
+    """
+    return _journal
+
+
+def enable_journal(path: str = None, hooks: Hooks = default_hooks, **settings):
+    """
+    Journal the purchases of every client using the given hooks, the shared ones by default.
+
+    :param path: The path of the journal database, the JOURNAL_PATH environment variable by default.
+    :param settings: The keyword arguments of TransactionJournal, e.g commit_delay.
+    :return: The shared TransactionJournal.
+    """
+    global _journal
+    path = path or os.getenv("JOURNAL_PATH")
+    if not path:
+        raise ValueError("A journal path is required, pass one or set JOURNAL_PATH")
+    with _journal_lock:
+        if _journal is not None and _journal.path != path:
+            _journal.uninstall(hooks)
+            _journal.close()
+            _journal = None
+        if _journal is None:
+            _journal = TransactionJournal(path, **settings)
+        _journal.uninstall(hooks)
+        _journal.install(hooks)
+    return _journal
+
+
+def disable_journal(hooks: Hooks = default_hooks):
+    """
+    Stop journaling and close the journal. What was journaled stays on disk.
+    """
+    global _journal
+    with _journal_lock:
+        journal, _journal = _journal, None
+    if journal is not None:
+        journal.uninstall(hooks)
+        journal.close()
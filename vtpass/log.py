@@ -0,0 +1,130 @@
+import json
+import logging
+import os
+import random
+import time
+
+# Every SDK logger is a child of this one, e.g vtpass.main. Like any library, the SDK leaves
+# configuring handlers to the application, see `configure_logging`.
+logger = logging.getLogger("vtpass")
+logger.addHandler(logging.NullHandler())
+
+_success_sample_rate = None
+
+
+def get_success_sample_rate() -> float:
+    """
+    Return the fraction of success events that are logged, LOG_SUCCESS_SAMPLE_RATE or 1 by default.
+    """
+    global _success_sample_rate
+    if _success_sample_rate is None:
+        _success_sample_rate = float(os.getenv("LOG_SUCCESS_SAMPLE_RATE", "1"))
+    return _success_sample_rate
+
+
+def set_success_sample_rate(rate: float):
+    """
+    Log only a fraction of the success events, e.g 0.01 for one in a hundred. Error events are
+    always logged.
+
+    :param rate: The fraction of success events logged, between 0 and 1.
+    """
+    global _success_sample_rate
+    if not 0 <= rate <= 1:
+        raise ValueError("The success sample rate must be between 0 and 1")
+    _success_sample_rate = rate
+
+
+def log_response(
+    request,
+    level: int,
+    message: str,
+    code=None,
+    success: bool = False,
+    detail=None,
+):
+    """
+    Log the structured event of a response to an SDK request.
+
+    Nothing is formatted unless the vtpass logger is enabled for the level, and success events
+    are sampled, see `set_success_sample_rate`. The record carries a vtpass_event attribute with
+    the endpoint, service_id, code, latency in seconds and attempt of the request.
+
+    :param request: The VtPassRequest the response belongs to.
+    :param level: The logging level, e.g logging.INFO.
+    :param message: The message of the event.
+    :param code: The VtPass response code, if any.
+    :param success: Whether the request succeeded, success events are sampled.
+    :param detail: Appended to the message, e.g the errors of the response.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    if success:
+        rate = get_success_sample_rate()
+        if rate < 1 and random.random() >= rate:
+            return
+    latency = time.perf_counter() - request.started_at
+    if detail is not None:
+        message = f"{message}: {detail}"
+    logger.log(
+        level,
+        "%s (endpoint=%s serviceID=%s code=%s latency=%.3fs attempt=%s)",
+        message,
+        request.endpoint,
+        request.service_id,
+        code,
+        latency,
+        request.attempt,
+        extra={
+            "vtpass_event": {
+                "event": "success" if success else "error",
+                "endpoint": request.endpoint,
+                "service_id": request.service_id,
+                "code": code,
+                "latency": round(latency, 6),
+                "attempt": request.attempt,
+            }
+        },
+    )
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Format records as JSON lines, with the fields of the structured events of the SDK.
+    """
+
+    def format(self, record):
+        line = {
+            "time": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        event = getattr(record, "vtpass_event", None)
+        if event is not None:
+            line.update(event)
+        if record.exc_info:
+            line["exception"] = self.formatException(record.exc_info)
+        return json.dumps(line, default=str)
+
+
+def configure_logging(
+    level: int = logging.INFO, json_lines: bool = False, stream=None
+) -> logging.Handler:
+    """
+    Send the logs of the SDK to a stream, for scripts that do not configure logging themselves.
+
+    :param level: The minimum level logged.
+    :param json_lines: Write JSON lines, see JsonFormatter, instead of plain text.
+    :param stream: The stream written to, sys.stderr by default.
+    :return: The handler added to the vtpass logger.
+    """
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(
+        JsonFormatter()
+        if json_lines
+        else logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+    )
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    return handler
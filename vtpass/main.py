@@ -1,14 +1,36 @@
-import json
 import logging
-import os
 import sys
-import uuid
-from datetime import datetime
+import time
 
-import pytz
 import requests
-from dotenv import load_dotenv
-
+from urllib3.exceptions import NewConnectionError
+
+from vtpass.cache import (
+    CatalogCache,
+    VerificationCache,
+    cached,
+    get_catalog_cache,
+    get_verification_cache,
+)
+from vtpass.coalesce import SingleFlight, coalesced, get_coalescer
+from vtpass.codec import JsonCodec, get_codec
+from vtpass.config import get_config
+from vtpass.log import log_response
+from vtpass.request_id import get_request_id_generator
+from vtpass.requery import RequeryScheduler
+from vtpass.rate_limit import RateLimiter, get_rate_limiter
+from vtpass.retry import (
+    MAYBE_SENT,
+    NOT_SENT,
+    UNKNOWN_REQUEST_ID_CODE,
+    get_retry_policies,
+    policy_for,
+    status_outcome,
+)
+from vtpass.session import get_session
+from vtpass.streaming import STREAM_CHUNK_SIZE, items_of, iter_json_array
+from vtpass.transport import Hooks, VtPassRequest, default_hooks, shape_result
+from vtpass.variations import VariationIndex
 from vtpass.schema import (
     ProductOptionSchema,
     ServiceIdentifierSchema,
@@ -16,13 +38,14 @@ from vtpass.schema import (
     ServiceIdVariationSchema,
 )
 
-logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
 
-# Load environment variables from .env file
-load_dotenv()
 
-# json full response
-jr = os.getenv("JSON_RESPONSE")
+def __getattr__(name):
+    # json full response, read lazily so that importing the SDK does not load the .env file
+    if name == "jr":
+        return get_config().json_response
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class VtPassPythonSDK(object):
@@ -34,15 +57,19 @@ class VtPassPythonSDK(object):
     - PUBLIC_KEY
     - SECRET_KEY
 
+    The environment and the .env file are read once, when the first client is created.
+
     The SDK provides methods to interact with the VtPass API to perform the following operations:
     - Get the balance of the wallet associated with the API key
     - Get the all the available service categories
     - Get the details of a service identified by its ID
     - Get the details of a service variation identified by its ID
+    - Stream the variations of a service one at a time
     - Getting product options for products that have options on the VTpass RESTful API
-    - Generate a request ID for a transaction
+    - Generate a request ID for a transaction, or many at once for bulk runs
     - Get the service variation codes for a service variation identified by its ID
     - Get the status of a transaction identified by its request ID
+    - Requery many pending transactions until they reach a final state
     - Purchase airtime for a phone number
     - Purchase data subscription for a phone number
     - Verify smile email
@@ -58,27 +85,107 @@ class VtPassPythonSDK(object):
         api_key (str): The API key for authentication.
         public_key (str): The public key for authentication.
         secret_key (str): The secret key for authentication.
+        session (requests.Session): The pooled HTTP session used for every request.
+            Unless a session is passed in, all clients share the one from `vtpass.session`.
+        cache (CatalogCache): The cache for catalog responses, None when caching is disabled.
+            Unless a cache is passed in, all clients share the one configured by CATALOG_CACHE.
+        verification_cache (VerificationCache): The cache for successful merchant verifications,
+            None when caching is disabled. Unless a cache is passed in, all clients share the one
+            configured by VERIFICATION_CACHE.
+        hooks (Hooks): The hooks run around every request, see `vtpass.transport.Hooks`.
+            Unless hooks are passed in, all clients share `vtpass.transport.default_hooks`.
+        retry_policies (dict): The timeouts and retries of each endpoint class, see `vtpass.retry`.
+            Unless policies are passed in, all clients share the ones configured by the environment.
+        rate_limiter (RateLimiter): The limiter pacing the requests, None when rate limiting is
+            disabled. Unless a limiter is passed in, all clients share the one from `vtpass.rate_limit`.
+        variation_index (VariationIndex): The index purchases are checked against before being
+            sent, None to send them unchecked.
+        codec (JsonCodec): The codec encoding request bodies and decoding responses, see
+            `vtpass.codec`. Unless a codec is passed in, all clients share the fastest one installed.
+        coalescer (SingleFlight): Coalesces the identical catalog and verification calls made while
+            one is in flight, see `vtpass.coalesce`. None when coalescing is disabled. Unless a
+            coalescer is passed in, all clients share the one configured by COALESCE.
     """
 
-    def __init__(self):
-        self.api_key = os.getenv("API_KEY")
-        self.public_key = os.getenv("PUBLIC_KEY")
-        self.secret_key = os.getenv("SECRET_KEY")
+    def __init__(
+        self,
+        session: requests.Session = None,
+        cache: CatalogCache = None,
+        hooks: Hooks = None,
+        retry_policies: dict = None,
+        rate_limiter: RateLimiter = None,
+        verification_cache: VerificationCache = None,
+        variation_index: VariationIndex = None,
+        codec: JsonCodec = None,
+        coalescer: SingleFlight = None,
+    ):
+        config = get_config()
+        self.api_key = config.api_key
+        self.public_key = config.public_key
+        self.secret_key = config.secret_key
+        # json full response
+        self.jr = config.json_response
+        self._session = session
+        self.cache = cache if cache is not None else get_catalog_cache()
+        self.verification_cache = (
+            verification_cache
+            if verification_cache is not None
+            else get_verification_cache()
+        )
+        self.hooks = hooks if hooks is not None else default_hooks
+        self.retry_policies = (
+            retry_policies if retry_policies is not None else get_retry_policies()
+        )
+        self._rate_limiter = rate_limiter
+        self.variation_index = variation_index
+        self.codec = codec if codec is not None else get_codec()
+        self.coalescer = coalescer if coalescer is not None else get_coalescer()
         # Verify if the api_key, public_key and secret_key are set
         self.verify_keys_added()
 
+    @property
+    def session(self):
+        """
+        The HTTP session used for requests to the VtPass API.
+
+        Connections are kept alive and pooled, so repeated calls to the same host
+        skip the TCP and TLS handshake.
+        """
+        if self._session is not None:
+            return self._session
+        return get_session()
+
+    @property
+    def rate_limiter(self):
+        """
+        The rate limiter pacing the requests to the VtPass API, None when rate limiting is disabled.
+        """
+        if self._rate_limiter is not None:
+            return self._rate_limiter
+        return get_rate_limiter()
+
     def verify_keys_added(self):
         """
         Verify that the necessary API keys are set.
 
         This method checks if the API key, public key, and secret key are set as environment variables.
-        If any of these keys are missing, the program will print an error message and terminate.
+        If any of these keys are missing, the program will exit with an error message.
         """
         if not self.api_key or not self.public_key or not self.secret_key:
-            print(
+            sys.exit(
                 "API_KEY, PUBLIC_KEY, SECRET_KEY are required to be set in environment variables"
             )
-            sys.exit(1)
+
+    def _check_variation(self, service_id: str, variation_code: str, amount=None):
+        """
+        Check a purchase against the client's variation index, if it has one.
+
+        :return: A tuple of the amount to send and an error message, see `VariationIndex.check`.
+        """
+        variation_index = self.variation_index
+        if variation_index is None:
+            return amount, None
+        return variation_index.check(service_id, variation_code, amount)
 
     def get_request_headers(self):
         """
@@ -110,6 +217,239 @@ class VtPassPythonSDK(object):
             "Content-Type": "application/json",
         }
 
+    def _request(
+        self,
+        method: str,
+        request_url: str,
+        endpoint: str,
+        success_message: str,
+        data: dict = None,
+        service_id: str = None,
+        extract=None,
+        error_level: int = logging.INFO,
+    ):
+        """
+        Send a request to the VtPass API through the shared pipeline used by every endpoint method.
+
+        The pipeline builds the headers, runs the registered hooks, sends the request with the
+        timeouts and retries of its endpoint class (see `vtpass.retry`), parses the response
+        once and shapes it (see `vtpass.transport.shape_result`).
+
+        :param method: The HTTP method, GET or POST.
+        :param request_url: The full URL of the endpoint.
+        :param endpoint: The VtPass endpoint, e.g pay, merchant-verify, service-variations.
+        :param success_message: The message logged when the request succeeds.
+        :param data: The JSON body of a POST request.
+        :param service_id: The serviceID the request is about, if any.
+        :param extract: An optional callable turning a successful response into the returned value.
+        :param error_level: The level GET responses carrying an "errors" key are logged at.
+        :return: The response from the API. In case of an error, the error message is returned.
+        """
+        if method == "GET":
+            headers = self.get_request_headers()
+        else:
+            headers = self.post_request_headers()
+        request = VtPassRequest(
+            method, request_url, endpoint, data, service_id, headers
+        )
+        try:
+            result = self._send(request)
+            return shape_result(
+                request, result, self.jr, success_message, extract, error_level
+            )
+        except requests.exceptions.HTTPError as http_err:
+            message = f"HTTP error occurred: {http_err} - {http_err.response.text}"
+        except Exception as err:
+            message = f"An error occurred: {err}"
+        log_response(request, logging.ERROR, message)
+        return message
+
+    def _send(self, request: VtPassRequest, send_attempt=None):
+        """
+        Send a request, retrying failed attempts as allowed by the policy of its endpoint class.
+
+        Idempotent endpoints are simply retried with a jittered backoff. A /pay attempt that may
+        have reached VtPass is never sent again blindly: the transaction is requeried first and
+        the payment is only sent again, with the same request ID, if VtPass does not know it.
+
+        :param request: The request to send.
+        :param send_attempt: The method sending one attempt, `_send_attempt` by default.
+        :return: The parsed JSON response.
+        :raises: The error of the last attempt when the call failed.
+        """
+        send_attempt = send_attempt or self._send_attempt
+        policy = policy_for(self.retry_policies, request.endpoint)
+        deadline_at = time.monotonic() + policy.deadline
+        while True:
+            request.attempt += 1
+            try:
+                return send_attempt(request, policy.timeout(deadline_at))
+            except Exception as err:
+                outcome = self._error_outcome(err)
+                delay = None
+                if outcome is not None:
+                    delay = policy.retry_delay(request.attempt, deadline_at)
+                if delay is None:
+                    raise
+                logger.warning(
+                    "Attempt %s of %s failed (%s), retrying in %.2fs",
+                    request.attempt,
+                    request.endpoint,
+                    err,
+                    delay,
+                )
+                time.sleep(delay)
+                if request.endpoint == "pay" and outcome == MAYBE_SENT:
+                    result = self._requery_payment(request, err)
+                    if result is not None:
+                        return result
+
+    def _send_attempt(self, request: VtPassRequest, timeout: tuple):
+        rate_limiter = self.rate_limiter
+        if rate_limiter is not None:
+            delay = rate_limiter.reserve(request.endpoint, request.service_id)
+            if delay:
+                time.sleep(delay)
+        hooks = self.hooks
+        codec = self.codec
+        try:
+            result = hooks.run_before_send(request) if hooks.before_send else None
+            if result is None:
+                response = self.session.request(
+                    request.method,
+                    request.url,
+                    headers=request.headers,
+                    data=(
+                        codec.dumps(request.data) if request.data is not None else None
+                    ),
+                    timeout=timeout,
+                )
+                response.raise_for_status()
+                result = codec.loads(response.content)
+                if hooks.after_receive:
+                    hooks.run_after_receive(request, response, result)
+            return result
+        except Exception as err:
+            if hooks.on_error:
+                hooks.run_on_error(request, err)
+            raise
+
+    def _open_stream(self, request: VtPassRequest, timeout: tuple):
+        # like _send_attempt, but the response body is left unread for the caller to stream
+        rate_limiter = self.rate_limiter
+        if rate_limiter is not None:
+            delay = rate_limiter.reserve(request.endpoint, request.service_id)
+            if delay:
+                time.sleep(delay)
+        hooks = self.hooks
+        try:
+            result = hooks.run_before_send(request) if hooks.before_send else None
+            if result is not None:
+                return result
+            response = self.session.request(
+                request.method,
+                request.url,
+                headers=request.headers,
+                timeout=timeout,
+                stream=True,
+            )
+            try:
+                response.raise_for_status()
+            except requests.exceptions.HTTPError:
+                response.close()
+                raise
+            return response
+        except Exception as err:
+            if hooks.on_error:
+                hooks.run_on_error(request, err)
+            raise
+
+    def _stream(self, request: VtPassRequest, key: str, fields=None):
+        """
+        Send a GET request and yield the items of an array of its response as the body streams in.
+
+        Opening the stream is retried like any request, see `_send`. The after_receive hooks run
+        with a None result once the whole body was read.
+
+        :param request: The request to send.
+        :param key: The key of the array, e.g varations.
+        :param fields: The keys kept of every item, None to keep whole items.
+        :return: A generator of the items of the array.
+        :raises: The error of the last attempt when the request failed.
+        """
+        try:
+            response = self._send(request, self._open_stream)
+        except Exception as err:
+            logger.error("An error occurred: %s", err)
+            raise
+        if not isinstance(response, requests.Response):
+            # a hook answered in place of the API
+            yield from items_of(response, key, fields)
+            return
+        hooks = self.hooks
+        try:
+            with response:
+                yield from iter_json_array(
+                    response.iter_content(STREAM_CHUNK_SIZE), key, fields
+                )
+        except Exception as err:
+            if hooks.on_error:
+                hooks.run_on_error(request, err)
+            logger.error("An error occurred: %s", err)
+            raise
+        if hooks.after_receive:
+            hooks.run_after_receive(request, response, None)
+
+    def _requery_payment(self, request: VtPassRequest, error: Exception):
+        """
+        Requery a payment whose attempt may have reached VtPass.
+
+        :return: The requery response if VtPass knows the transaction, None if it does not and
+            the payment can safely be sent again.
+        :raises: The error of the payment attempt if the transaction could not be requeried.
+        """
+        request_id = request.data["request_id"]
+        requery = VtPassRequest(
+            "POST",
+            f"{request.url.rsplit('/', 1)[0]}/requery",
+            "requery",
+            {"request_id": request_id},
+            request.service_id,
+            self.post_request_headers(),
+        )
+        try:
+            result = self._send(requery)
+        except Exception as requery_err:
+            logger.error(
+                "Could not requery payment %s (%s), not sending it again",
+                request_id,
+                requery_err,
+            )
+            raise error
+        if result.get("code") == UNKNOWN_REQUEST_ID_CODE:
+            logger.info("Payment %s did not reach VtPass, sending it again", request_id)
+            return None
+        logger.info("Payment %s reached VtPass, returning its requery", request_id)
+        return result
+
+    def _error_outcome(self, error: Exception):
+        if isinstance(error, requests.exceptions.ConnectTimeout):
+            return NOT_SENT
+        if isinstance(error, requests.exceptions.ConnectionError) and isinstance(
+            getattr(error.args[0] if error.args else None, "reason", None),
+            NewConnectionError,
+        ):
+            # the connection was refused or could not be opened, like httpx.ConnectError
+            return NOT_SENT
+        if isinstance(error, requests.exceptions.HTTPError):
+            return status_outcome(error.response.status_code)
+        if isinstance(
+            error,
+            (requests.exceptions.ConnectionError, requests.exceptions.Timeout),
+        ):
+            return MAYBE_SENT
+        return None
+
     def get_credit_wallet_balance(self, url: str):
         """
         Retrieve the balance of the wallet associated with the API key.
@@ -120,23 +460,22 @@ class VtPassPythonSDK(object):
         :return: The balance of the wallet if the request is successful.
              In case of an error, it returns the error message.
         """
-        balance_url = f"{url}/balance"
-        headers = self.get_request_headers()
-        try:
-            response = requests.get(balance_url, headers=headers)
-            response.raise_for_status()
-            logging.info("Credit Wallet Balance Retrieved successfully")
-            if jr == "False":
-                return response.json()
-            else:
-                return response.json().get("contents").get("balance")
-        except requests.exceptions.HTTPError as http_err:
-            logging.error(f"HTTP error occurred: {http_err} - {response.text}")
-            return f"HTTP error occurred: {http_err} - {response.text}"
-        except Exception as err:
-            logging.error(f"An error occurred: {err}")
-            return f"An error occurred: {err}"
+        return self._request(
+            "GET",
+            f"{url}/balance",
+            "balance",
+            "Credit Wallet Balance Retrieved successfully",
+            extract=self._extract_balance,
+        )
+
+    def _extract_balance(self, result):
+        if self.jr == "False":
+            return result
+        else:
+            return result.get("contents").get("balance")
 
+    @cached("service-categories")
+    @coalesced("service-categories")
     def get_available_service_categories(self, url: str):
         """
         Retrieve all the available service categories.
@@ -147,25 +486,15 @@ class VtPassPythonSDK(object):
         :return: The available service categories. Each category includes an identifier and name.
                 In case of an error, it returns the error message.
         """
-        service_categories_url = f"{url}/service-categories"
-        headers = self.get_request_headers()
-        try:
-            response = requests.get(service_categories_url, headers=headers)
-            response.raise_for_status()
-            logging.info("Available Service Categories Retrieved successfully")
-            if jr == "True":
-                return response.json()
-            else:
-                categories = response.json().get("content")
-                return categories
-
-        except requests.exceptions.HTTPError as http_err:
-            logging.error(f"HTTP error occurred: {http_err} - {response.text}")
-            return f"HTTP error occurred: {http_err} - {response.text}"
-        except Exception as err:
-            logging.error(f"An error occurred: {err}")
-            return f"An error occurred: {err}"
+        return self._request(
+            "GET",
+            f"{url}/service-categories",
+            "service-categories",
+            "Available Service Categories Retrieved successfully",
+        )
 
+    @cached("services")
+    @coalesced("services")
     def get_service_identify_details(
         self, url: str, identifier_schema: ServiceIdentifierSchema
     ):
@@ -181,28 +510,15 @@ class VtPassPythonSDK(object):
         it returns the error message
         """
         service_identifier = identifier_schema.identifier
-        service_details_url = f"{url}/services?identifier={service_identifier}"
-        headers = self.get_request_headers()
-        try:
-            response = requests.get(service_details_url, headers=headers)
-            response.raise_for_status()
-            result = response.json()
-            if "errors" in result:
-                logging.info(f"An Error Response received: {result['errors']}")
-                return result
-            else:
-                logging.info("Service Details Retrieved successfully")
-                if jr == "True":
-                    return result
-                else:
-                    return result.get("content")
-        except requests.exceptions.HTTPError as http_err:
-            logging.error(f"HTTP error occurred: {http_err} - {response.text}")
-            return f"HTTP error occurred: {http_err} - {response.text}"
-        except Exception as err:
-            logging.error(f"An error occurred: {err}")
-            return f"An error occurred: {err}"
+        return self._request(
+            "GET",
+            f"{url}/services?identifier={service_identifier}",
+            "services",
+            "Service Details Retrieved successfully",
+        )
 
+    @cached("service-variations")
+    @coalesced("service-variations")
     def get_service_variation_details(
         self, url: str, service_id_schema: ServiceIdVariationSchema
     ):
@@ -221,30 +537,47 @@ class VtPassPythonSDK(object):
         it returns the error message
         """
         service_id = service_id_schema.service_id
-        service_variation_details_url = (
-            f"{url}/service-variations?serviceID={service_id}"
+        return self._request(
+            "GET",
+            f"{url}/service-variations?serviceID={service_id}",
+            "service-variations",
+            "Service Variation Details Retrieved successfully",
+            service_id=service_id,
         )
-        headers = self.get_request_headers()
-        try:
-            response = requests.get(service_variation_details_url, headers=headers)
-            response.raise_for_status()
-            result = response.json()
-            if "errors" in result:
-                logging.info(f"An Error Response received: {result['errors']}")
-                return result
-            else:
-                logging.info("Service Variation Details Retrieved successfully")
-                if jr == "True":
-                    return result
-                else:
-                    return result.get("content")
-        except requests.exceptions.HTTPError as http_err:
-            logging.error(f"HTTP error occurred: {http_err} - {response.text}")
-            return f"HTTP error occurred: {http_err} - {response.text}"
-        except Exception as err:
-            logging.error(f"An error occurred: {err}")
-            return f"An error occurred: {err}"
 
+    def iter_service_variations(
+        self, url: str, service_id_schema: ServiceIdVariationSchema, fields=None
+    ):
+        """
+        Yield the variations of a service one at a time, as the response streams in.
+
+        Unlike `get_service_variation_details`, the response is never held in memory as a whole:
+        every variation is decoded as soon as its bytes arrive, which keeps memory flat and
+        yields the first variation early on the large catalogs of TV and data services.
+        The catalog cache is not used.
+
+        :param url: The base URL for the VtPass API.
+        :param service_id_schema: An instance of ServiceIdVariationSchema containing the service ID.
+        :param fields: The keys kept of every variation, e.g `vtpass.streaming.VARIATION_FIELDS`
+            for the code, name and amount. None keeps whole variations.
+        :return: A generator of variation dictionaries. The request is sent on the first iteration.
+        :raises requests.exceptions.RequestException: If the request failed.
+        :raises ValueError: If the response has no variations, e.g an unknown serviceID, or is
+            malformed.
+        """
+        service_id = service_id_schema.service_id
+        request = VtPassRequest(
+            "GET",
+            f"{url}/service-variations?serviceID={service_id}",
+            "service-variations",
+            None,
+            service_id,
+            self.get_request_headers(),
+        )
+        return self._stream(request, "varations", fields)
+
+    @cached("options")
+    @coalesced("options")
     def get_product_options(
         self, url: str, product_options_schema: ProductOptionSchema
     ):
@@ -259,27 +592,14 @@ class VtPassPythonSDK(object):
         """
         service_id = product_options_schema.service_id
         name = product_options_schema.name
-        product_options_url = f"{url}/options?serviceID={service_id}&name={name}"
-        headers = self.get_request_headers()
-        try:
-            response = requests.get(product_options_url, headers=headers)
-            response.raise_for_status()
-            result = response.json()
-            if "errors" in result:
-                logging.error(f"An Error Response received: {result['errors']}")
-                return result
-            else:
-                logging.info("Product Options Retrieved successfully")
-                if jr == "True":
-                    return result
-                else:
-                    return result.get("content")
-        except requests.exceptions.HTTPError as http_err:
-            logging.error(f"HTTP error occurred: {http_err} - {response.text}")
-            return f"HTTP error occurred: {http_err} - {response.text}"
-        except Exception as err:
-            logging.error(f"An error occurred: {err}")
-            return f"An error occurred: {err}"
+        return self._request(
+            "GET",
+            f"{url}/options?serviceID={service_id}&name={name}",
+            "options",
+            "Product Options Retrieved successfully",
+            service_id=service_id,
+            error_level=logging.ERROR,
+        )
 
     def generate_request_id(self):
         """
@@ -289,19 +609,36 @@ class VtPassPythonSDK(object):
         it returns the error message
         """
         try:
-            timezone = pytz.timezone(os.getenv("TIMEZONE"))
-            time_now = datetime.now(timezone)
+            request_id = get_request_id_generator(get_config().timezone).generate()
+            logger.info("Request ID generated successfully")
+            return request_id
+        except Exception as err:
+            logger.error("An error occurred: %s", err)
+            return f"An error occurred: {err}"
+
+    def generate_request_ids(self, count: int):
+        """
+        Generate many request IDs at once, e.g for a bulk run.
 
-            # Generate a UUID and remove hyphens
-            _id = str(uuid.uuid4()).replace("-", "")
+        This is much faster than calling `generate_request_id` in a loop: the timestamp is
+        formatted once and nothing is logged per ID.
 
-            # Combine the timestamp and UUID to form the request ID
-            logging.info("Request ID generated successfully")
-            return f"{time_now.strftime('%Y%m%d%H%M')}{_id}"
+        :param count: The number of request IDs to generate.
+        :return: A list of request IDs.
+        Error: If there is an error it returns the error message
+        """
+        try:
+            request_ids = get_request_id_generator(get_config().timezone).generate_many(
+                count
+            )
+            logger.info("%s Request IDs generated successfully", count)
+            return request_ids
         except Exception as err:
-            logging.error(f"An error occurred: {err}")
+            logger.error("An error occurred: %s", err)
             return f"An error occurred: {err}"
 
+    @cached("service-variations")
+    @coalesced("service-variations")
     def get_service_variation_codes(self, url: str, service_id_schema: ServiceIdSchema):
         """
         Get the service variation codes for a service variation identified by its ID
@@ -313,27 +650,13 @@ class VtPassPythonSDK(object):
         it returns the error message
         """
         service_id = service_id_schema.service_id
-        service_variation_codes_url = f"{url}/service-variations?serviceID={service_id}"
-        headers = self.get_request_headers()
-        try:
-            response = requests.get(service_variation_codes_url, headers=headers)
-            response.raise_for_status()
-            result = response.json()
-            if "errors" in result:
-                logging.info(f"An Error Response received: {result['errors']}")
-                return result
-            else:
-                logging.info("Service Variation Codes Retrieved successfully")
-                if jr == "True":
-                    return result
-                else:
-                    return result.get("content")
-        except requests.exceptions.HTTPError as http_err:
-            logging.error(f"HTTP error occurred: {http_err} - {response.text}")
-            return f"HTTP error occurred: {http_err} - {response.text}"
-        except Exception as err:
-            logging.error(f"An error occurred: {err}")
-            return f"An error occurred: {err}"
+        return self._request(
+            "GET",
+            f"{url}/service-variations?serviceID={service_id}",
+            "service-variations",
+            "Service Variation Codes Retrieved successfully",
+            service_id=service_id,
+        )
 
     def get_transaction_status(self, url: str, request_id: str):
         """
@@ -344,27 +667,26 @@ class VtPassPythonSDK(object):
         Error: If there is an error in the request to the API
         it returns the error message
         """
-        transaction_status_url = f"{url}/requery"
-        headers = self.post_request_headers()
-        data = {"request_id": request_id}
-        try:
-            response = requests.post(
-                transaction_status_url, headers=headers, data=json.dumps(data)
-            )
-            response.raise_for_status()
-            result = response.json()
-            if "code" in result and result["code"] != "000":
-                logging.info(f"An Error Response received: {result}")
-                return result
-            else:
-                logging.info("Transaction Status Retrieved successfully")
-                if jr == "True":
-                    return result
-                else:
-                    return result.get("content")
-        except requests.exceptions.HTTPError as http_err:
-            logging.error(f"HTTP error occurred: {http_err} - {response.text}")
-            return f"HTTP error occurred: {http_err} - {response.text}"
-        except Exception as err:
-            logging.error(f"An error occurred: {err}")
-            return f"An error occurred: {err}"
+        return self._request(
+            "POST",
+            f"{url}/requery",
+            "requery",
+            "Transaction Status Retrieved successfully",
+            data={"request_id": request_id},
+        )
+
+    def requery_transactions(self, url: str, request_ids, **kwargs) -> list:
+        """
+        Requery many pending transactions concurrently until each one reaches a final state.
+
+        Each transaction is requeried with its own exponential backoff and jitter, see
+        `vtpass.requery.RequeryScheduler` for the keyword arguments (concurrency, base_delay,
+        max_delay, age_factor, max_age and on_result).
+
+        :param url: The base URL for the VtPass API.
+        :param request_ids: An iterable of request IDs, or a dictionary mapping request IDs to the time.time() they were submitted at.
+        :return: The list of RequeryResult, in the order of request_ids. A transaction still
+            pending after max_age seconds is reported with the "timeout" status. Use on_result
+            to act on transactions as they settle.
+        """
+        return RequeryScheduler(self, url, **kwargs).run(request_ids)
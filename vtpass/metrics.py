@@ -0,0 +1,330 @@
+import threading
+import time
+from bisect import bisect_left
+
+from vtpass.transport import Hooks, VtPassRequest, default_hooks
+
+# Upper bounds in seconds of the latency histogram buckets, growing by about 1.5x from 1ms to 2 minutes
+LATENCY_BUCKETS = (
+    0.001,
+    0.0015,
+    0.0025,
+    0.0035,
+    0.005,
+    0.0075,
+    0.01,
+    0.015,
+    0.025,
+    0.035,
+    0.05,
+    0.075,
+    0.1,
+    0.15,
+    0.25,
+    0.35,
+    0.5,
+    0.75,
+    1.0,
+    1.5,
+    2.5,
+    3.5,
+    5.0,
+    7.5,
+    10.0,
+    15.0,
+    25.0,
+    35.0,
+    50.0,
+    75.0,
+    120.0,
+)
+
+# The percentiles reported by snapshot() and the Prometheus text output
+QUANTILES = (0.5, 0.95, 0.99)
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+class _Series(object):
+    """
+    Everything recorded for one (endpoint, serviceID) pair.
+    """
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.latency_sum = 0.0
+        self.statuses = {}
+        self.codes = {}
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def quantile(self, q: float):
+        """
+        Estimate a latency percentile from the histogram, interpolating inside the bucket
+        the same way Prometheus' histogram_quantile does.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            if seen + count >= rank and count:
+                if index == len(LATENCY_BUCKETS):
+                    return LATENCY_BUCKETS[-1]
+                lower = LATENCY_BUCKETS[index - 1] if index else 0.0
+                upper = LATENCY_BUCKETS[index]
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return LATENCY_BUCKETS[-1]
+
+
+class Metrics(object):
+    """
+    Latency, status and size metrics of the requests sent to the VtPass API.
+
+    Metrics are recorded by hooks on the request pipeline, labelled by endpoint and serviceID:
+    - a latency histogram of every attempt, with p50, p95 and p99 estimates
+    - a counter of HTTP statuses, "error" for attempts that got no response
+    - a counter of VtPass response codes, e.g 000, 016, 099
+    - the number of bytes sent and received
+
+    Nothing is recorded, and the pipeline pays nothing, until the metrics are installed on
+    the hooks with `install` (or `enable_metrics` for the shared instance).
+    """
+
+    def __init__(self):
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def install(self, hooks: Hooks = default_hooks):
+        """
+        Start recording the requests going through the given hooks.
+        """
+        hooks.register("before_send", self._before_send)
+        hooks.register("after_receive", self._after_receive)
+        hooks.register("on_error", self._on_error)
+
+    def uninstall(self, hooks: Hooks = default_hooks):
+        """
+        Stop recording the requests going through the given hooks.
+        """
+        hooks.unregister("before_send", self._before_send)
+        hooks.unregister("after_receive", self._after_receive)
+        hooks.unregister("on_error", self._on_error)
+
+    def reset(self):
+        """
+        Drop everything recorded so far.
+        """
+        with self._lock:
+            self._series = {}
+
+    def _before_send(self, request: VtPassRequest):
+        request.context["metrics_started_at"] = time.perf_counter()
+
+    def _after_receive(self, request: VtPassRequest, response, result):
+        code = result.get("code") if isinstance(result, dict) else None
+        self._record(
+            request,
+            response.status_code,
+            code,
+            _request_size(response),
+            _response_size(response),
+        )
+
+    def _on_error(self, request: VtPassRequest, error: Exception):
+        response = getattr(error, "response", None)
+        if response is not None:
+            self._record(
+                request,
+                response.status_code,
+                None,
+                _request_size(response),
+                _response_size(response),
+            )
+        else:
+            self._record(request, "error", None, 0, 0)
+
+    def _record(self, request: VtPassRequest, status, code, bytes_out, bytes_in):
+        started_at = request.context.get("metrics_started_at")
+        latency = time.perf_counter() - started_at if started_at is not None else None
+        key = (request.endpoint, request.service_id or "")
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series()
+            if latency is not None:
+                series.buckets[bisect_left(LATENCY_BUCKETS, latency)] += 1
+                series.count += 1
+                series.latency_sum += latency
+            series.statuses[status] = series.statuses.get(status, 0) + 1
+            if code is not None:
+                series.codes[code] = series.codes.get(code, 0) + 1
+            series.bytes_out += bytes_out
+            series.bytes_in += bytes_in
+
+    def snapshot(self) -> dict:
+        """
+        Return the metrics recorded so far.
+
+        :return: A dictionary mapping each endpoint to a dictionary mapping each serviceID
+            ("" for requests not about a service) to its metrics: count, p50, p95, p99 and
+            mean latency in seconds, statuses, codes, bytes_in and bytes_out.
+        """
+        snapshot = {}
+        with self._lock:
+            for (endpoint, service_id), series in self._series.items():
+                metrics = {"count": series.count}
+                for q in QUANTILES:
+                    metrics[f"p{int(q * 100)}"] = series.quantile(q)
+                metrics["mean"] = (
+                    series.latency_sum / series.count if series.count else None
+                )
+                metrics["statuses"] = dict(series.statuses)
+                metrics["codes"] = dict(series.codes)
+                metrics["bytes_in"] = series.bytes_in
+                metrics["bytes_out"] = series.bytes_out
+                snapshot.setdefault(endpoint, {})[service_id] = metrics
+        return snapshot
+
+    def prometheus(self) -> str:
+        """
+        Return the metrics recorded so far in the Prometheus text exposition format.
+        """
+        lines = [
+            "# HELP vtpass_request_duration_seconds Latency of VtPass API requests.",
+            "# TYPE vtpass_request_duration_seconds histogram",
+        ]
+        quantile_lines = [
+            "# HELP vtpass_request_duration_quantile_seconds Estimated latency percentiles of VtPass API requests.",
+            "# TYPE vtpass_request_duration_quantile_seconds gauge",
+        ]
+        status_lines = [
+            "# HELP vtpass_requests_total VtPass API requests by HTTP status.",
+            "# TYPE vtpass_requests_total counter",
+        ]
+        code_lines = [
+            "# HELP vtpass_response_codes_total VtPass API responses by VtPass response code.",
+            "# TYPE vtpass_response_codes_total counter",
+        ]
+        bytes_lines = [
+            "# HELP vtpass_request_bytes_total Bytes sent to the VtPass API.",
+            "# TYPE vtpass_request_bytes_total counter",
+        ]
+        bytes_in_lines = [
+            "# HELP vtpass_response_bytes_total Bytes received from the VtPass API.",
+            "# TYPE vtpass_response_bytes_total counter",
+        ]
+        with self._lock:
+            for (endpoint, service_id), series in sorted(self._series.items()):
+                labels = (
+                    f'endpoint="{_escape(endpoint)}",service_id="{_escape(service_id)}"'
+                )
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS, series.buckets):
+                    cumulative += count
+                    lines.append(
+                        f'vtpass_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}'
+                    )
+                lines.append(
+                    f'vtpass_request_duration_seconds_bucket{{{labels},le="+Inf"}} {series.count}'
+                )
+                lines.append(
+                    f"vtpass_request_duration_seconds_sum{{{labels}}} {series.latency_sum}"
+                )
+                lines.append(
+                    f"vtpass_request_duration_seconds_count{{{labels}}} {series.count}"
+                )
+                for q in QUANTILES:
+                    value = series.quantile(q)
+                    if value is not None:
+                        quantile_lines.append(
+                            f'vtpass_request_duration_quantile_seconds{{{labels},quantile="{q}"}} {value}'
+                        )
+                for status, count in sorted(series.statuses.items(), key=str):
+                    status_lines.append(
+                        f'vtpass_requests_total{{{labels},status="{status}"}} {count}'
+                    )
+                for code, count in sorted(series.codes.items()):
+                    code_lines.append(
+                        f'vtpass_response_codes_total{{{labels},code="{_escape(code)}"}} {count}'
+                    )
+                bytes_lines.append(
+                    f"vtpass_request_bytes_total{{{labels}}} {series.bytes_out}"
+                )
+                bytes_in_lines.append(
+                    f"vtpass_response_bytes_total{{{labels}}} {series.bytes_in}"
+                )
+        return (
+            "\n".join(
+                lines
+                + quantile_lines
+                + status_lines
+                + code_lines
+                + bytes_lines
+                + bytes_in_lines
+            )
+            + "\n"
+        )
+
+
+def _request_size(response) -> int:
+    # requests keeps the sent body on response.request.body, httpx on response.request.content
+    sent = response.request
+    body = getattr(sent, "body", None)
+    if body is None:
+        body = getattr(sent, "content", None)
+    if not body:
+        return 0
+    if isinstance(body, str):
+        return len(body.encode())
+    return len(body)
+
+
+def _response_size(response) -> int:
+    # a streamed response has no content left to measure once it was read
+    length = response.headers.get("Content-Length")
+    if length is not None and length.isdigit():
+        return int(length)
+    try:
+        return len(response.content)
+    except RuntimeError:
+        return 0
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def get_metrics() -> Metrics:
+    """
+    Return the Metrics shared by the SDK, creating it on first use. It records nothing until
+    it is enabled with `enable_metrics`.
+    """
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = Metrics()
+    return _metrics
+
+
+def enable_metrics(hooks: Hooks = default_hooks) -> Metrics:
+    """
+    Start recording metrics for every client using the given hooks, the shared ones by default.
+
+    :return: The shared Metrics.
+    """
+    metrics = get_metrics()
+    metrics.uninstall(hooks)
+    metrics.install(hooks)
+    return metrics
+
+
+def disable_metrics(hooks: Hooks = default_hooks):
+    """
+    Stop recording metrics. What was recorded so far is kept.
+    """
+    get_metrics().uninstall(hooks)
@@ -0,0 +1,548 @@
+"""
+A local stand-in for the VtPass API, to load test the SDK without the sandbox.
+
+Run it on its own with:
+
+    python -m vtpass.mock_server --port 8000 --latency 0.05 --error-rate 0.01 --pending-rate 0.1
+
+and point the SDK at http://127.0.0.1:8000 instead of the sandbox URL.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+SERVICE_CATEGORIES = [
+    {"identifier": "airtime", "name": "Airtime Recharge"},
+    {"identifier": "data", "name": "Data Services"},
+    {"identifier": "tv-subscription", "name": "TV Subscription"},
+    {"identifier": "electricity-bill", "name": "Electricity Bill"},
+    {"identifier": "education", "name": "Education"},
+]
+
+SERVICES = {
+    "airtime": [
+        ("mtn", "MTN Airtime VTU"),
+        ("glo", "GLO Airtime VTU"),
+        ("airtel", "Airtel Airtime VTU"),
+        ("etisalat", "9mobile Airtime VTU"),
+    ],
+    "data": [
+        ("mtn-data", "MTN Data"),
+        ("glo-data", "GLO Data"),
+        ("airtel-data", "Airtel Data"),
+        ("etisalat-data", "9mobile Data"),
+        ("smile-direct", "Smile Payment"),
+    ],
+    "tv-subscription": [
+        ("dstv", "DSTV Subscription"),
+        ("gotv", "Gotv Payment"),
+        ("startimes", "Startimes Subscription"),
+    ],
+    "electricity-bill": [
+        ("ikeja-electric", "Ikeja Electric Payment - IKEDC"),
+        ("eko-electric", "Eko Electric Payment - EKEDC"),
+        ("abuja-electric", "Abuja Electricity Distribution Company- AEDC"),
+    ],
+    "education": [
+        ("waec", "WAEC Result Checker PIN"),
+        ("waec-registration", "WAEC Registration PIN"),
+        ("jamb", "Jamb PIN VENDING (UTME & Direct Entry)"),
+    ],
+}
+
+
+def _data_bundles(prefix: str) -> list:
+    return [
+        (f"{prefix}-{size}mb-{size * 2}", f"N{size * 2} {size}MB - 30 days", size * 2)
+        for size in range(50, 3050, 50)
+    ]
+
+
+# (variation_code, name, variation_amount) of each service with variations, all fixed price
+# except the electricity ones
+VARIATIONS = {
+    "mtn-data": _data_bundles("mtn"),
+    "glo-data": _data_bundles("glo"),
+    "airtel-data": _data_bundles("airt"),
+    "etisalat-data": _data_bundles("eti"),
+    "smile-direct": [
+        ("516", "1GB FlexiDaily", 300),
+        ("517", "2.5GB FlexiDaily", 500),
+        ("518", "6.5GB FlexiWeekly", 1500),
+    ],
+    "dstv": [
+        ("dstv-padi", "DStv Padi", 2950),
+        ("dstv-yanga", "DStv Yanga", 4200),
+        ("dstv-confam", "Dstv Confam", 7400),
+        ("dstv79", "DStv Compact", 12500),
+        ("dstv3", "DStv Premium", 29500),
+    ],
+    "gotv": [
+        ("gotv-smallie", "GOtv Smallie", 1300),
+        ("gotv-jinja", "GOtv Jinja", 2700),
+        ("gotv-jolli", "GOtv Jolli", 3950),
+        ("gotv-max", "GOtv Max", 5700),
+    ],
+    "startimes": [
+        ("nova", "Nova - 1 Month", 1200),
+        ("basic", "Basic - 1 Month", 2100),
+        ("classic", "Classic - 1 Month", 3100),
+    ],
+    "ikeja-electric": [("prepaid", "Prepaid", 0), ("postpaid", "Postpaid", 0)],
+    "eko-electric": [("prepaid", "Prepaid", 0), ("postpaid", "Postpaid", 0)],
+    "abuja-electric": [("prepaid", "Prepaid", 0), ("postpaid", "Postpaid", 0)],
+    "waec": [("waecdirect", "WAEC Result Checker PIN", 3900)],
+    "waec-registration": [("waec-registraion", "WAEC Registration PIN", 14450)],
+    "jamb": [("utme", "UTME", 6200), ("de", "Direct Entry (DE)", 6200)],
+}
+
+ELECTRICITY_SERVICES = {"ikeja-electric", "eko-electric", "abuja-electric"}
+
+# Billers codes starting with this prefix fail merchant verification
+WRONG_BILLERS_CODE_PREFIX = "0000"
+
+ENDPOINTS = (
+    "balance",
+    "service-categories",
+    "services",
+    "service-variations",
+    "options",
+    "merchant-verify",
+    "pay",
+    "requery",
+)
+
+
+class _Transaction(object):
+    __slots__ = ("request_id", "service_id", "amount", "status", "settle_at", "data")
+
+    def __init__(self, request_id, service_id, amount, status, settle_at, data):
+        self.request_id = request_id
+        self.service_id = service_id
+        self.amount = amount
+        self.status = status
+        self.settle_at = settle_at
+        self.data = data
+
+
+class MockVtPassServer(object):
+    """
+    A local HTTP server answering like the VtPass API.
+
+    It serves /balance, /service-categories, /services, /service-variations, /options,
+    /merchant-verify, /pay and /requery from a small built-in catalog, keeps the transactions
+    it was sent in memory and debits a wallet balance. Requests are answered on their own
+    thread, so latency is simulated without holding up other requests.
+
+    The latency and error_rate settings are either a single value or a dictionary mapping
+    endpoints (see ENDPOINTS) to values, with "*" for the other endpoints.
+
+    Attributes:
+        host (str): The interface the server listens on.
+        port (int): The port the server listens on, 0 picks a free port.
+        latency: The seconds every response is delayed by.
+        jitter (float): A random extra delay of up to that many seconds, added to the latency.
+        error_rate: The fraction of requests answered with an HTTP 500, before being processed.
+        pending_rate (float): The fraction of /pay requests left pending.
+        pending_duration (float): The seconds a pending transaction stays pending before it is delivered.
+        failure_rate (float): The fraction of /pay requests that fail with code 016.
+        balance (float): The wallet balance debited by delivered and pending transactions.
+        requests (dict): The number of requests received per endpoint.
+        transactions (dict): The transactions received, by request ID.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency=0.0,
+        jitter: float = 0.0,
+        error_rate=0.0,
+        pending_rate: float = 0.0,
+        pending_duration: float = 5.0,
+        failure_rate: float = 0.0,
+        balance: float = 1000000000,
+        seed=None,
+    ):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.pending_rate = pending_rate
+        self.pending_duration = pending_duration
+        self.failure_rate = failure_rate
+        self.balance = balance
+        self.requests = dict.fromkeys(ENDPOINTS, 0)
+        self.transactions = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+        self._variations = {
+            service_id: {code: (name, amount) for code, name, amount in variations}
+            for service_id, variations in VARIATIONS.items()
+        }
+        self._service_ids = {
+            service_id
+            for services in SERVICES.values()
+            for service_id, name in services
+        }
+
+    @property
+    def url(self) -> str:
+        """
+        The base URL to pass to the SDK methods, e.g http://127.0.0.1:8000.
+        """
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        """
+        Start serving on a background thread.
+
+        :return: The server itself.
+        """
+        self._server = ThreadingHTTPServer((self.host, self.port), _Handler)
+        self._server.daemon_threads = True
+        self._server.mock = self
+        self.host, self.port = self._server.server_address[:2]
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="vtpass-mock-server", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop serving, if the server is running.
+        """
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def reset(self):
+        """
+        Forget every transaction and request count.
+        """
+        with self._lock:
+            self.requests = dict.fromkeys(ENDPOINTS, 0)
+            self.transactions = {}
+
+    def _setting(self, value, endpoint: str) -> float:
+        if isinstance(value, dict):
+            return value.get(endpoint, value.get("*", 0.0))
+        return value
+
+    def handle(self, method: str, path: str, query: dict, headers, body) -> tuple:
+        """
+        Answer one request.
+
+        :param method: The HTTP method.
+        :param path: The path of the request, e.g /pay.
+        :param query: The parsed query string.
+        :param headers: The request headers.
+        :param body: The parsed JSON body, None for GET requests.
+        :return: A tuple of the HTTP status and the response body.
+        """
+        endpoint = path.strip("/").split("/")[0]
+        if endpoint not in self.requests:
+            return 404, {"response_description": "NOT FOUND"}
+        with self._lock:
+            self.requests[endpoint] += 1
+            draw = self._random.random()
+            delay = self._setting(self.latency, endpoint)
+            if self.jitter:
+                delay += self._random.uniform(0, self.jitter)
+        if delay:
+            time.sleep(delay)
+        if not headers.get("api-key"):
+            return 401, {"response_description": "INVALID CREDENTIALS"}
+        if draw < self._setting(self.error_rate, endpoint):
+            return 500, {"response_description": "SERVER ERROR"}
+        if method == "GET":
+            return 200, self._get(endpoint, query)
+        if not isinstance(body, dict):
+            return 400, {"response_description": "INVALID JSON"}
+        if endpoint == "merchant-verify":
+            return 200, self._merchant_verify(body)
+        if endpoint == "pay":
+            return 200, self._pay(body)
+        if endpoint == "requery":
+            return 200, self._requery(body)
+        return 405, {"response_description": "METHOD NOT ALLOWED"}
+
+    def _get(self, endpoint: str, query: dict) -> dict:
+        if endpoint == "balance":
+            return {"code": 1, "contents": {"balance": self.balance}}
+        if endpoint == "service-categories":
+            return {"response_description": "000", "content": SERVICE_CATEGORIES}
+        if endpoint == "services":
+            services = SERVICES.get(query.get("identifier"))
+            if services is None:
+                return {"response_description": "011", "errors": "Invalid identifier"}
+            return {
+                "response_description": "000",
+                "content": [
+                    {
+                        "serviceID": service_id,
+                        "name": name,
+                        "minimium_amount": "50",
+                        "maximum_amount": 50000,
+                        "convinience_fee": "0 %",
+                        "product_type": (
+                            "fix" if service_id in VARIATIONS else "flexible"
+                        ),
+                    }
+                    for service_id, name in services
+                ],
+            }
+        service_id = query.get("serviceID")
+        if service_id not in self._service_ids:
+            return {"response_description": "012", "errors": "Invalid serviceID"}
+        if endpoint == "options":
+            return {
+                "response_description": "000",
+                "content": {"optionName": query.get("name"), "options": []},
+            }
+        return {
+            "response_description": "000",
+            "content": {
+                "ServiceName": service_id,
+                "serviceID": service_id,
+                "convinience_fee": "0 %",
+                # the VtPass API spells it this way
+                "varations": [
+                    {
+                        "variation_code": code,
+                        "name": name,
+                        "variation_amount": f"{amount}.00",
+                        "fixedPrice": (
+                            "No" if service_id in ELECTRICITY_SERVICES else "Yes"
+                        ),
+                    }
+                    for code, name, amount in VARIATIONS.get(service_id, ())
+                ],
+            },
+        }
+
+    def _merchant_verify(self, body: dict) -> dict:
+        billers_code = str(body.get("billersCode", ""))
+        if body.get("serviceID") not in self._service_ids or not billers_code:
+            return {"code": "011", "response_description": "INVALID ARGUMENTS"}
+        if billers_code.startswith(WRONG_BILLERS_CODE_PREFIX):
+            return {
+                "code": "000",
+                "content": {
+                    "error": "This meter is not correct or is not a valid meter number",
+                    "WrongBillersCode": True,
+                },
+            }
+        return {
+            "code": "000",
+            "content": {
+                "Customer_Name": "TESTMETER1",
+                "Address": "ABULE - EGBA BU ABULE",
+                "Meter_Number": billers_code,
+                "Customer_Account_Type": "NMD",
+                "MeterType": body.get("type"),
+                "Status": "ACTIVE",
+                "Due_Date": "2026-12-31",
+                "WrongBillersCode": False,
+            },
+        }
+
+    def _pay(self, body: dict) -> dict:
+        request_id = body.get("request_id")
+        service_id = body.get("serviceID")
+        if not request_id or not service_id:
+            return {"code": "011", "response_description": "INVALID ARGUMENTS"}
+        if service_id not in self._service_ids:
+            return {"code": "012", "response_description": "PRODUCT DOES NOT EXIST"}
+        amount = body.get("amount")
+        variations = self._variations.get(service_id)
+        variation_code = body.get("variation_code")
+        if variations and variation_code is not None:
+            if variation_code not in variations:
+                return {
+                    "code": "010",
+                    "response_description": "VARIATION CODE DOES NOT EXIST",
+                }
+            if service_id not in ELECTRICITY_SERVICES:
+                amount = variations[variation_code][1]
+        try:
+            amount = float(amount) * int(body.get("quantity") or 1)
+        except (TypeError, ValueError):
+            return {"code": "011", "response_description": "INVALID ARGUMENTS"}
+
+        now = time.time()
+        with self._lock:
+            if request_id in self.transactions:
+                return {
+                    "code": "019",
+                    "response_description": "LIKELY DUPLICATE TRANSACTION",
+                }
+            if amount > self.balance:
+                return {"code": "018", "response_description": "LOW WALLET BALANCE"}
+            draw = self._random.random()
+            if draw < self.failure_rate:
+                status = "failed"
+            elif draw < self.failure_rate + self.pending_rate:
+                status = "pending"
+                self.balance -= amount
+            else:
+                status = "delivered"
+                self.balance -= amount
+            transaction = self.transactions[request_id] = _Transaction(
+                request_id,
+                service_id,
+                amount,
+                status,
+                now + self.pending_duration,
+                body,
+            )
+        return self._transaction_response(transaction)
+
+    def _requery(self, body: dict) -> dict:
+        with self._lock:
+            transaction = self.transactions.get(body.get("request_id"))
+            if transaction is None:
+                return {"code": "015", "response_description": "INVALID REQUEST ID"}
+            if transaction.status == "pending" and time.time() >= transaction.settle_at:
+                transaction.status = "delivered"
+        return self._transaction_response(transaction)
+
+    def _transaction_response(self, transaction: _Transaction) -> dict:
+        code, description = {
+            "delivered": ("000", "TRANSACTION SUCCESSFUL"),
+            "pending": ("099", "TRANSACTION IS PROCESSING"),
+            "failed": ("016", "TRANSACTION FAILED"),
+        }[transaction.status]
+        data = transaction.data
+        purchased_code = ""
+        if (
+            transaction.status == "delivered"
+            and transaction.service_id in ELECTRICITY_SERVICES
+            and data.get("variation_code") == "prepaid"
+        ):
+            purchased_code = "Token : 4236 5981 0937 2640 3371"
+        return {
+            "code": code,
+            "content": {
+                "transactions": {
+                    "status": transaction.status,
+                    "product_name": transaction.service_id,
+                    "unique_element": data.get("billersCode", data.get("phone")),
+                    "unit_price": transaction.amount,
+                    "quantity": data.get("quantity") or 1,
+                    "channel": "api",
+                    "commission": 0,
+                    "total_amount": transaction.amount,
+                    "type": transaction.service_id,
+                    "phone": data.get("phone"),
+                    "amount": transaction.amount,
+                    "platform": "api",
+                    "method": "api",
+                    "transactionId": transaction.request_id,
+                }
+            },
+            "response_description": description,
+            "requestId": transaction.request_id,
+            "amount": transaction.amount,
+            "transaction_date": time.strftime("%Y-%m-%dT%H:%M:%S.000000Z"),
+            "purchased_code": purchased_code,
+        }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so that clients can keep the connection alive between requests
+    protocol_version = "HTTP/1.1"
+    # headers and body are written separately, avoid the delayed-ACK stall on reused connections
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self._answer(None)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length)) if length else None
+        except ValueError:
+            body = None
+        self._answer(body)
+
+    def _answer(self, body):
+        url = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        status, response = self.server.mock.handle(
+            self.command, url.path, query, self.headers, body
+        )
+        data = json.dumps(response).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_mock_server(**settings) -> MockVtPassServer:
+    """
+    Start a MockVtPassServer on a free local port.
+
+    :param settings: The keyword arguments of MockVtPassServer, e.g latency or error_rate.
+    :return: The running server, its base URL is `server.url`.
+    """
+    return MockVtPassServer(**settings).start()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local mock VtPass API server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--pending-rate", type=float, default=0.0)
+    parser.add_argument("--pending-duration", type=float, default=5.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    server = start_mock_server(
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        pending_rate=args.pending_rate,
+        pending_duration=args.pending_duration,
+        failure_rate=args.failure_rate,
+        seed=args.seed,
+    )
+    print(f"Mock VtPass API listening on {server.url}", flush=True)
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+
+class BucketBackend(object):
+    """
+    Base class for the stores holding the state of token buckets.
+
+    A backend only has to reserve one token from a bucket atomically. Subclass it to plug in
+    another store.
+
+    Attributes:
+        blocking (bool): Whether reserve may block, e.g on a lock held by another process or on
+            the network. The async clients then reserve in a thread, off the event loop.
+    """
+
+    blocking = True
+
+    def reserve(self, key: str, rate: float, burst: float) -> float:
+        """
+        Take one token from a bucket, going into debt when the bucket is empty.
+
+        :param key: The name of the bucket.
+        :param rate: The number of tokens added to the bucket per second.
+        :param burst: The capacity of the bucket.
+        :return: The number of seconds to wait before the token may be used.
+        """
+        raise NotImplementedError
+
+
+def _take_token(
+    tokens: float, updated_at: float, now: float, rate: float, burst: float
+):
+    # refill since the last reservation, then take a token. A negative balance is the queue of
+    # callers already waiting, so each new caller waits behind them.
+    tokens = min(burst, tokens + (now - updated_at) * rate) - 1
+    wait = -tokens / rate if tokens < 0 else 0.0
+    return tokens, wait
+
+
+class MemoryBucketBackend(BucketBackend):
+    """
+    Keep the buckets in memory, shared by the threads of one process.
+    """
+
+    blocking = False
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, key: str, rate: float, burst: float) -> float:
+        with self._lock:
+            now = time.monotonic()
+            tokens, updated_at = self._buckets.get(key, (burst, now))
+            tokens, wait = _take_token(tokens, updated_at, now, rate, burst)
+            self._buckets[key] = (tokens, now)
+        return wait
+
+
+class FileBucketBackend(BucketBackend):
+    """
+    Keep the buckets in an SQLite file, shared by every process on the host using the same path.
+
+    Each reservation is one short write transaction, so worker processes draw from the same
+    budgets. A process forked after the backend was opened reopens the file on first use.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._pid = None
+        self._connection = None
+
+    def _connect(self):
+        connection = sqlite3.connect(
+            self.path, timeout=30, check_same_thread=False, isolation_level=None
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=OFF")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS buckets "
+            "(key TEXT PRIMARY KEY, tokens REAL, updated_at REAL)"
+        )
+        self._connection = connection
+        self._pid = os.getpid()
+
+    def reserve(self, key: str, rate: float, burst: float) -> float:
+        with self._lock:
+            if self._pid != os.getpid():
+                self._connect()
+            connection = self._connection
+            # BEGIN IMMEDIATE takes the write lock up front, so the read and the update are atomic
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                # wall clock time, since it is the only clock shared by processes
+                now = time.time()
+                row = connection.execute(
+                    "SELECT tokens, updated_at FROM buckets WHERE key = ?", (key,)
+                ).fetchone()
+                tokens, updated_at = row if row is not None else (burst, now)
+                tokens, wait = _take_token(tokens, updated_at, now, rate, burst)
+                connection.execute(
+                    "INSERT OR REPLACE INTO buckets (key, tokens, updated_at) VALUES (?, ?, ?)",
+                    (key, tokens, now),
+                )
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+        return wait
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._connection.close()
+            self._connection = None
+            self._pid = None
+
+
+class RateLimiter(object):
+    """
+    Pace the requests sent to the VtPass API with token buckets.
+
+    Limits are keyed by endpoint, optionally followed by a serviceID:
+    - "pay": one budget for every /pay request
+    - "pay/mtn": a budget for the /pay requests of the mtn serviceID
+    - "pay/*": a separate budget for each serviceID, unless it has its own limit
+
+    A request draws one token from every budget that applies to it and waits until all of
+    them allow it, so callers queue in order instead of running into the upstream limit.
+
+    Attributes:
+        limits (dict): The (rate, burst) of each budget, rate in requests per second.
+        backend (BucketBackend): The store of the buckets, in memory unless shared between processes.
+    """
+
+    def __init__(self, limits: dict, backend: BucketBackend = None):
+        self.limits = {}
+        for name, limit in limits.items():
+            if isinstance(limit, (int, float)):
+                limit = (limit, max(limit, 1))
+            rate, burst = limit
+            if rate <= 0 or burst < 1:
+                raise ValueError(
+                    f"Invalid rate limit for {name!r}: rate must be positive and burst at least 1"
+                )
+            self.limits[name] = (float(rate), float(burst))
+        self.backend = backend if backend is not None else MemoryBucketBackend()
+
+    def reserve(self, endpoint: str, service_id: str = None) -> float:
+        """
+        Reserve a request to an endpoint.
+
+        :param endpoint: The VtPass endpoint, e.g pay, merchant-verify, service-variations.
+        :param service_id: The serviceID the request is about, if any.
+        :return: The number of seconds the caller must wait before sending the request.
+        """
+        limits = self.limits
+        wait = 0.0
+        limit = limits.get(endpoint)
+        if limit is not None:
+            wait = self.backend.reserve(endpoint, *limit)
+        if service_id is not None:
+            key = f"{endpoint}/{service_id}"
+            limit = limits.get(key)
+            if limit is None:
+                limit = limits.get(f"{endpoint}/*")
+            if limit is not None:
+                wait = max(wait, self.backend.reserve(key, *limit))
+        return wait
+
+    async def areserve(self, endpoint: str, service_id: str = None) -> float:
+        """
+        The coroutine counterpart of `reserve`, run in the default executor when the backend is blocking.
+        """
+        if not self.backend.blocking:
+            return self.reserve(endpoint, service_id)
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.reserve, endpoint, service_id
+        )
+
+
+def parse_rate_limits(value: str) -> dict:
+    """
+    Parse rate limits written as comma separated name=rate[:burst] pairs,
+    e.g "pay=20:40,pay/*=5,merchant-verify=10".
+
+    :param value: The rate limits.
+    :return: A dictionary mapping each name to its (rate, burst).
+    """
+    limits = {}
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, limit = item.partition("=")
+        rate, _, burst = limit.partition(":")
+        rate = float(rate)
+        limits[name.strip()] = (rate, float(burst) if burst else max(rate, 1))
+    return limits
+
+
+def rate_limiter_from_env():
+    """
+    Build the rate limiter described by the environment.
+
+    RATE_LIMITS holds the limits (see `parse_rate_limits`), and RATE_LIMIT_PATH the file
+    shared by the processes drawing from the same budgets.
+
+    :return: A RateLimiter, or None when RATE_LIMITS is not set.
+    """
+    value = os.getenv("RATE_LIMITS")
+    if not value:
+        return None
+    path = os.getenv("RATE_LIMIT_PATH")
+    backend = FileBucketBackend(path) if path else None
+    return RateLimiter(parse_rate_limits(value), backend)
+
+
+def get_rate_limiter():
+    """
+    Return the rate limiter shared by every client that was not given its own, reading the
+    environment on first use.
+
+    :return: The shared RateLimiter, or None when rate limiting is disabled.
+    """
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                _rate_limiter = rate_limiter_from_env() or False
+    return _rate_limiter or None
+
+
+def configure_rate_limiter(limits: dict = None, path: str = None):
+    """
+    Replace the shared rate limiter, used by every client that was not given its own.
+
+    :param limits: The (rate, burst) of each budget, see RateLimiter. None disables rate limiting.
+    :param path: The file shared by processes drawing from the same budgets, None to keep the
+        buckets in memory.
+    :return: The new shared RateLimiter, or None.
+    """
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if limits:
+            backend = FileBucketBackend(path) if path else None
+            _rate_limiter = RateLimiter(limits, backend)
+        else:
+            _rate_limiter = False
+    return _rate_limiter or None
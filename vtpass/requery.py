@@ -0,0 +1,293 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+logger = logging.getLogger(__name__)
+
+# The state of a transaction VtPass has no record of, its request ID was never received
+NOT_FOUND = "not_found"
+
+# Transaction states after which VtPass will not change the transaction anymore
+FINAL_STATES = ("delivered", "failed", "reversed", NOT_FOUND)
+
+# Multiplier applied to the backoff delay for each non final state. Initiated transactions are
+# usually settled within seconds, while unknown states (network or HTTP errors) back off harder.
+STATE_DELAY_FACTORS = {
+    "initiated": 0.5,
+    "pending": 1.0,
+    None: 2.0,
+}
+
+# VtPass response codes that carry a transaction state without transaction details
+CODE_STATES = {
+    "015": NOT_FOUND,
+    "016": "failed",
+    "099": "pending",
+}
+
+
+def transaction_state(result):
+    """
+    Extract the transaction status from a `get_transaction_status` result.
+
+    Works whether JSON_RESPONSE is set or not, since the result is then either the full
+    response or its content.
+
+    :param result: The value returned by `get_transaction_status`.
+    :return: The status, e.g delivered, pending, failed, not_found when VtPass does not know
+        the request ID, or None if it is unknown.
+    """
+    if not isinstance(result, dict):
+        return None
+    content = result.get("content", result)
+    if isinstance(content, dict):
+        transactions = content.get("transactions")
+        if isinstance(transactions, dict) and transactions.get("status"):
+            return transactions["status"]
+    return CODE_STATES.get(result.get("code"))
+
+
+class RequeryResult(object):
+    """
+    The outcome of requerying one transaction until it settled or ran out of time.
+
+    Attributes:
+        request_id (str): The request ID of the transaction.
+        status (str): The final status (delivered, failed, reversed, or not_found when VtPass
+            does not know the request ID), or "timeout" when the transaction was still not final
+            after max_age seconds.
+        result: The last value returned by `get_transaction_status`.
+        attempts (int): The number of requeries sent.
+        age (float): The number of seconds between the submission of the transaction and its final state.
+    """
+
+    def __init__(self, request_id: str, status: str, result, attempts: int, age: float):
+        self.request_id = request_id
+        self.status = status
+        self.result = result
+        self.attempts = attempts
+        self.age = age
+
+    @property
+    def is_final(self) -> bool:
+        return self.status in FINAL_STATES
+
+    def __repr__(self):
+        return (
+            f"RequeryResult(request_id={self.request_id!r}, status={self.status!r}, "
+            f"attempts={self.attempts}, age={self.age:.1f}s)"
+        )
+
+
+class _PendingTransaction(object):
+    def __init__(self, request_id: str, submitted_at: float):
+        self.request_id = request_id
+        self.submitted_at = submitted_at
+        self.attempts = 0
+        self.status = None
+        self.result = None
+
+
+class RequeryScheduler(object):
+    """
+    Requery many pending transactions concurrently until each one reaches a final state.
+
+    Every transaction is requeried on its own schedule: the delay doubles after each attempt,
+    is scaled by the current state (see STATE_DELAY_FACTORS), never drops below a fraction
+    of the transaction's age and is jittered so that requeries do not arrive in bursts.
+
+    Attributes:
+        client (VtPassPythonSDK): The client used to call `get_transaction_status`, an
+            AsyncVtPassClient for `arun`.
+        url (str): The base URL for the VtPass API.
+        concurrency (int): The maximum number of requeries in flight.
+        base_delay (float): The delay in seconds before the second requery of a transaction.
+        max_delay (float): The longest delay in seconds between two requeries of a transaction.
+        age_factor (float): The minimum delay as a fraction of the transaction's age.
+        max_age (float): The number of seconds after which a transaction that is still not
+            final is reported with the "timeout" status.
+        on_result (callable): An optional callback called with every RequeryResult.
+    """
+
+    def __init__(
+        self,
+        client,
+        url: str,
+        concurrency: int = 10,
+        base_delay: float = 2.0,
+        max_delay: float = 120.0,
+        age_factor: float = 0.1,
+        max_age: float = 60 * 60,
+        on_result=None,
+    ):
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.client = client
+        self.url = url
+        self.concurrency = concurrency
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.age_factor = age_factor
+        self.max_age = max_age
+        self.on_result = on_result
+
+    def next_delay(self, transaction: _PendingTransaction, now: float) -> float:
+        """
+        :return: The number of seconds to wait before requerying the transaction again.
+        """
+        delay = self.base_delay * 2 ** (transaction.attempts - 1)
+        delay *= STATE_DELAY_FACTORS.get(transaction.status, 1.0)
+        delay = max(delay, (now - transaction.submitted_at) * self.age_factor)
+        delay = min(delay, self.max_delay)
+        # equal jitter: keep at least half of the delay so that the backoff still grows
+        return random.uniform(delay / 2, delay)
+
+    def _requery(self, transaction: _PendingTransaction):
+        return self.client.get_transaction_status(self.url, transaction.request_id)
+
+    def _finish(self, transaction: _PendingTransaction, status: str, now: float):
+        requery_result = RequeryResult(
+            transaction.request_id,
+            status,
+            transaction.result,
+            transaction.attempts,
+            now - transaction.submitted_at,
+        )
+        if self.on_result is not None:
+            self.on_result(requery_result)
+        return requery_result
+
+    def run(self, request_ids) -> list:
+        """
+        Requery the transactions until each one is final or older than max_age.
+
+        Use on_result to act on transactions as they settle.
+
+        :param request_ids: An iterable of request IDs, or a dictionary mapping request IDs to the
+            time.time() at which each transaction was submitted. Transactions given without a
+            submission time are considered submitted now.
+        :return: The list of RequeryResult, in the order of request_ids.
+        """
+        now = time.time()
+        if isinstance(request_ids, dict):
+            submitted = request_ids.items()
+        else:
+            submitted = ((request_id, now) for request_id in request_ids)
+        transactions = [
+            _PendingTransaction(request_id, submitted_at)
+            for request_id, submitted_at in submitted
+        ]
+
+        sequence = itertools.count()
+        # heap of (due time, sequence, transaction), the sequence breaks ties
+        due = [(now, next(sequence), transaction) for transaction in transactions]
+        heapq.heapify(due)
+        results = {}
+        logger.info("Requerying %s pending transactions", len(due))
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            in_flight = {}
+            while due or in_flight:
+                now = time.time()
+                while due and due[0][0] <= now and len(in_flight) < self.concurrency:
+                    _, _, transaction = heapq.heappop(due)
+                    transaction.attempts += 1
+                    in_flight[executor.submit(self._requery, transaction)] = transaction
+
+                timeout = None
+                if due and len(in_flight) < self.concurrency:
+                    timeout = max(due[0][0] - now, 0)
+                if not in_flight:
+                    time.sleep(timeout)
+                    continue
+                done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+
+                now = time.time()
+                for future in done:
+                    transaction = in_flight.pop(future)
+                    try:
+                        transaction.result = future.result()
+                    except Exception as err:
+                        transaction.result = f"An error occurred: {err}"
+                    transaction.status = transaction_state(transaction.result)
+
+                    if transaction.status in FINAL_STATES:
+                        results[transaction] = self._finish(
+                            transaction, transaction.status, now
+                        )
+                    elif now - transaction.submitted_at >= self.max_age:
+                        logger.error(
+                            "Transaction %s still not final after %s requeries",
+                            transaction.request_id,
+                            transaction.attempts,
+                        )
+                        results[transaction] = self._finish(transaction, "timeout", now)
+                    else:
+                        # requery one last time when max_age is reached
+                        due_at = min(
+                            now + self.next_delay(transaction, now),
+                            transaction.submitted_at + self.max_age,
+                        )
+                        heapq.heappush(due, (due_at, next(sequence), transaction))
+        return [results[transaction] for transaction in transactions]
+
+    async def _arequery_until_final(self, transaction, semaphore: asyncio.Semaphore):
+        while True:
+            async with semaphore:
+                transaction.attempts += 1
+                try:
+                    transaction.result = await self._requery(transaction)
+                except Exception as err:
+                    transaction.result = f"An error occurred: {err}"
+            now = time.time()
+            transaction.status = transaction_state(transaction.result)
+            if transaction.status in FINAL_STATES:
+                return self._finish(transaction, transaction.status, now)
+            if now - transaction.submitted_at >= self.max_age:
+                logger.error(
+                    "Transaction %s still not final after %s requeries",
+                    transaction.request_id,
+                    transaction.attempts,
+                )
+                return self._finish(transaction, "timeout", now)
+            # requery one last time when max_age is reached
+            due_at = min(
+                now + self.next_delay(transaction, now),
+                transaction.submitted_at + self.max_age,
+            )
+            await asyncio.sleep(max(due_at - now, 0))
+
+    async def arun(self, request_ids) -> list:
+        """
+        The coroutine counterpart of `run`, for an async client.
+
+        Every transaction is requeried by its own task, at most `concurrency` of them at once,
+        with the same schedule and the same result as `run`.
+
+        :param request_ids: An iterable of request IDs, or a dictionary mapping request IDs to the
+            time.time() at which each transaction was submitted.
+        :return: The list of RequeryResult, in the order of request_ids.
+        """
+        now = time.time()
+        if isinstance(request_ids, dict):
+            submitted = request_ids.items()
+        else:
+            submitted = ((request_id, now) for request_id in request_ids)
+        transactions = [
+            _PendingTransaction(request_id, submitted_at)
+            for request_id, submitted_at in submitted
+        ]
+        logger.info("Requerying %s pending transactions", len(transactions))
+        semaphore = asyncio.Semaphore(self.concurrency)
+        return list(
+            await asyncio.gather(
+                *(
+                    self._arequery_until_final(transaction, semaphore)
+                    for transaction in transactions
+                )
+            )
+        )
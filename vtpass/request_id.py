@@ -0,0 +1,83 @@
+import itertools
+import os
+import threading
+import time
+from datetime import datetime
+
+import pytz
+
+_generators = {}
+_generators_lock = threading.Lock()
+
+
+def _reset_process_state():
+    # A random salt per process plus a counter makes every request ID unique. A forked child
+    # gets a new salt so that it does not hand out the same IDs as its parent.
+    global _salt, _counter
+    _salt = os.urandom(8).hex()
+    _counter = itertools.count()
+
+
+_reset_process_state()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_process_state)
+
+
+class RequestIdGenerator(object):
+    """
+    Generate request IDs in the format expected by VtPass.
+
+    A request ID starts with the current date and time in the configured timezone
+    (YYYYMMDDHHII) followed by 32 hexadecimal characters, a random per-process salt and a
+    counter, so IDs are unique within the process and collision free across processes.
+    The timezone is resolved once and the timestamp prefix is only formatted once per minute.
+
+    Attributes:
+        timezone (pytz.tzinfo.BaseTzInfo): The timezone of the timestamp prefix, e.g Africa/Lagos.
+    """
+
+    def __init__(self, timezone: str):
+        self.timezone = pytz.timezone(timezone)
+        self._minute_prefix = (None, None)
+
+    def _prefix(self) -> str:
+        now = time.time()
+        minute = int(now // 60)
+        cached_minute, prefix = self._minute_prefix
+        if cached_minute != minute:
+            prefix = datetime.fromtimestamp(now, self.timezone).strftime("%Y%m%d%H%M")
+            self._minute_prefix = (minute, prefix)
+        return prefix
+
+    def generate(self) -> str:
+        """
+        :return: A new request ID.
+        """
+        return f"{self._prefix()}{_salt}{next(_counter):016x}"
+
+    def generate_many(self, count: int) -> list:
+        """
+        Generate many request IDs at once, sharing a single timestamp prefix.
+
+        :param count: The number of request IDs to generate.
+        :return: A list of new request IDs.
+        """
+        prefix = f"{self._prefix()}{_salt}"
+        counter = _counter
+        return [f"{prefix}{next(counter):016x}" for _ in range(count)]
+
+
+def get_request_id_generator(timezone: str):
+    """
+    Return the request ID generator shared by every client for the given timezone.
+
+    :param timezone: The timezone of the timestamp prefix, e.g Africa/Lagos.
+    :return: A RequestIdGenerator.
+    """
+    generator = _generators.get(timezone)
+    if generator is None:
+        with _generators_lock:
+            generator = _generators.get(timezone)
+            if generator is None:
+                generator = _generators[timezone] = RequestIdGenerator(timezone)
+    return generator
@@ -0,0 +1,165 @@
+import os
+import random
+import threading
+import time
+
+# The class of every VtPass endpoint. Each class has its own timeouts and retry policy.
+ENDPOINT_CLASSES = {
+    "balance": "catalog",
+    "service-categories": "catalog",
+    "services": "catalog",
+    "service-variations": "catalog",
+    "options": "catalog",
+    "merchant-verify": "merchant-verify",
+    "pay": "pay",
+    "requery": "requery",
+}
+
+# Default settings of each endpoint class. /pay gets a long read timeout since VtPass
+# waits for the biller before answering.
+DEFAULT_POLICIES = {
+    "catalog": {"read_timeout": 10.0, "max_retries": 3, "deadline": 30.0},
+    "merchant-verify": {"read_timeout": 20.0, "max_retries": 2, "deadline": 45.0},
+    "pay": {"read_timeout": 60.0, "max_retries": 2, "deadline": 150.0},
+    "requery": {"read_timeout": 15.0, "max_retries": 3, "deadline": 45.0},
+}
+
+# HTTP statuses worth retrying, any other HTTP error is returned straight away
+RETRY_STATUS_CODES = frozenset((429, 500, 502, 503, 504))
+
+# Outcomes of a failed attempt that can be retried
+NOT_SENT = "not-sent"  # the request never reached VtPass, resending it is always safe
+MAYBE_SENT = "maybe-sent"  # VtPass may have received and processed the request
+
+# The requery response code for a request ID VtPass does not know about
+UNKNOWN_REQUEST_ID_CODE = "015"
+
+_policies = None
+_policies_lock = threading.Lock()
+
+
+class RetryPolicy(object):
+    """
+    Timeouts, retries and deadline of one endpoint class.
+
+    Attributes:
+        connect_timeout (float): The number of seconds to wait for a connection to VtPass.
+        read_timeout (float): The number of seconds to wait for VtPass to answer.
+        max_retries (int): The number of times a failed attempt is retried.
+        backoff (float): The delay in seconds before the first retry, doubled after each retry.
+        max_backoff (float): The longest delay in seconds between two attempts.
+        deadline (float): The number of seconds a call may take, retries included. The read
+            timeout of the last attempts is shortened so that the call ends in time.
+    """
+
+    def __init__(
+        self,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 30.0,
+        max_retries: int = 2,
+        backoff: float = 0.5,
+        max_backoff: float = 8.0,
+        deadline: float = 60.0,
+    ):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.deadline = deadline
+
+    def timeout(self, deadline_at: float) -> tuple:
+        """
+        :param deadline_at: The time.monotonic() at which the call must be over.
+        :return: The (connect, read) timeouts of the next attempt.
+        """
+        remaining = max(deadline_at - time.monotonic(), 0.001)
+        return (min(self.connect_timeout, remaining), min(self.read_timeout, remaining))
+
+    def retry_delay(self, attempt: int, deadline_at: float):
+        """
+        :param attempt: The number of the attempt that just failed, starting at 1.
+        :param deadline_at: The time.monotonic() at which the call must be over.
+        :return: The number of seconds to wait before retrying, or None if the call should not
+            be retried because it ran out of retries or time.
+        """
+        if attempt > self.max_retries:
+            return None
+        # full jitter, so that clients failing together do not retry together
+        delay = random.uniform(
+            0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        )
+        if time.monotonic() + delay >= deadline_at:
+            return None
+        return delay
+
+    def __repr__(self):
+        return (
+            f"RetryPolicy(connect_timeout={self.connect_timeout}, read_timeout={self.read_timeout}, "
+            f"max_retries={self.max_retries}, deadline={self.deadline})"
+        )
+
+
+def policy_from_env(endpoint_class: str) -> RetryPolicy:
+    """
+    Build the policy of an endpoint class from the environment.
+
+    Every setting can be overridden with an environment variable named after the class, e.g
+    PAY_CONNECT_TIMEOUT, PAY_READ_TIMEOUT, PAY_MAX_RETRIES and PAY_DEADLINE, or
+    MERCHANT_VERIFY_READ_TIMEOUT for the merchant-verify class.
+
+    :param endpoint_class: One of catalog, merchant-verify, pay and requery.
+    :return: A RetryPolicy.
+    """
+    prefix = endpoint_class.upper().replace("-", "_")
+    settings = dict(DEFAULT_POLICIES[endpoint_class])
+    for name, cast in (
+        ("connect_timeout", float),
+        ("read_timeout", float),
+        ("max_retries", int),
+        ("deadline", float),
+    ):
+        value = os.getenv(f"{prefix}_{name.upper()}")
+        if value:
+            settings[name] = cast(value)
+    return RetryPolicy(**settings)
+
+
+def get_retry_policies() -> dict:
+    """
+    Return the policies shared by every client that was not given its own, reading the
+    environment on first use.
+
+    :return: A dictionary mapping each endpoint class to its RetryPolicy.
+    """
+    global _policies
+    if _policies is None:
+        with _policies_lock:
+            if _policies is None:
+                _policies = {
+                    endpoint_class: policy_from_env(endpoint_class)
+                    for endpoint_class in DEFAULT_POLICIES
+                }
+    return _policies
+
+
+def policy_for(policies: dict, endpoint: str) -> RetryPolicy:
+    """
+    :param policies: A dictionary mapping endpoint classes to policies.
+    :param endpoint: The VtPass endpoint, e.g pay, merchant-verify, service-variations.
+    :return: The policy of the endpoint's class.
+    """
+    return policies[ENDPOINT_CLASSES.get(endpoint, "catalog")]
+
+
+def status_outcome(status_code: int):
+    """
+    :param status_code: The HTTP status of a failed response.
+    :return: NOT_SENT if the request was rejected before being processed, MAYBE_SENT if it may
+        have been processed, None if it should not be retried.
+    """
+    if status_code == 429:
+        return NOT_SENT
+    if status_code in RETRY_STATUS_CODES:
+        return MAYBE_SENT
+    return None
@@ -0,0 +1,111 @@
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Number of per-host connection pools kept alive by the shared session
+DEFAULT_POOL_CONNECTIONS = 10
+# Maximum number of connections kept open to a single host
+DEFAULT_POOL_MAXSIZE = 10
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value == "True"
+
+
+def build_session(
+    pool_connections: int = None,
+    pool_maxsize: int = None,
+    pool_block: bool = None,
+    keep_alive: bool = None,
+):
+    """
+    Build a pooled requests.Session for talking to the VtPass API.
+
+    Any argument left as None falls back to its environment variable
+    (POOL_CONNECTIONS, POOL_MAXSIZE, POOL_BLOCK, KEEP_ALIVE) and then to the defaults.
+    When a cassette is configured through CASSETTE_PATH, requests go through it, see `vtpass.cassette`.
+
+    :param pool_connections: The number of host pools to cache.
+    :param pool_maxsize: The maximum number of connections kept open per host.
+    :param pool_block: Wait for a free connection instead of opening one past pool_maxsize.
+    :param keep_alive: Reuse connections between calls. Set to False to close each connection after use.
+    :return: A configured requests.Session.
+    """
+    if pool_connections is None:
+        pool_connections = int(os.getenv("POOL_CONNECTIONS", DEFAULT_POOL_CONNECTIONS))
+    if pool_maxsize is None:
+        pool_maxsize = int(os.getenv("POOL_MAXSIZE", DEFAULT_POOL_MAXSIZE))
+    if pool_block is None:
+        pool_block = _env_flag("POOL_BLOCK", False)
+    if keep_alive is None:
+        keep_alive = _env_flag("KEEP_ALIVE", True)
+
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        pool_block=pool_block,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if not keep_alive:
+        session.headers["Connection"] = "close"
+    # imported here, the cassette is a testing aid most programs never load
+    from vtpass.cassette import get_cassette
+
+    cassette = get_cassette()
+    if cassette is not None:
+        cassette.mount(session)
+    return session
+
+
+def get_session():
+    """
+    Return the session shared by every VtPass client, creating it on first use.
+
+    :return: The shared requests.Session.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = build_session()
+    return _session
+
+
+def configure_session(**kwargs):
+    """
+    Replace the shared session with one built from the given pool settings.
+
+    Every client that was not given its own session picks up the new one on its next call.
+    Accepts the same keyword arguments as `build_session`.
+
+    :return: The new shared requests.Session.
+    """
+    global _session
+    with _session_lock:
+        old_session = _session
+        _session = build_session(**kwargs)
+    if old_session is not None:
+        old_session.close()
+    return _session
+
+
+def close_session():
+    """
+    Close the shared session and release its pooled connections.
+    """
+    global _session
+    with _session_lock:
+        old_session = _session
+        _session = None
+    if old_session is not None:
+        old_session.close()
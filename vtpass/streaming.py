@@ -0,0 +1,233 @@
+import codecs
+import json
+import re
+
+# The fields kept by the projected mode of `iter_service_variations`
+VARIATION_FIELDS = ("variation_code", "name", "variation_amount")
+# The number of bytes read from the network at a time when streaming a response
+STREAM_CHUNK_SIZE = 16 * 1024
+# The most characters an array item may span before it is reported as malformed
+MAX_ITEM_SIZE = 1024 * 1024
+# The most characters of a document without the array kept to report it
+_HEAD_SIZE = 512
+# An item failing to decode this many characters before the end of the buffer will not decode
+# with more data: no token the decoder can stop on while incomplete is longer, e.g -Infinity
+_DECODE_LOOKAHEAD = 16
+
+_SEEK_KEY = 0
+_SEEK_ARRAY = 1
+_IN_ARRAY = 2
+_DONE = 3
+
+_WHITESPACE = re.compile(r"\s*")
+_ITEM_SEPARATOR = re.compile(r"[\s,]*")
+
+
+def project(item, fields=None):
+    """
+    :param item: A decoded array item.
+    :param fields: The keys to keep, None to keep the item as it is.
+    :return: A dictionary with only the given keys of the item, or the item itself.
+    """
+    if fields is None or not isinstance(item, dict):
+        return item
+    return {field: item.get(field) for field in fields}
+
+
+class JsonArrayStream(object):
+    """
+    An incremental parser for the items of one array of a JSON document arriving in chunks.
+
+    The parser looks for the first "key": [ in the document and decodes the items of that array
+    one at a time as their bytes arrive, so the whole body is never held in memory, nor decoded
+    into a single dictionary. The rest of the document is skipped without being decoded. Call
+    `close` at the end of the document, to know whether it was cut off inside the array or
+    had no such array at all, e.g an error response.
+
+    Attributes:
+        key (str): The key of the array, e.g varations.
+        fields (tuple): The keys kept of every item, None to keep whole items.
+        max_item_size (int): The most characters an item may span, past which it is reported
+            as malformed instead of waiting for more data.
+    """
+
+    def __init__(self, key: str, fields=None, max_item_size: int = MAX_ITEM_SIZE):
+        self.key = key
+        self.fields = tuple(fields) if fields is not None else None
+        self.max_item_size = max_item_size
+        self._marker = json.dumps(key)
+        self._decode_bytes = codecs.getincrementaldecoder("utf-8")().decode
+        self._raw_decode = json.JSONDecoder().raw_decode
+        self._buffer = ""
+        self._state = _SEEK_KEY
+        # the start of the document, to report a document without the key
+        self._head = ""
+
+    @property
+    def done(self) -> bool:
+        """
+        Whether the end of the array was reached.
+        """
+        return self._state == _DONE
+
+    def feed(self, chunk: bytes) -> list:
+        """
+        Parse the next chunk of the document.
+
+        :param chunk: The next bytes of the document.
+        :return: The list of the items completed by this chunk, projected on `fields`.
+        :raises json.JSONDecodeError: If an item of the array is malformed.
+        """
+        if self._state == _DONE:
+            return []
+        text = self._decode_bytes(chunk)
+        buffer = self._buffer + text
+        position = 0
+        items = []
+        if self._state == _SEEK_KEY:
+            if len(self._head) < _HEAD_SIZE:
+                self._head += text[: _HEAD_SIZE - len(self._head)]
+            position = self._find_key(buffer)
+            if position is None:
+                return items
+            self._state = _SEEK_ARRAY
+        if self._state == _SEEK_ARRAY:
+            position = _WHITESPACE.match(buffer, position).end()
+            if position == len(buffer):
+                self._buffer = buffer[position:]
+                return items
+            if buffer[position] != "[":
+                # the key does not hold an array, e.g null
+                self._state = _DONE
+                self._buffer = ""
+                return items
+            position += 1
+            self._state = _IN_ARRAY
+
+        raw_decode = self._raw_decode
+        fields = self.fields
+        length = len(buffer)
+        while True:
+            position = _ITEM_SEPARATOR.match(buffer, position).end()
+            if position == length:
+                break
+            if buffer[position] == "]":
+                self._state = _DONE
+                position = length
+                break
+            try:
+                item, end = raw_decode(buffer, position)
+            except json.JSONDecodeError as err:
+                if self._is_incomplete(err, length - position):
+                    break
+                raise
+            if end == length:
+                # a number may go on in the next chunk, an array item is always followed by , or ]
+                break
+            items.append(project(item, fields) if fields is not None else item)
+            position = end
+        self._buffer = buffer[position:]
+        return items
+
+    def _find_key(self, buffer: str):
+        # the position after the colon following the key, None when more data is needed.
+        # The key name may also appear as a value, which is not followed by a colon.
+        marker = self._marker
+        start = 0
+        while True:
+            index = buffer.find(marker, start)
+            if index < 0:
+                # keep what may be the start of the key
+                self._buffer = buffer[-len(marker) + 1 :]
+                return None
+            position = _WHITESPACE.match(buffer, index + len(marker)).end()
+            if position == len(buffer):
+                self._buffer = buffer[index:]
+                return None
+            if buffer[position] == ":":
+                return position + 1
+            start = index + 1
+
+    def _is_incomplete(self, error: json.JSONDecodeError, size: int) -> bool:
+        # whether the item failed to decode because the rest of it is in the next chunks
+        if size > self.max_item_size:
+            raise json.JSONDecodeError(
+                f"Item of the {self.key} array longer than {self.max_item_size} characters",
+                error.doc,
+                error.pos,
+            )
+        if error.msg.startswith("Unterminated string"):
+            return True
+        return len(error.doc) - error.pos <= _DECODE_LOOKAHEAD
+
+    def close(self):
+        """
+        Signal the end of the document.
+
+        :raises ValueError: If the document has no such array, e.g an error response, or ended
+            after the key and before the end of its array.
+        """
+        if self._state == _SEEK_KEY:
+            raise ValueError(missing_array_message(self._head, self.key))
+        if self._state == _IN_ARRAY:
+            # report a malformed last item as such rather than as a cut off one
+            buffer = self._buffer
+            position = _ITEM_SEPARATOR.match(buffer).end()
+            if position < len(buffer):
+                self._raw_decode(buffer, position)
+        if self._state in (_SEEK_ARRAY, _IN_ARRAY):
+            raise ValueError(
+                f"The document ended before the end of the {self.key} array"
+            )
+
+
+def missing_array_message(document, key: str) -> str:
+    """
+    :param document: A response without the array, parsed or the start of its text.
+    :param key: The key of the array.
+    :return: The error message, with the errors of the response when it has some.
+    """
+    if isinstance(document, str):
+        try:
+            document = json.loads(document)
+        except ValueError:
+            # cut off at _HEAD_SIZE characters
+            pass
+    if isinstance(document, dict) and "errors" in document:
+        document = document["errors"]
+    return f"The response has no {key} array: {document}"
+
+
+def iter_json_array(chunks, key: str, fields=None):
+    """
+    Yield the items of an array of a JSON document one at a time, as the document is read.
+
+    :param chunks: An iterable of the bytes of the document, e.g `response.iter_content()`.
+    :param key: The key of the array, e.g varations.
+    :param fields: The keys kept of every item, None to keep whole items.
+    :return: A generator of the items of the array.
+    :raises ValueError: If the document is malformed, has no such array or is cut off inside it.
+    """
+    stream = JsonArrayStream(key, fields)
+    for chunk in chunks:
+        yield from stream.feed(chunk)
+        if stream.done:
+            return
+    stream.close()
+
+
+def items_of(result, key: str, fields=None) -> list:
+    """
+    :param result: An already parsed response, e.g returned by a hook.
+    :param key: The key of the array in the response or its content.
+    :param fields: The keys kept of every item, None to keep whole items.
+    :return: The items of the array, an empty list if the key holds no array, e.g null.
+    :raises ValueError: If the response has no such key, e.g an error response.
+    """
+    content = result.get("content", result) if isinstance(result, dict) else None
+    if not isinstance(content, dict) or key not in content:
+        raise ValueError(missing_array_message(result, key))
+    items = content[key]
+    if not isinstance(items, list):
+        return []
+    return [project(item, fields) for item in items]
@@ -0,0 +1,208 @@
+import contextvars
+import inspect
+import logging
+import time
+
+from vtpass.log import log_response
+
+logger = logging.getLogger(__name__)
+
+# The events a hook can be registered for
+HOOK_EVENTS = ("before_send", "after_receive", "on_error")
+
+# Set while an async client runs the before_send hooks, see `in_async_pipeline`
+_async_pipeline = contextvars.ContextVar("vtpass_async_pipeline", default=False)
+
+
+def in_async_pipeline() -> bool:
+    """
+    Whether the before_send hook being run was called by an async client, so it may return
+    an awaitable instead of blocking the event loop.
+    """
+    return _async_pipeline.get()
+
+
+class VtPassRequest(object):
+    """
+    A request travelling through the SDK pipeline. Every hook receives it.
+
+    Attributes:
+        method (str): The HTTP method, GET or POST.
+        url (str): The full URL of the endpoint.
+        endpoint (str): The VtPass endpoint, e.g pay, merchant-verify, requery, service-variations.
+        data (dict): The JSON body of a POST request, None for GET requests.
+        service_id (str): The serviceID the request is about, None when it is not about a service.
+        headers (dict): The headers sent with the request, hooks may change them.
+        context (dict): Free space for hooks to share state between events of the same request.
+        attempt (int): The number of the current attempt, starting at 1, see `vtpass.retry`.
+        started_at (float): The time.perf_counter() value when the request was created.
+    """
+
+    __slots__ = (
+        "method",
+        "url",
+        "endpoint",
+        "data",
+        "service_id",
+        "headers",
+        "context",
+        "attempt",
+        "started_at",
+    )
+
+    def __init__(
+        self,
+        method: str,
+        url: str,
+        endpoint: str,
+        data: dict = None,
+        service_id: str = None,
+        headers: dict = None,
+    ):
+        self.method = method
+        self.url = url
+        self.endpoint = endpoint
+        self.data = data
+        self.service_id = service_id
+        self.headers = headers
+        self.context = {}
+        self.attempt = 0
+        self.started_at = time.perf_counter()
+
+    def __repr__(self):
+        return f"VtPassRequest({self.method} {self.endpoint}, service_id={self.service_id!r})"
+
+
+class Hooks(object):
+    """
+    Callables run by the request pipeline around every call to the VtPass API.
+
+    - before_send(request): called before each attempt is sent. Returning anything other than
+      None skips the network and uses that value as the parsed JSON response. Raising an
+      exception fails the call the same way a network error does. When run by an async client
+      (see `in_async_pipeline`) it may return an awaitable, whose result is used instead.
+    - after_receive(request, response, result): called with the HTTP response and its parsed
+      JSON once a response with a successful HTTP status arrived. The call already succeeded
+      by then, so an exception raised by the hook is logged and does not fail it.
+    - on_error(request, error): called when an attempt failed, with the exception raised.
+      It runs once per failed attempt, so a call that is retried may trigger it several times.
+
+    When no hook is registered for an event the pipeline skips that event entirely.
+    """
+
+    def __init__(self):
+        self.before_send = []
+        self.after_receive = []
+        self.on_error = []
+
+    def register(self, event: str, hook):
+        """
+        Register a hook for an event.
+
+        :param event: One of before_send, after_receive and on_error.
+        :param hook: The callable to run.
+        :return: The hook.
+        """
+        if event not in HOOK_EVENTS:
+            raise ValueError(
+                f"Unknown hook event {event!r}, expected one of {HOOK_EVENTS}"
+            )
+        getattr(self, event).append(hook)
+        return hook
+
+    def unregister(self, event: str, hook):
+        """
+        Remove a hook registered for an event, if it is registered.
+        """
+        hooks = getattr(self, event)
+        if hook in hooks:
+            hooks.remove(hook)
+
+    def run_before_send(self, request: VtPassRequest):
+        for hook in self.before_send:
+            result = hook(request)
+            if result is not None:
+                return result
+        return None
+
+    async def arun_before_send(self, request: VtPassRequest):
+        token = _async_pipeline.set(True)
+        try:
+            for hook in self.before_send:
+                result = hook(request)
+                if inspect.isawaitable(result):
+                    result = await result
+                if result is not None:
+                    return result
+            return None
+        finally:
+            _async_pipeline.reset(token)
+
+    def run_after_receive(self, request: VtPassRequest, response, result):
+        for hook in self.after_receive:
+            try:
+                hook(request, response, result)
+            except Exception as err:
+                logger.error("after_receive hook %r failed: %s", hook, err)
+
+    def run_on_error(self, request: VtPassRequest, error: Exception):
+        for hook in self.on_error:
+            try:
+                hook(request, error)
+            except Exception as err:
+                logger.error("on_error hook %r failed: %s", hook, err)
+
+
+# The hooks shared by every client that was not given its own
+default_hooks = Hooks()
+
+
+def shape_result(
+    request: VtPassRequest,
+    result,
+    jr: str,
+    success_message: str,
+    extract=None,
+    error_level: int = logging.INFO,
+):
+    """
+    Turn a parsed VtPass response into what the SDK methods return.
+
+    GET responses carrying an "errors" key and POST responses whose "code" is not "000"
+    are returned as they are. Successful responses return the "content" unless
+    JSON_RESPONSE is "True", in which case the full response is returned.
+
+    :param request: The request the response belongs to.
+    :param result: The parsed JSON response.
+    :param jr: The JSON_RESPONSE setting of the client.
+    :param success_message: The message of the success event, see `vtpass.log.log_response`.
+    :param extract: An optional callable turning a successful response into the returned value.
+    :param error_level: The level GET responses carrying an "errors" key are logged at.
+    :return: The value returned to the caller.
+    """
+    if request.method == "GET":
+        if "errors" in result:
+            log_response(
+                request,
+                error_level,
+                "An Error Response received",
+                result.get("code"),
+                detail=result["errors"],
+            )
+            return result
+    elif "code" in result and result["code"] != "000":
+        log_response(
+            request,
+            logging.ERROR,
+            "An Error Response received",
+            result["code"],
+            detail=result,
+        )
+        return result
+    log_response(request, logging.INFO, success_message, result.get("code"), True)
+    if extract is not None:
+        return extract(result)
+    if jr == "True":
+        return result
+    else:
+        return result.get("content")
@@ -0,0 +1,165 @@
+import copy
+import enum
+import threading
+from typing import List
+
+from pydantic import VERSION as PYDANTIC_VERSION
+from pydantic import TypeAdapter, ValidationError
+
+_adapters = {}
+_adapters_lock = threading.Lock()
+# The field template of each schema the trusted fast path can build, None for the other schemas
+_construct_templates = {}
+# The fast path assembles instances the way model_construct of this pydantic release does,
+# the release setup.py pins. Other releases go through model_construct.
+_CONSTRUCT_FAST_PATH = PYDANTIC_VERSION.startswith("2.7.")
+# Defaults of these types can be shared between instances
+_IMMUTABLE_TYPES = (type(None), bool, int, float, complex, str, bytes, enum.Enum)
+
+
+def get_list_adapter(schema) -> TypeAdapter:
+    """
+    Return the TypeAdapter validating a list of `schema`, building it on first use.
+
+    Building an adapter compiles a validator, so adapters are built once per schema and shared.
+
+    :param schema: A pydantic model class, e.g AirtimeSchema.
+    :return: A TypeAdapter for List[schema].
+    """
+    adapter = _adapters.get(schema)
+    if adapter is None:
+        with _adapters_lock:
+            adapter = _adapters.get(schema)
+            if adapter is None:
+                adapter = _adapters[schema] = TypeAdapter(List[schema])
+    return adapter
+
+
+def validate_many(schema, rows) -> list:
+    """
+    Validate a batch of dictionaries into schemas in one pass.
+
+    The whole batch goes through a single compiled list validator instead of one model
+    construction per row, running the same validators as `schema(**row)`.
+
+    :param schema: A pydantic model class, e.g AirtimeSchema.
+    :param rows: A list of dictionaries with the fields of the schema.
+    :return: A list of schema instances, in the order of the rows.
+    :raises pydantic.ValidationError: If any row is invalid. The location of each error
+        starts with the index of its row.
+    """
+    return get_list_adapter(schema).validate_python(rows)
+
+
+def validate_rows(schema, rows) -> tuple:
+    """
+    Validate a batch of dictionaries into schemas, keeping the valid rows when some are invalid.
+
+    :param schema: A pydantic model class, e.g AirtimeSchema.
+    :param rows: A list of dictionaries with the fields of the schema.
+    :return: A tuple of the list of (index, schema instance) of the valid rows and a dictionary
+        mapping the index of every invalid row to its list of pydantic errors.
+    """
+    adapter = get_list_adapter(schema)
+    try:
+        return list(enumerate(adapter.validate_python(rows))), {}
+    except ValidationError as err:
+        errors = {}
+        for error in err.errors():
+            index, *loc = error["loc"]
+            errors.setdefault(index, []).append(dict(error, loc=tuple(loc)))
+    valid_indexes = [index for index in range(len(rows)) if index not in errors]
+    models = adapter.validate_python([rows[index] for index in valid_indexes])
+    return list(zip(valid_indexes, models)), errors
+
+
+def _is_immutable(value) -> bool:
+    if isinstance(value, (tuple, frozenset)):
+        return all(_is_immutable(item) for item in value)
+    return isinstance(value, _IMMUTABLE_TYPES)
+
+
+def _get_construct_template(schema):
+    # The fast path only covers schemas whose construction is plain attribute assignment:
+    # no aliases, default factories, extra fields, private attributes or post init.
+    # The template holds every field in declaration order, with the defaults of optional fields,
+    # and the fields whose default must be copied for every instance, as model_construct does.
+    try:
+        return _construct_templates[schema]
+    except KeyError:
+        pass
+    template = {}
+    required = set()
+    mutable = []
+    for name, field in schema.model_fields.items():
+        if field.alias is not None or field.default_factory is not None:
+            template = None
+            break
+        if field.is_required():
+            template[name] = None
+            required.add(name)
+        else:
+            template[name] = field.default
+            if not _is_immutable(field.default):
+                mutable.append(name)
+    if (
+        not _CONSTRUCT_FAST_PATH
+        or template is None
+        or schema.__pydantic_post_init__
+        or schema.__pydantic_root_model__
+        or schema.__private_attributes__
+        or schema.model_config.get("extra") == "allow"
+    ):
+        _construct_templates[schema] = None
+    else:
+        _construct_templates[schema] = (template, frozenset(required), tuple(mutable))
+    return _construct_templates[schema]
+
+
+def construct_many(schema, rows) -> list:
+    """
+    Build schemas from rows that were already validated, without running any validator.
+
+    This is the trusted fast path, e.g for rows read back from a file written by `validate_many`.
+    Values are stored as they are, so rows must hold exactly what validation would produce,
+    with enum fields as their plain values. Keys that are not fields of the schema are dropped
+    and mutable defaults are copied for every instance, as `model_construct` does.
+
+    For plain schemas, like the ones of this SDK, the instances are assembled directly, the way
+    `model_construct` of the pinned pydantic release assembles them, which is up to twice as
+    cheap as validating them and three times cheaper than `model_construct`. Other schemas, and
+    other pydantic releases, go through `model_construct`.
+
+    :param schema: A pydantic model class, e.g AirtimeSchema.
+    :param rows: An iterable of dictionaries with the fields of the schema.
+    :return: A list of schema instances, in the order of the rows.
+    """
+    template = _get_construct_template(schema)
+    construct = schema.model_construct
+    if template is None:
+        return [construct(**row) for row in rows]
+    template, required, mutable = template
+    deepcopy = copy.deepcopy
+    fields = template.keys()
+    new = object.__new__
+    set_attribute = object.__setattr__
+    models = []
+    for row in rows:
+        if not row.keys() <= fields:
+            row = {name: value for name, value in row.items() if name in fields}
+        if not required <= row.keys():
+            # model_construct leaves missing required fields unset
+            models.append(construct(**row))
+            continue
+        values = template.copy()
+        values.update(row)
+        for name in mutable:
+            if name not in row:
+                values[name] = deepcopy(values[name])
+        model = new(schema)
+        set_attribute(model, "__dict__", values)
+        set_attribute(model, "__pydantic_fields_set__", set(row))
+        set_attribute(model, "__pydantic_extra__", None)
+        set_attribute(model, "__pydantic_private__", None)
+        models.append(model)
+    return models
@@ -0,0 +1,233 @@
+import logging
+import threading
+
+from vtpass.bulk import run_bulk
+from vtpass.schema import ServiceIdSchema
+
+logger = logging.getLogger(__name__)
+
+
+class Variation(object):
+    """
+    A variation of a service as returned by `get_service_variation_codes`.
+
+    Attributes:
+        service_id (str): The serviceID of the service, e.g dstv.
+        variation_code (str): The variation code, e.g dstv-padi.
+        name (str): The name of the variation.
+        amount (float): The variation_amount of the variation.
+        fixed_price (bool): Whether VtPass charges the variation amount whatever amount is sent.
+    """
+
+    __slots__ = ("service_id", "variation_code", "name", "amount", "fixed_price")
+
+    def __init__(
+        self,
+        service_id: str,
+        variation_code: str,
+        name: str,
+        amount: float,
+        fixed_price: bool,
+    ):
+        self.service_id = service_id
+        self.variation_code = variation_code
+        self.name = name
+        self.amount = amount
+        self.fixed_price = fixed_price
+
+    def __repr__(self):
+        return (
+            f"Variation({self.service_id}/{self.variation_code}, name={self.name!r}, "
+            f"amount={self.amount}, fixed_price={self.fixed_price})"
+        )
+
+
+def parse_variations(service_id: str, result) -> list:
+    """
+    Turn a `get_service_variation_codes` result into Variation objects.
+
+    :param service_id: The serviceID the variations were requested for.
+    :param result: The value returned by `get_service_variation_codes`, the content or the full response.
+    :return: A list of Variation, or None if the result is not a successful response.
+    """
+    if not isinstance(result, dict):
+        return None
+    content = result.get("content", result)
+    if not isinstance(content, dict):
+        return None
+    # "varations" is how the VtPass API spells it
+    variations = content.get("varations", content.get("variations"))
+    if not isinstance(variations, list):
+        return None
+    parsed = []
+    for variation in variations:
+        amount = variation.get("variation_amount")
+        parsed.append(
+            Variation(
+                service_id,
+                variation.get("variation_code"),
+                variation.get("name"),
+                float(amount) if amount not in (None, "") else None,
+                str(variation.get("fixedPrice", "")).lower() == "yes",
+            )
+        )
+    return parsed
+
+
+class VariationIndex(object):
+    """
+    An in-memory index of the variation codes of services, to check purchases before sending them.
+
+    The index maps every (serviceID, variation_code) pair to its Variation, so a purchase with an
+    unknown variation code is rejected without a /pay round trip and the amount of a fixed price
+    variation is filled in, both with a single dictionary lookup. Services that were never
+    loaded are not checked.
+
+    Lookups never lock: a load builds a new dictionary and swaps it in, keeping the variations of
+    services that failed to load.
+
+    Attributes:
+        client (VtPassPythonSDK): The client used to call `get_service_variation_codes`.
+        url (str): The base URL for the VtPass API.
+        service_ids (set): The serviceIDs loaded so far, reloaded by `refresh`.
+    """
+
+    def __init__(self, client, url: str, service_ids=()):
+        self.client = client
+        self.url = url
+        self.service_ids = set()
+        self._variations = {}
+        self._refresh_stop = None
+        self._refresh_thread = None
+        if service_ids:
+            self.load(service_ids)
+
+    def load(self, service_ids, concurrency: int = 10) -> set:
+        """
+        Load the variation codes of services, replacing what the index knew about them.
+
+        :param service_ids: An iterable of serviceIDs, e.g ["dstv", "mtn-data", "waec"].
+        :param concurrency: The maximum number of requests in flight.
+        :return: The set of serviceIDs that failed to load.
+        :raises TypeError: If service_ids is a single string.
+        """
+        if isinstance(service_ids, str):
+            raise TypeError(
+                f"service_ids must be an iterable of serviceIDs, not the string {service_ids!r}"
+            )
+        service_ids = set(service_ids)
+        client = self.client
+        cache = getattr(client, "cache", None)
+        if cache is not None:
+            # the index is only as fresh as the responses it is built from, the cached
+            # variations of the other services are left alone
+            for service_id in service_ids:
+                cache.delete(
+                    "service-variations",
+                    self.url,
+                    ServiceIdSchema(service_id=service_id),
+                )
+        loaded = {}
+        failed = set()
+        for service_id, result in run_bulk(
+            lambda service_id: client.get_service_variation_codes(
+                self.url, ServiceIdSchema(service_id=service_id)
+            ),
+            service_ids,
+            concurrency=concurrency,
+        ):
+            variations = parse_variations(service_id, result)
+            if variations is None:
+                logger.error(
+                    "Could not load the variation codes of %s: %s", service_id, result
+                )
+                failed.add(service_id)
+            else:
+                loaded[service_id] = variations
+
+        index = {
+            key: variation
+            for key, variation in self._variations.items()
+            if key[0] not in loaded
+        }
+        for service_id, variations in loaded.items():
+            for variation in variations:
+                index[(service_id, variation.variation_code)] = variation
+        self._variations = index
+        self.service_ids.update(loaded)
+        logger.info(
+            "Variation index loaded %s services, %s variations", len(loaded), len(index)
+        )
+        return failed
+
+    def refresh(self) -> set:
+        """
+        Reload every service loaded so far.
+
+        :return: The set of serviceIDs that failed to load.
+        """
+        return self.load(set(self.service_ids))
+
+    def get(self, service_id: str, variation_code: str):
+        """
+        :return: The Variation of a serviceID and variation code, or None if it is not in the index.
+        """
+        return self._variations.get((service_id, variation_code))
+
+    def __len__(self):
+        return len(self._variations)
+
+    def check(self, service_id: str, variation_code: str, amount=None):
+        """
+        Check a purchase against the index.
+
+        :param service_id: The serviceID of the purchase.
+        :param variation_code: The variation code of the purchase.
+        :param amount: The amount of the purchase, None if it was not given.
+        :return: A tuple of the amount to send and an error message. The amount of a fixed price
+            variation is its variation amount. The error message is None unless the serviceID
+            is in the index and the variation code is not.
+        """
+        variation = self._variations.get((service_id, variation_code))
+        if variation is None:
+            if service_id in self.service_ids:
+                message = f"Unknown variation code {variation_code!r} for {service_id}"
+                logger.error(message)
+                return amount, f"An error occurred: {message}"
+            return amount, None
+        if variation.amount is not None and (variation.fixed_price or amount is None):
+            amount = variation.amount
+            if amount.is_integer():
+                amount = int(amount)
+        return amount, None
+
+    def start_refresh(self, interval: float = 60 * 60):
+        """
+        Refresh the index every `interval` seconds in a background thread.
+
+        :param interval: The number of seconds between two refreshes.
+        """
+        self.stop_refresh()
+        stop = self._refresh_stop = threading.Event()
+
+        def refresh_loop():
+            while not stop.wait(interval):
+                try:
+                    self.refresh()
+                except Exception as err:
+                    logger.error("Variation index refresh failed: %s", err)
+
+        self._refresh_thread = threading.Thread(
+            target=refresh_loop, name="vtpass-variation-index", daemon=True
+        )
+        self._refresh_thread.start()
+
+    def stop_refresh(self):
+        """
+        Stop the background refresh, if it is running.
+        """
+        if self._refresh_stop is not None:
+            self._refresh_stop.set()
+            self._refresh_thread.join()
+            self._refresh_stop = None
+            self._refresh_thread = None
@@ -0,0 +1,284 @@
+import inspect
+import logging
+import threading
+import time
+
+from vtpass.requery import transaction_state
+from vtpass.transport import Hooks, VtPassRequest, default_hooks
+
+logger = logging.getLogger(__name__)
+
+# Transaction states VtPass has debited the wallet for
+DEBITED_STATES = ("delivered", "pending", "initiated")
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def charged_amount(result, data: dict = None):
+    """
+    Work out how much a /pay response took from the wallet.
+
+    That is the total_amount of the transaction, the amount net of the commission, falling back
+    to the amount minus the commission and then to the amount of the request.
+
+    :param result: The parsed JSON of a /pay or /requery response.
+    :param data: The body of the /pay request.
+    :return: The amount debited, or None if the response carries none.
+    """
+    content = result.get("content") if isinstance(result, dict) else None
+    transaction = content.get("transactions") if isinstance(content, dict) else None
+    if isinstance(transaction, dict):
+        total = _to_float(transaction.get("total_amount"))
+        if total is not None:
+            return total
+        amount = _to_float(transaction.get("amount"))
+        if amount is not None:
+            return amount - (_to_float(transaction.get("commission")) or 0.0)
+    amount = _to_float(result.get("amount")) if isinstance(result, dict) else None
+    if amount is None and data:
+        amount = _to_float(data.get("amount"))
+    return amount
+
+
+def _balance_of(result):
+    # get_credit_wallet_balance returns the full response when JSON_RESPONSE is "False"
+    if isinstance(result, dict):
+        result = (result.get("contents") or {}).get("balance")
+    return _to_float(result)
+
+
+class WalletLedger(object):
+    """
+    A local running balance of the VtPass wallet, to check purchases without calling /balance.
+
+    The ledger is seeded from /balance and debited by every /pay response going through the
+    hooks it is installed on, by the amount actually charged (net of the commission). Purchases
+    in flight are held back from the available balance until their response arrives, purchases
+    settled through a requery are debited then, and reversed ones are credited back.
+
+    The ledger reconciles with /balance every `reconcile_every` debits, in the background, and
+    on a timer once `start_reconcile` is called, one reconciliation at a time. Debits recorded
+    while /balance is in flight are applied on top of it, so the balance errs on the low side
+    until the next reconciliation.
+
+    Reconciliations run in threads, so the client must be a sync one. A ledger installed on the
+    default hooks still follows the purchases of the async clients.
+
+    Attributes:
+        client (VtPassPythonSDK): The client used to call `get_credit_wallet_balance`.
+        url (str): The base URL for the VtPass API.
+        reconcile_every (int): The number of debits after which the ledger reconciles, 0 to
+            only reconcile on demand or on the timer.
+        max_in_flight_age (float): The seconds after which a purchase that never got a response
+            stops being held back, at the next reconciliation. Longer than the /pay deadline.
+        balance (float): The balance of the wallet, None until the ledger is seeded.
+        drift (float): The difference between /balance and the ledger at the last reconciliation.
+        reconciled_at (float): The time.time() of the last reconciliation.
+    """
+
+    def __init__(
+        self,
+        client,
+        url: str,
+        reconcile_every: int = 100,
+        max_in_flight_age: float = 5 * 60,
+    ):
+        if inspect.iscoroutinefunction(
+            getattr(client, "get_credit_wallet_balance", None)
+        ):
+            raise TypeError(
+                "WalletLedger reconciles with a sync client, e.g VtPassPythonSDK(), "
+                "it still follows the purchases of the async clients through the hooks"
+            )
+        self.client = client
+        self.url = url
+        self.reconcile_every = reconcile_every
+        self.max_in_flight_age = max_in_flight_age
+        self.balance = None
+        self.drift = 0.0
+        self.reconciled_at = None
+        self._available = None
+        self._lock = threading.Lock()
+        # request ID: (amount held back, time.time() the purchase was sent) of the purchases in flight
+        self._in_flight = {}
+        # request ID: the amount debited, since the last reconciliation
+        self._debits = {}
+        self._debits_since_reconcile = 0
+        # the sum of every debit, for reconcile to tell the ones made while /balance was in flight
+        self._debited_total = 0.0
+        self._reconciling = False
+        self._reconcile_lock = threading.Lock()
+        self._reconcile_stop = None
+        self._reconcile_thread = None
+
+    def available_balance(self):
+        """
+        :return: The balance minus the purchases in flight, None until the ledger is seeded.
+        """
+        return self._available
+
+    def _update_available(self):
+        if self.balance is not None:
+            self._available = self.balance - sum(
+                amount for amount, _ in self._in_flight.values()
+            )
+
+    def reconcile(self):
+        """
+        Set the balance from /balance.
+
+        :return: The new balance, or None if /balance failed, in which case the ledger keeps its balance.
+        """
+        # the timer and the reconcile_every trigger may both call it
+        with self._reconcile_lock:
+            return self._reconcile()
+
+    def _reconcile(self):
+        with self._lock:
+            debited_total = self._debited_total
+            debited = list(self._debits)
+            debit_count = self._debits_since_reconcile
+        try:
+            balance = _balance_of(self.client.get_credit_wallet_balance(self.url))
+        finally:
+            with self._lock:
+                self._reconciling = False
+        if balance is None:
+            logger.error("Wallet ledger could not read the wallet balance")
+            return None
+        with self._lock:
+            # the debits made while /balance was in flight may be missing from it
+            balance -= self._debited_total - debited_total
+            if self.balance is not None:
+                self.drift = balance - self.balance
+                if abs(self.drift) >= 0.01:
+                    logger.warning(
+                        "Wallet ledger drifted by %.2f from the wallet balance",
+                        self.drift,
+                    )
+            self.balance = balance
+            self.reconciled_at = time.time()
+            # a purchase without a response past its deadline failed before reaching VtPass or
+            # is already in the wallet balance
+            expired_at = self.reconciled_at - self.max_in_flight_age
+            self._in_flight = {
+                request_id: in_flight
+                for request_id, in_flight in self._in_flight.items()
+                if in_flight[1] > expired_at
+            }
+            for request_id in debited:
+                self._debits.pop(request_id, None)
+            self._debits_since_reconcile -= debit_count
+            self._update_available()
+        logger.info("Wallet ledger reconciled, balance %.2f", balance)
+        return balance
+
+    def seed(self):
+        """
+        Set the balance from /balance, an alias of `reconcile` for the first call.
+        """
+        return self.reconcile()
+
+    def _debit(self, request_id: str, amount: float):
+        # called with the lock held
+        self.balance -= amount
+        self._debits[request_id] = amount
+        self._debited_total += amount
+        self._debits_since_reconcile += 1
+        if (
+            self.reconcile_every
+            and self._debits_since_reconcile >= self.reconcile_every
+            and not self._reconciling
+        ):
+            self._reconciling = True
+            threading.Thread(
+                target=self._reconcile_quietly, name="vtpass-wallet-ledger", daemon=True
+            ).start()
+
+    def _reconcile_quietly(self):
+        try:
+            self.reconcile()
+        except Exception as err:
+            logger.error("Wallet ledger reconciliation failed: %s", err)
+
+    def install(self, hooks: Hooks = default_hooks):
+        """
+        Start following the purchases going through the given hooks.
+        """
+        hooks.register("before_send", self._before_send)
+        hooks.register("after_receive", self._after_receive)
+
+    def uninstall(self, hooks: Hooks = default_hooks):
+        """
+        Stop following the purchases going through the given hooks.
+        """
+        hooks.unregister("before_send", self._before_send)
+        hooks.unregister("after_receive", self._after_receive)
+
+    def _before_send(self, request: VtPassRequest):
+        if request.endpoint == "pay" and request.data:
+            request_id = request.data.get("request_id")
+            amount = _to_float(request.data.get("amount"))
+            if request_id and amount:
+                with self._lock:
+                    self._in_flight.setdefault(request_id, (amount, time.time()))
+                    self._update_available()
+        return None
+
+    def _after_receive(self, request: VtPassRequest, response, result):
+        if request.endpoint not in ("pay", "requery") or not request.data:
+            return
+        request_id = request.data.get("request_id")
+        if not request_id or not isinstance(result, dict):
+            return
+        status = transaction_state(result)
+        with self._lock:
+            if self.balance is None:
+                self._in_flight.pop(request_id, None)
+                return
+            if status == "reversed" and request_id in self._debits:
+                self.balance += self._debits.pop(request_id)
+            elif status in DEBITED_STATES and request_id not in self._debits:
+                if request.endpoint == "pay" or request_id in self._in_flight:
+                    amount = charged_amount(result, request.data)
+                    if amount is not None:
+                        self._debit(request_id, amount)
+            if request.endpoint == "pay" or status is not None:
+                self._in_flight.pop(request_id, None)
+            self._update_available()
+
+    def start_reconcile(self, interval: float = 5 * 60):
+        """
+        Reconcile with /balance every `interval` seconds in a background thread.
+
+        :param interval: The number of seconds between two reconciliations.
+        """
+        self.stop_reconcile()
+        stop = self._reconcile_stop = threading.Event()
+
+        def reconcile_loop():
+            while not stop.wait(interval):
+                self._reconcile_quietly()
+
+        self._reconcile_thread = threading.Thread(
+            target=reconcile_loop, name="vtpass-wallet-ledger", daemon=True
+        )
+        self._reconcile_thread.start()
+
+    def stop_reconcile(self):
+        """
+        Stop the background reconciliation, if it is running.
+        """
+        if self._reconcile_stop is not None:
+            self._reconcile_stop.set()
+            self._reconcile_thread.join()
+            self._reconcile_stop = None
+            self._reconcile_thread = None
+
+    def __repr__(self):
+        return f"WalletLedger(balance={self.balance}, available={self._available})"